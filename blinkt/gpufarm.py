@@ -0,0 +1,288 @@
+# gpufarm.py: Collect GPU temperatures from many nvidia-smi feeders at once
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Each feeder is a host running
+#   nvidia-smi -l 1 --format=csv,noheader --query-gpu=index,temperature.gpu | nc -l <port>
+# which sends a line like "0, 45" for each GPU every second.
+#
+# Collector keeps a connection to every feeder open in one thread with
+# selectors. A connection that fails, ends, or goes quiet for STALE
+# seconds is closed and tried again after a backoff, doubling from
+# BACKOFF_MIN up to BACKOFF_MAX, back to BACKOFF_MIN once a line comes
+# in. Lines are taken from what has been received so far, however it
+# was split up, and ones that don't parse are counted and skipped.
+#
+# Looking a host up can take as long as the resolver likes, so each
+# connection's lookup happens in a thread of its own, which wakes the
+# selector when it has an answer. A slow or dead name server only holds
+# up the feeders it is asked about.
+#
+#   collector = Collector([Feeder("render1", 1024, 0), Feeder("render2", 1024, 8)],
+#                         update)
+#   while True:
+#       collector.poll(1)
+#
+# update(feeder, gpu, temp) is called for every line, and lost(feeder)
+# when a connection goes.
+
+import errno
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+PORT = 1024
+
+# Seconds before trying to connect again
+BACKOFF_MIN = 0.5
+BACKOFF_MAX = 30.0
+
+# Seconds without a line before a connection is given up on
+STALE = 10.0
+
+# Longest line worth waiting for the end of
+MAX_LINE = 256
+
+CHUNK = 4096
+
+# Colour of temperature t, from cold white-blue to hot red
+def colour(t):
+    r = 0; g = 0; b = 0
+    # Cold white-blue
+    if 0 <= t < 21:
+        b = 255
+        g = int(255 - (t * 255 / 20))
+        r = int(255 - (t * 255 / 20))
+    # Idle blue-green
+    if 20 < t < 41:
+        b = int(255 - ((t - 20) * 255 / 20))
+        g = int((t - 20) * 255 / 20)
+    # Warm green-yellow
+    if 40 < t < 61:
+        r = int((t - 40) * 127 / 20)
+        g = int(255 - ((t - 40) * 127 / 20))
+    # Warm yellow-orange
+    if 60 < t < 81:
+        r = int(127 + ((t - 60) * 127 / 20))
+        g = int(127 - ((t - 60) * 64 / 20))
+    # Hot orange-red
+    if t > 80:
+        g = max(0, int(64 - ((t - 80) * 64 / 10)))
+        r = 255
+    return r, g, b
+
+# "index, temperature" lines out of bytes as they come
+class Parser:
+    def __init__(self):
+        self.buffer = bytearray()
+        # Counters
+        self.lines = 0
+        self.bad = 0
+
+    # The (gpu, temp) of each whole line in data and what came before it
+    def feed(self, data):
+        buffer = self.buffer
+        start = len(buffer)
+        buffer += data
+        ret = []
+        begin = 0
+        end = buffer.find(b"\n", start)
+        while end >= 0:
+            fields = buffer[begin:end].split(b",")
+            try:
+                ret.append((int(fields[0]), int(fields[1])))
+                self.lines += 1
+            except (IndexError, ValueError):
+                if end > begin and buffer[begin:end].strip():
+                    self.bad += 1
+            begin = end + 1
+            end = buffer.find(b"\n", begin)
+        del buffer[:begin]
+        if len(buffer) > MAX_LINE:
+            self.bad += 1
+            del buffer[:]
+        return ret
+
+    def reset(self):
+        del self.buffer[:]
+
+class Feeder:
+    # GPU n of host shows on LED first + n
+    def __init__(self, host, port=PORT, first=0):
+        self.host = host
+        self.port = port
+        self.first = first
+        self.parser = Parser()
+        self.sock = None
+        # Being looked up, before connecting
+        self.resolving = False
+        self.connected = False
+        self.backoff = BACKOFF_MIN
+        self.retry = 0.0
+        self.heard = 0.0
+        # GPUs heard from on this connection
+        self.gpus = set()
+        # Counters
+        self.connects = 0
+        self.failures = 0
+
+    def __str__(self):
+        return self.host + ":" + str(self.port)
+
+# "HOST[:PORT][=LED]", an IPv6 address in [], first being the LED to
+# start from if none is given
+def parse_feeder(spec, first=0):
+    if "=" in spec:
+        spec, led = spec.rsplit("=", 1)
+        first = int(led)
+    host, sep, port = spec.rpartition(":")
+    if not sep or "]" in port:
+        return Feeder(spec.strip("[]"), PORT, first)
+    return Feeder(host.strip("[]"), int(port), first)
+
+class Collector:
+    def __init__(self, feeders, update, lost=None, stale=STALE):
+        self.feeders = feeders
+        self.update = update
+        self.lost = lost
+        self.stale = stale
+        self.selector = selectors.DefaultSelector()
+        # (feeder, address or None) from lookups that have finished
+        self.resolved = deque()
+        # Written to when there is something in resolved
+        self.waker, self.wakee = socket.socketpair()
+        self.waker.setblocking(False)
+        self.wakee.setblocking(False)
+        self.selector.register(self.wakee, selectors.EVENT_READ, None)
+
+    # Look the host up, then connect() once poll() has the answer
+    def resolve(self, feeder):
+        feeder.resolving = True
+        threading.Thread(target=self.lookup, args=(feeder,), daemon=True).start()
+
+    # In its own thread
+    def lookup(self, feeder):
+        try:
+            addr = socket.getaddrinfo(feeder.host, feeder.port, type=socket.SOCK_STREAM)[0]
+        except OSError:
+            addr = None
+        self.resolved.append((feeder, addr))
+        try:
+            self.waker.send(b"\0")
+        except BlockingIOError:
+            # Already more than enough to wake it
+            pass
+
+    def woken(self):
+        try:
+            while self.wakee.recv(CHUNK):
+                pass
+        except BlockingIOError:
+            pass
+        while self.resolved:
+            feeder, addr = self.resolved.popleft()
+            feeder.resolving = False
+            if addr is None:
+                self.fail(feeder)
+            else:
+                self.connect(feeder, addr)
+
+    def connect(self, feeder, addr):
+        sock = socket.socket(addr[0], addr[1], addr[2])
+        sock.setblocking(False)
+        feeder.sock = sock
+        feeder.parser.reset()
+        feeder.heard = time.monotonic()
+        err = sock.connect_ex(addr[4])
+        if err not in (0, errno.EINPROGRESS):
+            self.fail(feeder)
+            return
+        # Writable once connected, or once it has failed to
+        self.selector.register(sock, selectors.EVENT_WRITE, feeder)
+
+    def fail(self, feeder):
+        if feeder.sock:
+            try:
+                self.selector.unregister(feeder.sock)
+            except KeyError:
+                pass
+            feeder.sock.close()
+            feeder.sock = None
+        if feeder.connected and self.lost:
+            self.lost(feeder)
+        feeder.connected = False
+        feeder.gpus = set()
+        feeder.failures += 1
+        feeder.retry = time.monotonic() + feeder.backoff
+        feeder.backoff = min(feeder.backoff * 2, BACKOFF_MAX)
+
+    def ready(self, feeder):
+        sock = feeder.sock
+        if not feeder.connected:
+            if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                self.fail(feeder)
+                return
+            feeder.connected = True
+            feeder.connects += 1
+            self.selector.modify(sock, selectors.EVENT_READ, feeder)
+            return
+        try:
+            data = sock.recv(CHUNK)
+        except BlockingIOError:
+            return
+        except OSError:
+            self.fail(feeder)
+            return
+        if not data:
+            self.fail(feeder)
+            return
+        lines = feeder.parser.feed(data)
+        if lines:
+            feeder.heard = time.monotonic()
+            feeder.backoff = BACKOFF_MIN
+        for gpu, temp in lines:
+            feeder.gpus.add(gpu)
+            self.update(feeder, gpu, temp)
+
+    # Wait up to timeout seconds for something to happen, and deal with it
+    def poll(self, timeout):
+        now = time.monotonic()
+        end = now + timeout
+        for feeder in self.feeders:
+            if feeder.resolving:
+                continue
+            if feeder.sock is None and feeder.retry <= now:
+                self.resolve(feeder)
+                continue
+            if feeder.sock and now - feeder.heard > self.stale:
+                self.fail(feeder)
+            if feeder.sock is None:
+                end = min(end, feeder.retry)
+            else:
+                end = min(end, feeder.heard + self.stale)
+        for key, events in self.selector.select(max(0, end - now)):
+            if key.data is None:
+                self.woken()
+            else:
+                self.ready(key.data)
+
+    def stats(self):
+        return dict((str(feeder), {"connected": feeder.connected, "gpus": len(feeder.gpus),
+                                   "lines": feeder.parser.lines, "bad": feeder.parser.bad,
+                                   "connects": feeder.connects, "failures": feeder.failures})
+                    for feeder in self.feeders)
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+#
+# gputemp_bench.py: Fake nvidia-smi feeders, and gputemp_blinkt.py's
+# collector run against them
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Usage: ./gputemp_bench.py [--hosts N] [--gpus N] [--seconds N] [--interval SECONDS]
+#                           [--port PORT] [--fps FPS] [collect|render|serve]
+#
+# collect runs the old blocking client and then the collector against
+# fake feeders on localhost that split their lines up, send lines that
+# don't parse, hang up, and go away for a while, and checks the strips
+# end up showing the last temperature of every GPU.
+#
+# render feeds nvidia-smi's lines, once a second from every host, to
+# APA102 strips on a GPIO that counts calls, shown after every line as
+# gputemp_blinkt.py used to, and then through a Renderer.
+#
+# serve just runs the fake feeders, from --port on, for trying
+# gputemp_blinkt.py itself on:
+#   ./gputemp_bench.py serve --hosts 3 --port 1024
+#   ./gputemp_blinkt.py localhost:1024 localhost:1025 localhost:1026
+
+import argparse
+import random
+import socket
+import threading
+import time
+import gpufarm
+import strips
+
+# Stands in for a host running nvidia-smi into nc -l in a loop. Faults,
+# chance of each a line:
+#   junk    a line that doesn't parse, as nvidia-smi gives for "[N/A]"
+#   split   the line goes out in pieces
+#   hangup  the connection is closed
+#   down    nothing listens on the port for a while
+class FakeFeeder:
+    def __init__(self, gpus, interval, port=0, seed=0, junk=0.0, split=0.0,
+                 hangup=0.0, down=0.0, downtime=1.0):
+        self.gpus = gpus
+        self.interval = interval
+        self.port = port
+        self.random = random.Random(seed)
+        self.junk = junk
+        self.split = split
+        self.hangup = hangup
+        self.down = down
+        self.downtime = downtime
+        self.temps = [self.random.randint(20, 90) for n in range(gpus)]
+        # The temperature each GPU was at in the last line of it sent
+        self.sent = {}
+        self.listener = None
+        self.running = True
+        self.faults = True
+        # Connected but saying nothing
+        self.paused = False
+        self.listen()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def listen(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(("127.0.0.1", self.port))
+        self.port = self.listener.getsockname()[1]
+        self.listener.listen(1)
+
+    def fault(self, chance):
+        return self.faults and self.random.random() < chance
+
+    def run(self):
+        while self.running:
+            self.listener.settimeout(0.1)
+            try:
+                conn, addr = self.listener.accept()
+            except socket.timeout:
+                continue
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                self.serve(conn)
+            except OSError:
+                pass
+            conn.close()
+            if self.running and self.fault(self.down):
+                self.listener.close()
+                time.sleep(self.downtime)
+                self.listen()
+
+    def serve(self, conn):
+        while self.running:
+            if self.paused:
+                time.sleep(0.01)
+                continue
+            for gpu in range(self.gpus):
+                self.temps[gpu] = max(0, min(100, self.temps[gpu] + self.random.randint(-2, 2)))
+                if self.fault(self.junk):
+                    line = str(gpu) + ", [N/A]\n"
+                else:
+                    line = str(gpu) + ", " + str(self.temps[gpu]) + "\n"
+                data = line.encode()
+                if self.fault(self.split):
+                    cut = self.random.randint(1, len(data) - 1)
+                    conn.sendall(data[:cut])
+                    time.sleep(0.001)
+                    conn.sendall(data[cut:])
+                else:
+                    conn.sendall(data)
+                if not line.endswith("]\n"):
+                    self.sent[gpu] = self.temps[gpu]
+                if self.fault(self.hangup):
+                    return
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        self.listener.close()
+
+# Stands in for Strips: remembers each pixel, and counts show()s
+class FakeStrips:
+    def __init__(self, pixels):
+        self.pixels = pixels
+        self.colours = [(0, 0, 0)] * pixels
+        self.shows = 0
+
+    def set_pixel(self, led, r, g, b):
+        self.colours[led] = (r, g, b)
+
+    def clear(self):
+        self.colours = [(0, 0, 0)] * self.pixels
+
+    def show(self):
+        self.shows += 1
+
+# Feeders that hang up about every 5 seconds, a third of the time not
+# coming back for half a second
+def feeders(args):
+    return [FakeFeeder(args.gpus, args.interval, seed=n, junk=0.02, split=0.1,
+                       hangup=0.2 * args.interval / args.gpus, down=0.3, downtime=0.5)
+            for n in range(args.hosts)]
+
+# The old gputemp_blinkt.py loop, the LEDs left out, until it goes wrong
+def legacy_client(port, leds, seconds):
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.connect(("127.0.0.1", port))
+    sf = s.makefile()
+    lines = 0
+    end = time.monotonic() + seconds
+    try:
+        while time.monotonic() < end:
+            temps_recv = sf.readline()
+            l = temps_recv.split(", ")
+            gpu = int(l[0])
+            temp = int(l[1])
+            leds.set_pixel(gpu, *gpufarm.colour(temp))
+            leds.show()
+            lines += 1
+        return lines, None
+    except Exception as e:
+        return lines, type(e).__name__ + ": " + str(e)
+    finally:
+        s.close()
+
+def bench_collect(args):
+    fakes = feeders(args)
+    leds = FakeStrips(args.gpus)
+    start = time.monotonic()
+    lines, error = legacy_client(fakes[0].port, leds, args.seconds)
+    print("before: 1 of " + str(args.hosts) + " hosts, " + str(lines) + " lines, "
+          + ("died after " + format(time.monotonic() - start, ".2f") + "s, " + error
+             if error else "ran " + format(args.seconds, "g") + "s"))
+    for fake in fakes:
+        fake.stop()
+
+    fakes = feeders(args)
+    leds = FakeStrips(args.hosts * strips.PIXELS)
+    farm = [gpufarm.Feeder("127.0.0.1", fake.port, n * strips.PIXELS)
+            for n, fake in enumerate(fakes)]
+    def update(feeder, gpu, temp):
+        leds.set_pixel(feeder.first + gpu, *gpufarm.colour(temp))
+        leds.show()
+    def lost(feeder):
+        for gpu in feeder.gpus:
+            leds.set_pixel(feeder.first + gpu, 0, 0, 0)
+        leds.show()
+    collector = gpufarm.Collector(farm, update, lost)
+    start = time.monotonic()
+    cpu = time.thread_time()
+    while time.monotonic() - start < args.seconds:
+        collector.poll(0.1)
+    # The faults stop, and every feeder gets a chance to come back and
+    # send everything again
+    for fake in fakes:
+        fake.faults = False
+    settle = time.monotonic() + gpufarm.BACKOFF_MAX
+    while time.monotonic() < settle:
+        collector.poll(0.1)
+        if all(feeder.connected and len(feeder.gpus) == args.gpus for feeder in farm):
+            break
+    for fake in fakes:
+        fake.paused = True
+    # Whatever was in flight
+    drain = time.monotonic() + 0.5
+    while time.monotonic() < drain:
+        collector.poll(0.05)
+    elapsed = time.monotonic() - start
+    cpu = time.thread_time() - cpu
+    stats = collector.stats().values()
+    print("after : " + str(args.hosts) + " of " + str(args.hosts) + " hosts, "
+          + str(sum(s["lines"] for s in stats)) + " lines, "
+          + str(sum(s["bad"] for s in stats)) + " bad, "
+          + str(sum(s["connects"] for s in stats)) + " connects, "
+          + str(sum(s["failures"] for s in stats)) + " failures in "
+          + format(elapsed, ".2f") + "s, " + format(100 * cpu / elapsed, ".1f")
+          + "% CPU collecting")
+    for fake, feeder in zip(fakes, farm):
+        for gpu in range(args.gpus):
+            want = gpufarm.colour(fake.sent[gpu])
+            if leds.colours[feeder.first + gpu] != want:
+                print("MISMATCH: " + str(feeder) + " GPU " + str(gpu) + " shows "
+                      + str(leds.colours[feeder.first + gpu]) + ", last sent "
+                      + str(fake.sent[gpu]) + " " + str(want))
+                exit(1)
+    for fake in fakes:
+        fake.stop()
+
+    # Lines cut anywhere, even a byte at a time, parse the same
+    data = b"".join(str(n % 8).encode() + b", " + str(n % 101).encode() + b"\n"
+                    for n in range(1000)) + b"0, [N/A]\nrubbish\n\n1, 2"
+    want = gpufarm.Parser().feed(data + b"\n")
+    for size in (1, 2, 3, 7, 4096):
+        parser = gpufarm.Parser()
+        got = []
+        for n in range(0, len(data), size):
+            got += parser.feed(data[n:n + size])
+        got += parser.feed(b"\n")
+        if got != want or parser.bad != 2 or len(got) != 1001:
+            print("MISMATCH: " + str(len(got)) + " lines, " + str(parser.bad)
+                  + " bad, in pieces of " + str(size))
+            exit(1)
+
+    # A host whose lookup hangs for 2s doesn't hold the others up
+    lookup = socket.getaddrinfo
+    def slow(host, *rest, **kwargs):
+        if host == "slow.invalid":
+            time.sleep(2)
+            raise socket.gaierror("timed out")
+        return lookup(host, *rest, **kwargs)
+    socket.getaddrinfo = slow
+    fake = FakeFeeder(args.gpus, args.interval)
+    heard = []
+    collector = gpufarm.Collector([gpufarm.Feeder("slow.invalid"),
+                                   gpufarm.Feeder("127.0.0.1", fake.port, strips.PIXELS)],
+                                  lambda feeder, gpu, temp: heard.append(time.monotonic()))
+    start = time.monotonic()
+    while not heard and time.monotonic() - start < 2:
+        collector.poll(0.1)
+    socket.getaddrinfo = lookup
+    fake.stop()
+    if not heard:
+        print("MISMATCH: nothing heard while another host was being looked up")
+        exit(1)
+    print("slow lookup: first line after " + format((heard[0] - start) * 1000, ".1f") + "ms")
+
+# Enough of RPi.GPIO for APA102, counting the calls
+class CountingGPIO:
+    BCM = 11
+    OUT = 0
+
+    def __init__(self):
+        self.calls = 0
+
+    def setup(self, pin, direction):
+        pass
+
+    def output(self, pin, level):
+        self.calls += 1
+
+# A minute of lines from every host: (time, LED, temperature), the GPUs
+# of a host a millisecond apart, the hosts at random in each second
+def lines(args, seconds=60):
+    rand = random.Random(0)
+    temps = [rand.randint(20, 90) for n in range(args.hosts * args.gpus)]
+    offsets = [rand.random() * 0.9 for n in range(args.hosts)]
+    ret = []
+    for second in range(seconds):
+        for host in range(args.hosts):
+            for gpu in range(args.gpus):
+                n = host * args.gpus + gpu
+                if rand.random() < 0.3:
+                    temps[n] = max(0, min(100, temps[n] + rand.choice((-1, 1))))
+                ret.append((second + offsets[host] + gpu * 0.001,
+                            host * strips.PIXELS + gpu, temps[n]))
+    ret.sort()
+    return ret
+
+def strip_set(args, GPIO):
+    return strips.Strips([strips.APA102(2 * n, 2 * n + 1, GPIO=GPIO) for n in range(args.hosts)])
+
+def bench_render(args):
+    stream = lines(args)
+    GPIO = CountingGPIO()
+    before = strip_set(args, GPIO)
+    start = time.perf_counter()
+    for t, led, temp in stream:
+        before.set_pixel(led, *gpufarm.colour(temp))
+        before.show()
+    elapsed = time.perf_counter() - start
+    print("before: " + str(len(stream)) + " lines, " + str(len(stream)) + " frames, "
+          + str(GPIO.calls) + " GPIO calls, " + format(elapsed, ".2f") + "s CPU")
+
+    GPIO = CountingGPIO()
+    after = strip_set(args, GPIO)
+    render = strips.Renderer(after, args.fps)
+    start = time.perf_counter()
+    for t, led, temp in stream:
+        # The frame the loop would have woken up for, before this line
+        if render.wait(t) == 0:
+            render.flush(render.last + render.interval)
+        render.set_pixel(led, *gpufarm.colour(temp))
+        render.flush(t)
+    render.flush(force=True)
+    elapsed = time.perf_counter() - start
+    stats = render.stats()
+    print("after : " + str(stats["updates"]) + " lines, " + str(stats["frames"]) + " frames, "
+          + str(stats["changes"]) + " pixel changes, " + str(GPIO.calls) + " GPIO calls, "
+          + format(elapsed, ".2f") + "s CPU, at most " + format(args.fps, "g") + " fps")
+
+    for strip, (n, was) in zip(after.strips, enumerate(before.strips)):
+        if strip.colours != was.colours:
+            print("MISMATCH: strip " + str(n) + " ends " + str(strip.colours)
+                  + ", " + str(was.colours) + " before")
+            exit(1)
+    if stats["frames"] > 60 * args.fps + 1:
+        print("MISMATCH: " + str(stats["frames"]) + " frames in 60s")
+        exit(1)
+
+def bench_serve(args):
+    fakes = [FakeFeeder(args.gpus, args.interval, args.port + n, seed=n)
+             for n in range(args.hosts)]
+    for fake in fakes:
+        print("feeder on port " + str(fake.port))
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="GPU temperature collector benchmark")
+    parser.add_argument("bench", nargs="?", default="collect", choices=["collect", "render", "serve"])
+    parser.add_argument("--hosts", type=int, default=8, help="how many feeders")
+    parser.add_argument("--gpus", type=int, default=7, help="GPUs each")
+    parser.add_argument("--seconds", type=float, default=5, help="how long to run")
+    parser.add_argument("--interval", type=float, default=0.05,
+                        help="seconds between each feeder's rounds of lines (nvidia-smi's is 1)")
+    parser.add_argument("--port", type=int, default=gpufarm.PORT, help="first port to serve on")
+    parser.add_argument("--fps", type=float, default=strips.FPS, help="most frames a second")
+    args = parser.parse_args()
+    if args.bench == "collect":
+        bench_collect(args)
+    elif args.bench == "render":
+        bench_render(args)
+    else:
+        bench_serve(args)
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,15 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 #
 # gputemp_blinkt.py - Show remote GPU temperatures on a Blinkt!
 #
-# I run this on the remote server:
-#   nvidia-smi -l 1 --format=csv,noheader --query-gpu=index,temperature.gpu | nc -l <port>
+# I run this on each remote server:
+#   while true; do
+#     nvidia-smi -l 1 --format=csv,noheader --query-gpu=index,temperature.gpu | nc -l <port>
+#   done
+# and give them all here:
+#   ./gputemp_blinkt.py render1:1024 render2:1024 render3:1024=4
+# GPU n of each shows on LED n of its own strip, or from the LED after
+# the = on. More strips can go on other pins with --strip DAT:CLK.
 #
 # Copyright (c) 2019 Mike Mallett <mike@nerdcore.net>
 #
@@ -20,69 +26,94 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import blinkt
+import argparse
+import sys
 import time
-import socket
+import gpufarm
+import strips
 
-# Put your connection details here
-# ip should be a string
-# port should be int
-ip = ""
-port = 1024
+parser = argparse.ArgumentParser(description="Show remote GPU temperatures on a Blinkt!")
+parser.add_argument("feeders", nargs="+", metavar="HOST[:PORT][=LED]",
+                    help="nvidia-smi feeders, port " + str(gpufarm.PORT) + " if not given, "
+                    + "each on the next strip if no LED is given")
+parser.add_argument("--strip", action="append", default=[], metavar="DAT:CLK",
+                    help="another APA102 strip, after the Blinkt!")
+parser.add_argument("--brightness", type=float, default=strips.BRIGHTNESS)
+parser.add_argument("--fps", type=float, default=strips.FPS,
+                    help="show changes on the strips no more often than this")
+parser.add_argument("--heartbeat", type=int, default=7, metavar="LED",
+                    help="blink this LED once a second to show this is running, -1 not to")
+parser.add_argument("--stale", type=float, default=gpufarm.STALE, metavar="SECONDS",
+                    help="reconnect to a feeder that has sent nothing for this long")
+parser.add_argument("--stats", type=float, metavar="SECONDS",
+                    help="print each feeder's counters this often")
+parser.add_argument("--verbose", action="store_true", help="print every temperature")
+args = parser.parse_args()
 
-# show temp t on led l
-def show_temp(l,t):
-    r=0;g=0;b=0
-    # Cold white-blue
-    if 0 <= t < 21:
-        b=255
-        g=int(255-(t*255/20))
-        r=int(255-(t*255/20))
-    # Idle blue-green
-    if 20 < t < 41:
-        b=int(255-((t-20)*255/20))
-        g=int((t-20)*255/20)
-    # Warm green-yellow
-    if 40 < t < 61:
-        r=int((t-40)*127/20)
-        g=int(255-((t-40)*127/20))
-    # Warm yellow-orange
-    if 60 < t < 81:
-        r=int(127+((t-60)*127/20))
-        g=int(127-((t-60)*64/20))
-    # Hot orange-red
-    if t > 80:
-        g=int(64-((t-80)*64/10))
-        r=255
-    print('gpu:{} temp:{} r:{} g:{} b:{}').format(l, t, r, g, b)
-    blinkt.set_pixel(l, r, g, b)
-    #blinkt.show()
+leds = strips.Strips([strips.Blinkt(args.brightness)]
+                     + [strips.APA102(*strips.parse_pins(spec), brightness=args.brightness)
+                        for spec in args.strip])
+# Start from dark, whatever the strips were left showing
+leds.show()
+# Temperatures go into this, and out to the strips only as they change
+render = strips.Renderer(leds, args.fps)
+feeders = [gpufarm.parse_feeder(spec, n * strips.PIXELS) for n, spec in enumerate(args.feeders)]
+for feeder in feeders:
+    if feeder.first >= leds.pixels:
+        print(str(feeder) + ": LED " + str(feeder.first) + " is past the end of the strips, "
+              + "add one with --strip", file=sys.stderr)
 
-blinkt.set_clear_on_exit()
-blinkt.set_brightness(0.1)
-blinkt.clear()
+# show temp t of a feeder's gpu
+def show_temp(feeder, gpu, t):
+    led = feeder.first + gpu
+    if not 0 <= led < leds.pixels or led == args.heartbeat:
+        return
+    r, g, b = gpufarm.colour(t)
+    if args.verbose:
+        print('{} gpu:{} temp:{} r:{} g:{} b:{}'.format(feeder, gpu, t, r, g, b))
+    render.set_pixel(led, r, g, b)
 
-try:
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    print "Socket successfully created"
-except socket.error as err:
-    print "socket creation failed with error %s" %(err)
-
-s.connect((ip, port))
-# Socket as File gives us buffered readline()
-sf = s.makefile()
+# Don't leave the temperatures of a feeder that's gone showing
+def lost(feeder):
+    print(str(feeder) + ": connection lost", file=sys.stderr)
+    for gpu in feeder.gpus:
+        led = feeder.first + gpu
+        if 0 <= led < leds.pixels and led != args.heartbeat:
+            render.set_pixel(led, 0, 0, 0)
 
-while True:
-    temps_recv = sf.readline()
-    l = temps_recv.split(", ")
-    gpu = int(l[0])
-    temp = int(l[1])
-    show_temp(gpu, temp)
-    # KLUDGE: If the script dies suddenly, set_clear_on_exit() doesn't happen.
-    # Instead, cycle LED #7 on and off per-second to indicate life.
-    onoff = (int(time.time()) & 1) * 255
-    blinkt.set_pixel(7, onoff, onoff, onoff)
-    blinkt.show()
+def report():
+    lines = 0
+    for name, stats in collector.stats().items():
+        print(name + ": " + ("up" if stats["connected"] else "down") + ", "
+              + str(stats["gpus"]) + " GPUs, " + str(stats["lines"]) + " lines, "
+              + str(stats["bad"]) + " bad, " + str(stats["connects"]) + " connects, "
+              + str(stats["failures"]) + " failures", file=sys.stderr)
+        lines += stats["lines"]
+    stats = render.stats()
+    print(str(lines) + " lines, " + str(stats["changes"]) + " pixel changes, "
+          + str(stats["frames"]) + " frames shown", file=sys.stderr)
 
-print "Flagrant System Error!"
-blinkt.clear()
+collector = gpufarm.Collector(feeders, show_temp, lost, args.stale)
+next_stats = time.monotonic() + (args.stats or 0)
+try:
+    while True:
+        # Wake at least each half second, for the heartbeat, and when
+        # there's a frame to show
+        wait = 0.5 - time.time() % 0.5
+        frame = render.wait()
+        collector.poll(wait if frame is None else min(wait, frame))
+        # KLUDGE: If the script dies suddenly, set_clear_on_exit() doesn't
+        # happen. Instead, cycle the heartbeat LED on and off per-second to
+        # indicate life.
+        if 0 <= args.heartbeat < leds.pixels:
+            onoff = (int(time.time()) & 1) * 255
+            render.set_pixel(args.heartbeat, onoff, onoff, onoff)
+        render.flush()
+        if args.stats and time.monotonic() >= next_stats:
+            report()
+            next_stats += args.stats
+except KeyboardInterrupt:
+    pass
+finally:
+    leds.clear()
+    leds.show()
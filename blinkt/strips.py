@@ -0,0 +1,196 @@
+# strips.py: One row of LEDs across any number of Blinkt!-like strips
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# The Blinkt! is eight APA102 pixels on GPIO 23 (data) and 24 (clock),
+# driven by Pimoroni's blinkt module. More APA102 strips can go on any
+# other pair of pins, and are bit-banged here the way blinkt does it.
+# Strips numbers the LEDs of them all in a row, eight to a strip, the
+# Blinkt! first:
+#   leds = Strips([Blinkt(), APA102(5, 6)])
+#   leds.set_pixel(9, 255, 0, 0)    # the second pixel of the second strip
+#   leds.show()
+#
+# Clocking a strip out costs the same whatever has changed, so Renderer
+# sits in front of Strips and keeps its own copy of every pixel. Only a
+# pixel whose colour actually changes is marked dirty, and flush() sends
+# the dirty pixels, and shows only the strips they are on, at most fps
+# times a second:
+#   render = Renderer(leds, 10)
+#   render.set_pixel(9, 255, 0, 0)
+#   time.sleep(render.wait())
+#   render.flush()
+
+import time
+
+PIXELS = 8
+BRIGHTNESS = 0.1
+
+# Frames a second, at the most
+FPS = 10
+
+# The Blinkt! itself
+class Blinkt:
+    def __init__(self, brightness=BRIGHTNESS):
+        import blinkt
+        self.blinkt = blinkt
+        self.pixels = blinkt.NUM_PIXELS
+        blinkt.set_clear_on_exit()
+        blinkt.set_brightness(brightness)
+        blinkt.clear()
+
+    def set_pixel(self, n, r, g, b):
+        self.blinkt.set_pixel(n, r, g, b)
+
+    def clear(self):
+        self.blinkt.clear()
+
+    def show(self):
+        self.blinkt.show()
+
+# A strip of APA102 pixels on two GPIO pins
+class APA102:
+    # GPIO is RPi.GPIO, or something that does the same
+    def __init__(self, dat, clk, pixels=PIXELS, brightness=BRIGHTNESS, GPIO=None):
+        if GPIO is None:
+            import RPi.GPIO as GPIO
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setwarnings(False)
+        self.GPIO = GPIO
+        self.dat = dat
+        self.clk = clk
+        self.pixels = pixels
+        GPIO.setup(dat, GPIO.OUT)
+        GPIO.setup(clk, GPIO.OUT)
+        # The first byte of each pixel is 0b111 and five bits of brightness
+        self.head = 0b11100000 | int(31 * brightness)
+        self.colours = [(0, 0, 0)] * pixels
+
+    def set_pixel(self, n, r, g, b):
+        self.colours[n] = (int(r) & 0xff, int(g) & 0xff, int(b) & 0xff)
+
+    def clear(self):
+        self.colours = [(0, 0, 0)] * self.pixels
+
+    def write_byte(self, byte):
+        output = self.GPIO.output
+        for bit in range(8):
+            output(self.dat, byte & 0x80)
+            output(self.clk, 1)
+            byte <<= 1
+            output(self.clk, 0)
+
+    # count zero bits
+    def clocks(self, count):
+        output = self.GPIO.output
+        output(self.dat, 0)
+        for n in range(count):
+            output(self.clk, 1)
+            output(self.clk, 0)
+
+    # A start frame of 32 zero bits, the pixels in blue, green, red, and
+    # clocks enough to push the last of them through
+    def show(self):
+        self.clocks(32)
+        for r, g, b in self.colours:
+            self.write_byte(self.head)
+            self.write_byte(b)
+            self.write_byte(g)
+            self.write_byte(r)
+        self.clocks(36)
+
+class Strips:
+    def __init__(self, strips):
+        self.strips = strips
+        self.pixels = sum(strip.pixels for strip in strips)
+        # Which strip, and which pixel of it, each LED is
+        self.where = [(strip, n) for strip in strips for n in range(strip.pixels)]
+
+    def set_pixel(self, led, r, g, b):
+        strip, n = self.where[led]
+        strip.set_pixel(n, r, g, b)
+
+    def clear(self):
+        for strip in self.strips:
+            strip.clear()
+
+    def show(self):
+        for strip in self.strips:
+            strip.show()
+
+class Renderer:
+    def __init__(self, leds, fps=FPS):
+        self.leds = leds
+        self.interval = 1.0 / fps
+        self.colours = [(0, 0, 0)] * leds.pixels
+        self.dirty = set()
+        self.last = None
+        # Counters
+        self.updates = 0
+        self.changes = 0
+        self.frames = 0
+
+    def set_pixel(self, led, r, g, b):
+        self.updates += 1
+        colour = (int(r), int(g), int(b))
+        if self.colours[led] != colour:
+            self.colours[led] = colour
+            self.dirty.add(led)
+            self.changes += 1
+
+    def clear(self):
+        for led in range(self.leds.pixels):
+            self.set_pixel(led, 0, 0, 0)
+
+    # Seconds until there is a frame to flush(), None if nothing has changed
+    def wait(self, now=None):
+        if not self.dirty:
+            return None
+        if self.last is None:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+        return max(0.0, self.last + self.interval - now)
+
+    # Send what has changed, if it is time to; True if it was
+    def flush(self, now=None, force=False):
+        if not self.dirty:
+            return False
+        if now is None:
+            now = time.monotonic()
+        if not force and self.last is not None and now < self.last + self.interval:
+            return False
+        where = self.leds.where
+        shown = set()
+        for led in self.dirty:
+            strip, n = where[led]
+            strip.set_pixel(n, *self.colours[led])
+            shown.add(strip)
+        for strip in self.leds.strips:
+            if strip in shown:
+                strip.show()
+        self.dirty.clear()
+        self.last = now
+        self.frames += 1
+        return True
+
+    def stats(self):
+        return {"updates": self.updates, "changes": self.changes, "frames": self.frames}
+
+# "DAT:CLK" for an APA102 strip on those pins
+def parse_pins(spec):
+    dat, clk = spec.split(":")
+    return int(dat), int(clk)
@@ -0,0 +1,31 @@
+# crypto: Cryptocurrency prices for the lcd tickers
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Usage:
+#   from crypto import Fetcher
+#   fetcher = Fetcher()
+#   prices = fetcher.fetch([("BTC", "USD"), ("ETH", "BTC")])
+#
+#   from crypto import PriceCache
+#   cache = PriceCache(fetcher, ttl=300)
+#   btcusd = cache.get(("BTC", "USD")) # None until the first fetch is in
+
+from .fetch import Fetcher, Cryptonator, CryptoCompare
+from .cache import PriceCache
+from .currency import Currency, CURRENCIES, currency, load as load_currencies
+from .amount import amount, decimal
@@ -0,0 +1,62 @@
+# amount.py: Fit prices into a few LCD columns, without float noise
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Prices are handled as Decimal, as the fetchers and the cache give them.
+# A float given here goes through its shortest repr, so 0.1 stays 0.1
+# rather than 0.1000000000000000055...
+#
+# amount() truncates (never rounds up) to the currency's precision, and
+# then to however many digits fit:
+#   - at most digits significant digits
+#   - no more than width columns, sign included, dropping decimals first
+#   - then K, M, G or T for thousands, millions, ... if it still won't fit
+#   amount(67012.345, 2, 16, sign="$")    "$67012.34"
+#   amount(0.0531234567891234, 18)        "0.053123456"
+#   amount(123456789, 2, 8)               "123456K"
+#   amount(123456789, 2, 6)               "123.4M"
+
+from decimal import Decimal, ROUND_DOWN
+
+# Significant digits shown, whatever the precision
+DIGITS = 8
+
+SUFFIXES = (("", 0), ("K", 3), ("M", 6), ("G", 9), ("T", 12))
+
+def decimal(value):
+  if isinstance(value, float):
+    return Decimal(repr(value))
+  return Decimal(value)
+
+# value formatted with at most precision decimals into width columns,
+# sign (a currency symbol) first. Anything too big even as T is all #.
+def amount(value, precision, width=16, digits=DIGITS, sign=""):
+  value = decimal(value)
+  room = width - len(sign) - (1 if value < 0 else 0)
+  for suffix, exp in SUFFIXES:
+    scaled = value.scaleb(-exp)
+    # Digits left of the point, and the place of the first significant one
+    first = scaled.adjusted() + 1 if scaled else 0
+    whole = max(first, 1)
+    left = room - len(suffix)
+    if whole > left:
+      continue
+    places = min(precision + exp, digits - first, left - whole - 1)
+    places = max(places, 0)
+    text = format(scaled.quantize(Decimal(1).scaleb(-places), rounding=ROUND_DOWN), "f")
+    return sign + text + suffix
+  return "#" * width
@@ -0,0 +1,187 @@
+# cache.py: Prices kept between runs, refreshed in the background
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# PriceCache holds the last price for every pair with the time it was
+# fetched, and saves them to disk after every refresh. On start up the
+# saved prices are shown straight away, however old.
+#
+# get() and get_many() never wait on the network. A price younger than ttl is a hit.
+# An older one is still returned (stale), and a refresh of everything
+# due is started in the background. A pair never fetched is a miss, and
+# also starts a refresh.
+#
+# A pair that fails to fetch (rate limited, server error, no network)
+# isn't tried again for RETRY_MIN seconds, doubling with each failure in
+# a row up to RETRY_MAX, so an outage doesn't mean a request for every
+# get(). The first price that comes back puts it back to normal.
+#
+# Prices are saved as strings, so they come back as the same Decimal.
+#
+# The file is only a cache: if it can't be read, or holds something
+# other than what save() writes, it is ignored, entry by entry.
+
+import json
+import os
+import tempfile
+import threading
+import time
+from .amount import decimal
+
+# Seconds before a pair that failed is fetched again
+RETRY_MIN = 10.0
+RETRY_MAX = 600.0
+
+def default_path():
+  cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+  return os.path.join(cache, "rpi-lcd", "prices.json")
+
+class PriceCache:
+  # fetcher is a crypto.Fetcher, ttl in seconds (use API_RATE)
+  def __init__(self, fetcher, ttl, path=None):
+    self.fetcher = fetcher
+    self.ttl = ttl
+    self.path = path or default_path()
+    self.lock = threading.Lock()
+    self.refreshing = None
+    # Pairs asked for but never fetched, picked up by the next refresh
+    self.wanted = set()
+    # {pair: (price, fetched)}, price a Decimal and fetched from time.time()
+    self.entries = {}
+    # {pair: (retry, backoff)} for pairs whose last fetch failed, not to
+    # be fetched again before retry
+    self.retry = {}
+    # Counters
+    self.hits = 0
+    self.misses = 0
+    self.stale = 0
+    self.refreshes = 0
+    self.failures = 0
+    self.load()
+
+  # Returns the price of pair, or None if there isn't one yet
+  def get(self, pair):
+    return self.get_many([pair]).get(pair)
+
+  # Returns {pair: price} for those of pairs which have one. Anything
+  # missing or stale is refreshed together, in one go.
+  def get_many(self, pairs):
+    prices = {}
+    due = []
+    now = time.time()
+    with self.lock:
+      for pair in pairs:
+        entry = self.entries.get(pair)
+        if entry is None:
+          self.misses += 1
+          self.wanted.add(pair)
+          due.append(pair)
+          continue
+        if now - entry[1] > self.ttl:
+          self.stale += 1
+          due.append(pair)
+        else:
+          self.hits += 1
+        prices[pair] = entry[0]
+    if due:
+      self.revalidate(due)
+    return prices
+
+  # Start a background refresh of pairs, and any others which are due,
+  # unless one is already running or they are all waiting to be retried.
+  # Returns the thread, if started.
+  def revalidate(self, pairs=()):
+    with self.lock:
+      if self.refreshing and self.refreshing.is_alive():
+        return None
+      now = time.time()
+      due = self.wanted.union(pairs)
+      due.update(pair for pair, entry in self.entries.items() if now - entry[1] > self.ttl)
+      waiting = set(pair for pair in due if pair in self.retry and self.retry[pair][0] > now)
+      due -= waiting
+      # Pairs never fetched are still wanted once their wait is over
+      self.wanted &= waiting
+      if not due:
+        return None
+      # Started before the lock goes, so nobody else sees a thread that
+      # isn't alive yet and starts another
+      self.refreshing = threading.Thread(target=self.refresh, args=(sorted(due),), daemon=True)
+      self.refreshing.start()
+      return self.refreshing
+
+  # Fetch pairs now, and save. Returns {pair: price} for those that worked.
+  def refresh(self, pairs):
+    prices = self.fetcher.fetch(pairs)
+    now = time.time()
+    with self.lock:
+      for pair in pairs:
+        if pair in prices:
+          self.entries[pair] = (prices[pair], now)
+          self.retry.pop(pair, None)
+        else:
+          backoff = min(self.retry[pair][1] * 2, RETRY_MAX) if pair in self.retry else RETRY_MIN
+          self.retry[pair] = (now + backoff, backoff)
+          self.failures += 1
+      self.refreshes += 1
+    if prices:
+      try:
+        self.save()
+      except OSError as e:
+        print("Could not save prices: " + str(e))
+    return prices
+
+  def load(self):
+    try:
+      with open(self.path) as f:
+        saved = json.load(f)
+    except (OSError, ValueError):
+      return
+    if not isinstance(saved, dict):
+      return
+    for key, entry in saved.items():
+      if "-" not in key or not isinstance(entry, list) or len(entry) != 2:
+        continue
+      base, target = key.split("-", 1)
+      try:
+        self.entries[(base, target)] = (decimal(entry[0]), float(entry[1]))
+      except (TypeError, ValueError, ArithmeticError):
+        continue
+
+  # Write to a temporary file and rename it over the old one, so a power
+  # cut mid-write leaves the last good copy
+  def save(self):
+    with self.lock:
+      saved = {base + "-" + target: [str(price), fetched]
+               for (base, target), (price, fetched) in self.entries.items()}
+    directory = os.path.dirname(self.path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".prices.")
+    try:
+      with os.fdopen(fd, "w") as f:
+        json.dump(saved, f)
+        f.flush()
+        os.fsync(f.fileno())
+      os.replace(tmp, self.path)
+    except OSError:
+      os.unlink(tmp)
+      raise
+
+  def stats(self):
+    with self.lock:
+      return {"hits": self.hits, "misses": self.misses, "stale": self.stale,
+              "refreshes": self.refreshes, "failures": self.failures,
+              "entries": len(self.entries), "waiting": len(self.retry)}
@@ -0,0 +1,74 @@
+# currency.py: Registry of currencies, loaded once from currencies.csv
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# There is one Currency object per code, shared by every pair that uses
+# it: currency("BTC") is currency("BTC"). They are built from
+# currencies.csv at import, and load() adds or replaces entries from
+# another file of the same format, so new currencies need no code.
+
+import csv
+import os
+import sys
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "currencies.csv")
+
+# For codes which aren't in the table
+DEFAULT_PRECISION = 8
+
+class Currency:
+  __slots__ = ("code", "precision", "glyph", "symbol")
+
+  # glyph is the name of a custom character, symbol a CGROM character
+  # code, either None
+  def __init__(self, code, precision=DEFAULT_PRECISION, glyph=None, symbol=None):
+    self.code = sys.intern(code)
+    self.precision = precision
+    self.glyph = glyph
+    self.symbol = symbol
+
+  def __repr__(self):
+    return "Currency(" + self.code + ")"
+
+  # The character to put in front of an amount, or "" if there isn't one.
+  # glyphs is an hd44780.Glyphs to take custom characters from.
+  def char(self, glyphs=None):
+    if self.glyph is not None and glyphs is not None and self.glyph in glyphs.library:
+      return glyphs.char(self.glyph)
+    if self.symbol is not None:
+      return chr(self.symbol)
+    return ""
+
+# {code: Currency}
+CURRENCIES = {}
+
+def load(path=PATH):
+  with open(path, newline="") as f:
+    for row in csv.reader(line for line in f if line.strip() and not line.startswith("#")):
+      code, precision, glyph, symbol = [field.strip() for field in row]
+      CURRENCIES[sys.intern(code)] = Currency(code, int(precision), glyph or None,
+                                              int(symbol, 0) if symbol else None)
+
+# The Currency for code. Unknown codes get the defaults, and are added
+# so they are shared too.
+def currency(code):
+  try:
+    return CURRENCIES[code]
+  except KeyError:
+    return CURRENCIES.setdefault(sys.intern(code), Currency(code))
+
+load()
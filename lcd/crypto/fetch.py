@@ -0,0 +1,107 @@
+# fetch.py: Fetch many trade pairs at once over one keep-alive session
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# A pair is a (base, target) tuple of currency codes, like ("BTC", "USD").
+#
+# A provider knows how to ask an API for prices:
+#   requests(pairs)     list of (url, pairs) to GET, pairs being the ones
+#                       that url answers for
+#   parse(json, pairs)  {pair: price} from the response to one of those
+# Providers with a bulk endpoint group pairs into as few requests as
+# they can.
+#
+# Prices are Decimal, straight from the digits the API sent: numbers in
+# the JSON are parsed as Decimal, never float.
+
+import requests
+from decimal import Decimal
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+TIMEOUT = 10 # seconds, per request
+WORKERS = 8  # requests in flight at once
+
+# ClourFlare requires a User-Agent header, otherwise returns 502 error
+# https://stackoverflow.com/questions/43616566/python-requests-response-520/43616647#43616647
+USER_AGENT = "lcd.py"
+
+# https://api.cryptonator.com/api/ticker/a-b, one pair per request
+class Cryptonator:
+  def __init__(self, url="https://api.cryptonator.com/api/ticker/"):
+    self.url = url
+
+  def requests(self, pairs):
+    return [(self.url + base + "-" + target, [(base, target)]) for base, target in pairs]
+
+  def parse(self, json, pairs):
+    return {pairs[0]: Decimal(json["ticker"]["price"])}
+
+# https://min-api.cryptocompare.com/data/pricemulti?fsyms=a&tsyms=b,c,...
+# One request for every base, with all of its targets
+class CryptoCompare:
+  def __init__(self, url="https://min-api.cryptocompare.com/data/pricemulti"):
+    self.url = url
+
+  def requests(self, pairs):
+    groups = {}
+    for base, target in pairs:
+      groups.setdefault(base, []).append(target)
+    return [(self.url + "?fsyms=" + base + "&tsyms=" + ",".join(targets),
+             [(base, target) for target in targets]) for base, targets in groups.items()]
+
+  def parse(self, json, pairs):
+    return {(base, target): Decimal(json[base][target]) for base, target in pairs}
+
+class Fetcher:
+  def __init__(self, provider=None, workers=WORKERS, timeout=TIMEOUT):
+    self.provider = provider or Cryptonator()
+    self.timeout = timeout
+    # One session, so connections (and their TLS handshakes) are reused,
+    # with a connection per worker kept alive
+    self.session = requests.Session()
+    self.session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    self.session.mount("http://", adapter)
+    self.session.mount("https://", adapter)
+    self.pool = ThreadPoolExecutor(workers)
+    # {pair: exception} for pairs which failed on the last fetch()
+    self.errors = {}
+
+  def get(self, url):
+    response = self.session.get(url, timeout=self.timeout)
+    response.raise_for_status()
+    return response.json(parse_float=Decimal)
+
+  # Fetch all the pairs concurrently. Returns {pair: price} for the ones
+  # which worked; the rest are in self.errors.
+  def fetch(self, pairs):
+    jobs = [(self.pool.submit(self.get, url), group)
+            for url, group in self.provider.requests(pairs)]
+    prices = {}
+    self.errors = {}
+    for job, group in jobs:
+      try:
+        prices.update(self.provider.parse(job.result(), group))
+      except (requests.RequestException, ValueError, ArithmeticError, KeyError, TypeError) as e:
+        for pair in group:
+          self.errors[pair] = e
+    return prices
+
+  def close(self):
+    self.pool.shutdown()
+    self.session.close()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+#
+# crypto_bench.py: Time price refreshes against a local stub price API
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Usage: ./crypto_bench.py [--latency SECONDS] [--connect SECONDS] [fetch|cache]
+#
+# The stub answers both Cryptonator and CryptoCompare style URLs after
+# --latency seconds, and charges --connect seconds for every new
+# connection, standing in for the TCP and TLS handshakes.
+
+import argparse
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import requests
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from crypto import Fetcher, Cryptonator, CryptoCompare, PriceCache
+
+CODES = ["USD", "EUR", "GBP", "JPY", "CAD", "AUD", "CHF", "CNY",
+         "BTC", "ETH", "LTC", "XMR", "DOGE", "BCH", "ETC", "ZAR"]
+
+# Every price, with more digits than a float keeps
+PRICE = "1234.567812345678912345"
+
+class StubAPI(BaseHTTPRequestHandler):
+  # Keep-alive needs HTTP/1.1 and a Content-Length on every response
+  protocol_version = "HTTP/1.1"
+  latency = 0.05
+  connect = 0.1
+  requests = 0
+  # Answer everything with 429 Too Many Requests
+  failing = False
+
+  def setup(self):
+    time.sleep(self.connect)
+    BaseHTTPRequestHandler.setup(self)
+    # Headers and body go out in separate writes; don't let Nagle hold
+    # the body back for a delayed ACK
+    self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+  def do_GET(self):
+    StubAPI.requests += 1
+    time.sleep(self.latency)
+    if StubAPI.failing:
+      self.send_response(429)
+      self.send_header("Content-Length", "0")
+      self.end_headers()
+      return
+    url = urlparse(self.path)
+    if url.path.startswith("/api/ticker/"):
+      base, target = url.path.rsplit("/", 1)[1].split("-")
+      body = json.dumps({"ticker": {"base": base, "target": target, "price": PRICE},
+                         "success": True})
+    else:
+      # Prices as bare JSON numbers, which json.dumps() can't write exactly
+      query = parse_qs(url.query)
+      body = "{" + ", ".join('"' + base + '": {'
+                             + ", ".join('"' + target + '": ' + PRICE
+                                         for target in query["tsyms"][0].split(","))
+                             + "}" for base in query["fsyms"][0].split(",")) + "}"
+    body = body.encode()
+    self.send_response(200)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    pass
+
+# What Price.update() used to do: a fresh connection for every pair
+def sequential(url, pairs):
+  for base, target in pairs:
+    result = requests.get(url + "/api/ticker/" + base + "-" + target,
+                          headers={'User-Agent': 'lcd.py'})
+    float(result.json()["ticker"]["price"])
+
+def timed(fn):
+  StubAPI.requests = 0
+  start = time.perf_counter()
+  fn()
+  return time.perf_counter() - start, StubAPI.requests
+
+def serve():
+  server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPI)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server, "http://127.0.0.1:" + str(server.server_address[1])
+
+def bench_fetch(args):
+  server, url = serve()
+
+  # Bases cycle through a few codes, so bulk requests have something
+  # to group
+  print("pairs | sequential   | fetcher      | fetcher bulk")
+  for n in (1, 2, 4, 8, 16):
+    pairs = [(CODES[8 + i % 4], CODES[i]) for i in range(n)]
+    results = [timed(lambda: sequential(url, pairs))]
+    for provider in (Cryptonator(url + "/api/ticker/"), CryptoCompare(url + "/data/pricemulti")):
+      fetcher = Fetcher(provider)
+      prices = fetcher.fetch(pairs) # Warm up the connections, as a running ticker would have
+      if prices != {pair: Decimal(PRICE) for pair in pairs}:
+        print("MISMATCH: " + type(provider).__name__ + " gave " + str(prices))
+        exit(1)
+      results.append(timed(lambda: fetcher.fetch(pairs)))
+      fetcher.close()
+    print(format(n, "5d") + " | " + " | ".join(format(t, "6.3f") + "s " + format(r, "3d") + "r"
+                                              for t, r in results))
+  server.shutdown()
+
+# Time until every pair has a price to show, starting with no cache file
+# (cold), with a fresh one (warm) and with one older than the TTL (stale),
+# then how long get() takes once running
+def bench_cache(args):
+  server, url = serve()
+  pairs = [(CODES[8 + i % 4], CODES[i]) for i in range(16)]
+  path = os.path.join(tempfile.mkdtemp(), "prices.json")
+
+  print("start | first prices | requests | stats")
+  for start in ("cold", "warm", "stale"):
+    if start == "stale":
+      # Only the saved fetch times matter, not the file's
+      with open(path) as f:
+        saved = json.load(f)
+      with open(path, "w") as f:
+        json.dump({key: [entry[0], entry[1] - 3600] for key, entry in saved.items()}, f)
+    fetcher = Fetcher(Cryptonator(url + "/api/ticker/"))
+    StubAPI.requests = 0
+    begin = time.perf_counter()
+    cache = PriceCache(fetcher, 300, path)
+    while len(cache.get_many(pairs)) < len(pairs):
+      time.sleep(0.001)
+    first = time.perf_counter() - begin
+    if cache.refreshing:
+      cache.refreshing.join()
+    print(format(start, "5s") + " | " + format(first, "11.4f") + "s | "
+          + format(StubAPI.requests, "8d") + " | " + str(cache.stats()))
+    # Saved and loaded again, every digit is still there
+    if set(cache.get_many(pairs).values()) != {Decimal(PRICE)}:
+      print("MISMATCH: " + str(cache.get_many(pairs)))
+      exit(1)
+    fetcher.close()
+
+  n = 100000
+  begin = time.perf_counter()
+  for i in range(n):
+    cache.get(pairs[i % len(pairs)])
+  print("get(): " + format((time.perf_counter() - begin) / n * 1e6, ".2f") + "us per call")
+  begin = time.perf_counter()
+  for i in range(n // len(pairs)):
+    cache.get_many(pairs)
+  print("get_many(): " + format((time.perf_counter() - begin) / (n // len(pairs)) * 1e6, ".2f")
+        + "us per " + str(len(pairs)) + " pairs")
+
+  # An outage: the ticker asks every 10ms for 2s with everything stale,
+  # and every request fails
+  with open(path, "w") as f:
+    json.dump({base + "-" + target: [1.0, time.time() - 3600] for base, target in pairs}, f)
+  fetcher = Fetcher(Cryptonator(url + "/api/ticker/"))
+  cache = PriceCache(fetcher, 300, path)
+  StubAPI.failing = True
+  StubAPI.requests = 0
+  end = time.monotonic() + 2
+  while time.monotonic() < end:
+    cache.get_many(pairs)
+    time.sleep(0.01)
+  if cache.refreshing:
+    cache.refreshing.join()
+  print("outage: " + str(StubAPI.requests) + " requests in 2s | " + str(cache.stats()))
+  if StubAPI.requests != len(pairs):
+    print("MISMATCH: expected one request per pair, then a wait")
+    exit(1)
+  # Once the wait is over and the API is back, the backoff goes
+  StubAPI.failing = False
+  for pair in cache.retry:
+    cache.retry[pair] = (0.0, cache.retry[pair][1])
+  cache.revalidate().join()
+  if cache.retry or len(cache.get_many(pairs)) != len(pairs) or cache.stats()["hits"] != len(pairs):
+    print("MISMATCH: still waiting after a good fetch: " + str(cache.stats()))
+    exit(1)
+  fetcher.close()
+
+  # Many threads asking at once, everything stale, start one refresh
+  class SlowFetcher:
+    fetches = 0
+    def fetch(self, pairs):
+      SlowFetcher.fetches += 1
+      time.sleep(0.05)
+      return {pair: 1.0 for pair in pairs}
+  errors = []
+  def ask():
+    try:
+      for i in range(200):
+        cache.get_many(pairs)
+    except RuntimeError as e:
+      errors.append(e)
+  with open(path, "w") as f:
+    json.dump({base + "-" + target: [1.0, time.time() - 3600] for base, target in pairs}, f)
+  cache = PriceCache(SlowFetcher(), 300, path)
+  threads = [threading.Thread(target=ask) for i in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  cache.refreshing.join()
+  print("8 threads: " + str(SlowFetcher.fetches) + " refreshes, " + str(len(errors)) + " errors")
+  if errors or SlowFetcher.fetches != 1:
+    print("MISMATCH: expected one refresh: " + str(errors))
+    exit(1)
+
+  # Files that are JSON but not what save() writes are ignored
+  for saved in ([1, 2], {"BTCUSD": [1.0, 2.0]}, {"BTC-USD": 5}, {"BTC-USD": [1.0]},
+                {"BTC-USD": {"a": 1}}, {"BTC-USD": ["x", 2.0]}, "text",
+                {"BTC-USD": [None, 2.0], "BTC-EUR": [3.0, 4.0]}):
+    with open(path, "w") as f:
+      json.dump(saved, f)
+    cache = PriceCache(None, 300, path)
+    if set(cache.entries) - {("BTC", "EUR")}:
+      print("MISMATCH: loaded " + str(cache.entries) + " from " + json.dumps(saved))
+      exit(1)
+  print("bad cache files: ignored")
+  os.unlink(path)
+  os.rmdir(os.path.dirname(path))
+  server.shutdown()
+
+def main():
+  parser = argparse.ArgumentParser(description="Price fetch benchmark")
+  parser.add_argument("bench", nargs="?", default="fetch", choices=["fetch", "cache"])
+  parser.add_argument("--latency", type=float, default=StubAPI.latency,
+                      help="seconds the stub takes to answer")
+  parser.add_argument("--connect", type=float, default=StubAPI.connect,
+                      help="seconds the stub takes to accept a new connection")
+  args = parser.parse_args()
+  StubAPI.latency = args.latency
+  StubAPI.connect = args.connect
+  {"fetch": bench_fetch, "cache": bench_cache}[args.bench](args)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,31 @@
+# hd44780: Shared driver for HD44780 character LCDs
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Usage:
+#   from hd44780 import HD44780, RPiGPIO
+#   lcd = HD44780(RPiGPIO())
+#   lcd.init()
+#   lcd.string("Hello", lcd.line(0))
+
+from .driver import HD44780, CHR, CMD, Pins, PINS, Geometry, GEOMETRIES, Timing, TIMINGS, datasheet, delay
+from .backends import RPiGPIO, GPIOCdev, Simulator, Bus
+from .framebuffer import Framebuffer
+from .render import Renderer
+from .scroll import Scroller
+from .glyphs import Glyphs
+from .group import Group
@@ -0,0 +1,305 @@
+# backends.py: Ways for the HD44780 driver to reach its pins
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Every backend has the same methods:
+#   setup(pins)             claim the pins (a Pins tuple) as outputs
+#   output(pins, values)    set a tuple of pins to a tuple of levels at once
+#   direction(pins, output) turn a tuple of pins into outputs or inputs
+#   input(pin)              read an input pin
+#   cleanup()               let go of the pins
+# direction() and input() are only used to read the busy flag.
+#
+# The hardware libraries are only imported when their backend is used,
+# so the simulator runs on any Linux box.
+
+import time
+
+# RPi.GPIO, as used by the original scripts
+class RPiGPIO:
+  def __init__(self):
+    import RPi.GPIO as GPIO
+    self.GPIO = GPIO
+    GPIO.setwarnings(False)
+    GPIO.setmode(GPIO.BCM)       # Use BCM GPIO numbers
+
+  def setup(self, pins):
+    for pin in pins:
+      if pin is not None:
+        self.GPIO.setup(pin, self.GPIO.OUT)
+
+  def output(self, pins, values):
+    self.GPIO.output(pins, values)
+
+  def direction(self, pins, output):
+    self.GPIO.setup(list(pins), self.GPIO.OUT if output else self.GPIO.IN)
+
+  def input(self, pin):
+    return self.GPIO.input(pin)
+
+  def cleanup(self):
+    self.GPIO.cleanup()
+
+# The GPIO character device (/dev/gpiochipN) through libgpiod 2.x. This
+# needs no root or /dev/mem access, and a multi-pin set is one ioctl.
+class GPIOCdev:
+  def __init__(self, chip="/dev/gpiochip0", consumer="hd44780"):
+    import gpiod
+    from gpiod.line import Direction, Value
+    self.gpiod = gpiod
+    self.chip = chip
+    self.consumer = consumer
+    self.Direction = Direction
+    self.values = (Value.INACTIVE, Value.ACTIVE)
+    self.request = None
+    self.settings = {}
+
+  # Reconfiguring lines resets any line left out of the config, so keep
+  # the settings for every line and always pass them all. Panels sharing
+  # a bus call setup() once each, and the lines are requested again with
+  # the new ones added.
+  def setup(self, pins):
+    pins = tuple(pin for pin in pins if pin is not None)
+    for pin in pins:
+      if pin not in self.settings:
+        self.settings[pin] = self.gpiod.LineSettings(direction=self.Direction.OUTPUT)
+    if self.request:
+      self.request.release()
+    self.request = self.gpiod.request_lines(self.chip, consumer=self.consumer,
+                                            config=self.settings)
+
+  def output(self, pins, values):
+    self.request.set_values({pin: self.values[bool(v)] for pin, v in zip(pins, values)})
+
+  def direction(self, pins, output):
+    for pin in pins:
+      self.settings[pin] = self.gpiod.LineSettings(
+        direction=self.Direction.OUTPUT if output else self.Direction.INPUT)
+    self.request.reconfigure_lines(self.settings)
+
+  def input(self, pin):
+    return self.request.get_value(pin) == self.values[1]
+
+  def cleanup(self):
+    if self.request:
+      self.request.release()
+      self.request = None
+
+# Execution time of each instruction in oscillator clocks: 37us for most
+# at the datasheet's 270kHz, 1.52ms for clear display and return home.
+# A write to RAM takes tADD (about 1.5 clocks) longer to move the address.
+EXEC_CLOCKS = 10
+CLEAR_CLOCKS = 410
+WRITE_CLOCKS = 11.5
+
+# An HD44780 in memory. It decodes whatever is clocked in on E the way
+# the controller would, and keeps DDRAM, CGRAM and the display shift, so
+# a test can check what would be on the glass. call_cost is how long one
+# output() call takes on real hardware, in seconds.
+#
+# Each instruction keeps the controller busy for as long as the real one
+# would at oscillator frequency fosc (190-350kHz across parts). The busy
+# flag reads back accordingly, and anything clocked in while busy counts
+# as an overrun: on real glass that would be a lost or garbled byte.
+class Simulator:
+  def __init__(self, call_cost=0.0, fosc=270000):
+    self.call_cost = call_cost
+    self.fosc = fosc
+    self.busy_until = 0.0
+    self.overruns = 0
+    self.reading = False
+    self.levels = {}
+    self.calls = 0
+    # (rs, byte) for every byte the LCD has received
+    self.received = []
+    self.four_bit = False
+    self.pending = None
+    self.ddram = bytearray(b" " * 0x80)
+    self.cgram = bytearray(64)
+    self.addr = 0
+    self.cg = False
+    self.shift = 0
+    self.display = 0
+
+  def setup(self, pins):
+    self.pins = pins
+    self.data = (pins.d4, pins.d5, pins.d6, pins.d7)
+
+  def output(self, pins, values):
+    self.calls += 1
+    for pin, value in zip(pins, values):
+      value = 1 if value else 0
+      old = self.levels.get(pin, 0)
+      self.levels[pin] = value
+      if pin == self.pins.e and old != value:
+        self.strobe(value)
+    if self.call_cost:
+      end = time.perf_counter() + self.call_cost
+      while time.perf_counter() < end:
+        pass
+
+  def direction(self, pins, output):
+    pass
+
+  def input(self, pin):
+    return self.levels.get(pin, 0)
+
+  def cleanup(self):
+    pass
+
+  def reset(self):
+    self.calls = 0
+    self.received = []
+    self.overruns = 0
+
+  # E has gone to value
+  def strobe(self, value):
+    if self.levels.get(self.pins.rw, 0):
+      # Reading: the LCD drives D4..D7 while E is high
+      if value:
+        self.read()
+    elif not value:
+      # Writing: the LCD latches D4..D7 on the falling edge of E
+      self.latch()
+
+  # Put BF and the address counter on D4..D7, a nibble per strobe
+  def read(self):
+    if self.reading:
+      nibble = self.addr & 0x0F
+    else:
+      busy = time.perf_counter() < self.busy_until
+      nibble = (busy << 3) | ((self.addr >> 4) & 0x07)
+    self.reading = not self.reading
+    for bit, pin in enumerate(self.data):
+      self.levels[pin] = (nibble >> bit) & 1
+
+  def latch(self):
+    self.reading = False
+    if time.perf_counter() < self.busy_until:
+      self.overruns += 1
+    nibble = 0
+    for bit, pin in enumerate(self.data):
+      nibble |= self.levels.get(pin, 0) << bit
+    rs = self.levels.get(self.pins.rs, 0)
+    if not self.four_bit:
+      # 8-bit mode: D0..D3 are tied low, so every strobe is a whole byte
+      self.execute(rs, nibble << 4)
+    elif self.pending is None:
+      self.pending = nibble
+    else:
+      self.execute(rs, (self.pending << 4) | nibble)
+      self.pending = None
+
+  def execute(self, rs, byte):
+    self.received.append((rs, byte))
+    clocks = EXEC_CLOCKS
+    if rs:
+      clocks = WRITE_CLOCKS
+    elif byte in (0x01, 0x02, 0x03):
+      clocks = CLEAR_CLOCKS
+    self.busy_until = time.perf_counter() + clocks / self.fosc
+    if rs:
+      if self.cg:
+        self.cgram[self.addr] = byte
+        self.addr = (self.addr + 1) & 0x3F
+      else:
+        self.ddram[self.addr] = byte
+        self.addr = self.next_addr(self.addr)
+    elif byte & 0x80:   # Set DDRAM address
+      self.addr = byte & 0x7F
+      self.cg = False
+    elif byte & 0x40:   # Set CGRAM address
+      self.addr = byte & 0x3F
+      self.cg = True
+    elif byte & 0x20:   # Function set
+      self.four_bit = not (byte & 0x10)
+      self.pending = None
+    elif byte & 0x10:   # Cursor or display shift
+      if byte & 0x08:
+        self.shift = (self.shift + (-1 if byte & 0x04 else 1)) % 40
+    elif byte & 0x08:   # Display control
+      self.display = byte & 0x07
+    elif byte & 0x04:   # Entry mode, only increment is modelled
+      pass
+    elif byte & 0x02:   # Return home
+      self.addr = 0
+      self.shift = 0
+      self.cg = False
+    elif byte & 0x01:   # Clear display
+      self.ddram[:] = b" " * 0x80
+      self.addr = 0
+      self.shift = 0
+      self.cg = False
+
+  # In 2-line mode the end of line 1 runs on to line 2 and back
+  def next_addr(self, addr):
+    if addr == 0x27:
+      return 0x40
+    if addr == 0x67:
+      return 0x00
+    return (addr + 1) & 0x7F
+
+  # What the glass shows, cols wide, for the row starting at DDRAM
+  # address offset
+  def text(self, offset, cols=16):
+    base = offset & 0x40
+    start = offset & 0x3F
+    return "".join(chr(self.ddram[base + (start + self.shift + i) % 40]) for i in range(cols))
+
+# Several simulated LCDs on one bus, each with its own E line. They all
+# see the same levels, and a strobe goes to the one on that E line.
+# panels maps each E pin to its Simulator.
+class Bus:
+  def __init__(self, call_cost=0.0, fosc=270000):
+    self.call_cost = call_cost
+    self.fosc = fosc
+    self.levels = {}
+    self.panels = {}
+    self.calls = 0
+
+  def setup(self, pins):
+    sim = Simulator(0.0, self.fosc)
+    sim.setup(pins)
+    sim.levels = self.levels
+    self.panels[pins.e] = sim
+
+  def output(self, pins, values):
+    self.calls += 1
+    for pin, value in zip(pins, values):
+      value = 1 if value else 0
+      old = self.levels.get(pin, 0)
+      self.levels[pin] = value
+      if pin in self.panels and old != value:
+        self.panels[pin].strobe(value)
+    if self.call_cost:
+      end = time.perf_counter() + self.call_cost
+      while time.perf_counter() < end:
+        pass
+
+  def direction(self, pins, output):
+    pass
+
+  def input(self, pin):
+    return self.levels.get(pin, 0)
+
+  def cleanup(self):
+    pass
+
+  def reset(self):
+    self.calls = 0
+    for sim in self.panels.values():
+      sim.reset()
@@ -0,0 +1,287 @@
+# driver.py: HD44780 character LCD driver, 4-bit interface
+#
+# This is based off Leon Anavi's repository
+#   https://github.com/leon-anavi/raspberrypi-lcd
+#
+# Copyright 2015 Matt Hawkins, Leon Anavi
+#
+# with additions by nerdcorenet
+#
+# Copyright (c) 2019 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# The datasheet for the controller itself:
+# https://www.sparkfun.com/datasheets/LCD/HD44780.pdf
+
+import time
+from collections import namedtuple
+from .framebuffer import Framebuffer
+
+CHR = True
+CMD = False
+
+# BCM pin numbers. D0..D3 are not used. R/W is usually grounded; wire it
+# to a GPIO instead to let the driver read the busy flag (see busy below).
+# Only do that with a 3.3V LCD or a level shifter on D4..D7, since a 5V
+# LCD drives them at 5V while R/W is high.
+Pins = namedtuple("Pins", "rs e d4 d5 d6 d7 rw", defaults=(None,))
+PINS = Pins(rs=7, e=8, d4=25, d5=24, d6=23, d7=18)
+
+# cols x rows as seen on the glass, and the DDRAM address of each row
+Geometry = namedtuple("Geometry", "cols rows offsets")
+GEOMETRIES = {
+  "16x2": Geometry(16, 2, (0x00, 0x40)),
+  "20x4": Geometry(20, 4, (0x00, 0x40, 0x14, 0x54)),
+  "40x2": Geometry(40, 2, (0x00, 0x40)),
+}
+
+# Waits, in seconds:
+# setup = tAS, RS setup before E rises
+# pulse = PWEH, E high pulse width
+# cycle = tcycE, E cycle time
+# exec  = execution time of most instructions and writes
+# clear = execution time of clear display and return home
+Timing = namedtuple("Timing", "setup pulse cycle exec clear")
+
+# Execution times in oscillator clocks: 37us for most instructions at
+# the datasheet's typical 270kHz, 1.52ms for clear display and return
+# home, and tADD (about 1.5 clocks) more for a write to RAM. The
+# oscillator runs anywhere from 190kHz to 350kHz across parts.
+EXEC_CLOCKS = 10
+CLEAR_CLOCKS = 410
+WRITE_CLOCKS = 11.5
+FOSC_MIN = 190000
+FOSC_MAX = 350000
+
+# Waits long enough for a part whose oscillator runs at fosc, with the
+# bus timings from the Vcc=2.7V column. exec covers writes to RAM too.
+def datasheet(fosc=FOSC_MIN):
+  return Timing(0.00000006, 0.00000045, 0.000001, WRITE_CLOCKS / fosc, CLEAR_CLOCKS / fosc)
+
+TIMINGS = {
+  # Worst case: the slowest oscillator, about 61us and 2.16ms
+  "datasheet": datasheet(),
+  # What the original scripts did: 0.5ms either side of a 0.5ms pulse
+  "legacy": Timing(0.0005, 0.0005, 0.001, 0.0, 0.0),
+}
+
+# Execution times at the fastest oscillator
+FAST_EXEC = EXEC_CLOCKS / FOSC_MAX
+FAST_CLEAR = CLEAR_CLOCKS / FOSC_MAX
+
+# Give up on a busy flag that has not cleared after this long, and go
+# back to fixed waits. No instruction takes more than a few ms.
+BUSY_TIMEOUT = 0.01
+
+# time.sleep() oversleeps by tens of microseconds, longer than most of
+# the LCD's timings, so spin on the clock for short waits
+def delay(seconds):
+  if seconds >= 0.001:
+    time.sleep(seconds)
+    return
+  end = time.perf_counter() + seconds
+  while time.perf_counter() < end:
+    pass
+
+class HD44780:
+  # backend is one of the classes in backends.py
+  # geometry and timing are keys into GEOMETRIES and TIMINGS, or tuples;
+  # datasheet(fosc) gives shorter waits for a part known to run faster
+  # busy polls the busy flag before each byte instead of waiting the fixed
+  # execution time, and needs pins.rw
+  def __init__(self, backend, pins=PINS, geometry="16x2", timing="datasheet", busy=False):
+    if busy and pins.rw is None:
+      raise ValueError("Busy flag polling needs the R/W pin")
+    self.backend = backend
+    self.busy = busy
+    self.pins = pins
+    self.geometry = GEOMETRIES[geometry] if isinstance(geometry, str) else geometry
+    self.timing = TIMINGS[timing] if isinstance(timing, str) else timing
+    self.width = self.geometry.cols
+    self.rs = (pins.rs,)
+    self.e = (pins.e,)
+    self.rw = (pins.rw,)
+    self.rwrs = (pins.rw, pins.rs)
+    self.data = (pins.d4, pins.d5, pins.d6, pins.d7)
+    # D4..D7 pin states for every nibble value, so a whole nibble goes
+    # out in one output() call
+    self.nibbles = [((n>>0)&1, (n>>1)&1, (n>>2)&1, (n>>3)&1) for n in range(16)]
+    # Shadow copy of the display RAM
+    self.fb = Framebuffer()
+    # A glyphs.Glyphs, to load custom characters as they are needed
+    self.glyphs = None
+    # When the last byte sent will have been executed (perf_counter)
+    self.ready = 0.0
+    # A list to collect bytes in instead of sending them, see group.py
+    self.queue = None
+    backend.setup(pins)
+
+  # DDRAM address command for the start of row n (0 is the top)
+  def line(self, n):
+    return 0x80 | self.geometry.offsets[n]
+
+  # How many cells string() pads to at line
+  def width_at(self, line):
+    return self.width
+
+  def init(self, display=0x0C):
+    # Initialise by instruction (datasheet figure 24), which gets the
+    # controller into 4-bit mode whatever state it was left in. The busy
+    # flag cannot be read until it is in 4-bit mode.
+    if self.pins.rw is not None:
+      self.backend.output(self.rw, (False,))
+    self.backend.output(self.rs, (CMD,))
+    time.sleep(0.015)
+    self.nibble(0x3)
+    time.sleep(0.0041)
+    self.nibble(0x3)
+    delay(0.0001)
+    self.nibble(0x3)
+    delay(self.timing.exec)
+    self.nibble(0x2)       # Initialise 4-bit mode
+    delay(self.timing.exec)
+    if self.geometry.rows > 1:
+      self.command(0x28)   # 101000 4-bit, 2 lines, 5x8 font
+    else:
+      self.command(0x20)   # 100000 4-bit, 1 line, 5x8 font
+    self.command(0x06)     # 000110 Cursor move direction
+    self.command(display)  # 0x0C Display on, 0x0F with blinking cursor
+    self.clear()
+
+  # Send a byte once the last one has finished
+  # bits = data
+  # mode = CHR for character
+  #        CMD for command
+  def byte(self, bits, mode):
+    if self.queue is not None:
+      self.queue.append((bits, mode))
+      return
+    self.wait()
+    self.send(bits, mode)
+
+  # Put a byte on the bus straight away, and note when the LCD will be
+  # done with it. The wait is left to the next byte, so the caller can
+  # get on with something else (such as another panel) meanwhile.
+  def send(self, bits, mode):
+    self.backend.output(self.rs, (mode,))
+
+    # High bits, then low bits
+    self.nibble(bits >> 4)
+    self.nibble(bits & 0x0F)
+
+    slow = mode == CMD and bits < 0x04 # Clear display or return home
+    if self.busy:
+      # Nothing finishes sooner than at the fastest oscillator, so only
+      # start asking then
+      wait = FAST_CLEAR if slow else FAST_EXEC
+    else:
+      wait = self.timing.clear if slow else self.timing.exec
+    self.ready = time.perf_counter() + wait
+
+  # Wait for the instruction last sent to execute
+  def wait(self):
+    delay(self.ready - time.perf_counter())
+    if self.busy and self.ready:
+      self.poll()
+
+  def command(self, bits):
+    self.byte(bits, CMD)
+    if bits == 0x01:
+      # Clear display blanks DDRAM, so blank the shadow copy too
+      self.fb.clear()
+
+  def write(self, data):
+    for b in data:
+      self.byte(b, CHR)
+
+  def nibble(self, nibble):
+    # Put a nibble on D4..D7 and clock it in
+    self.backend.output(self.data, self.nibbles[nibble])
+    self.toggle_enable()
+
+  def toggle_enable(self):
+    delay(self.timing.setup)
+    self.backend.output(self.e, (True,))
+    delay(self.timing.pulse)
+    self.backend.output(self.e, (False,))
+    delay(self.timing.cycle - self.timing.pulse)
+
+  # Read the busy flag until the controller is ready for more. Returns
+  # False, and drops back to fixed waits for good, if it never clears.
+  def poll(self):
+    backend = self.backend
+    backend.direction(self.data, False)
+    backend.output(self.rwrs, (True, CMD))
+    end = time.perf_counter() + BUSY_TIMEOUT
+    try:
+      while True:
+        # In 4-bit mode a read is two nibbles. BF is D7 of the first,
+        # valid tDDR (360ns) after E rises; the rest is the address.
+        delay(self.timing.setup)
+        backend.output(self.e, (True,))
+        delay(self.timing.pulse)
+        busy = backend.input(self.pins.d7)
+        backend.output(self.e, (False,))
+        delay(self.timing.cycle - self.timing.pulse)
+        backend.output(self.e, (True,))
+        delay(self.timing.pulse)
+        backend.output(self.e, (False,))
+        delay(self.timing.cycle - self.timing.pulse)
+        if not busy:
+          return True
+        if time.perf_counter() > end:
+          self.busy = False
+          return False
+    finally:
+      backend.output(self.rw, (False,))
+      backend.direction(self.data, True)
+
+  def clear(self):
+    self.command(0x01)
+
+  # Write message at line, which is a DDRAM address command such as
+  # line(0), plus a column if need be. With fill, pad to the display
+  # width and cut anything beyond it.
+  def string(self, message, line, fill=True, fillchar=" "):
+    message = str(message)
+    if fill:
+      message = message.ljust(self.width, fillchar)[:self.width]
+    if self.glyphs is not None:
+      message = self.glyphs.map(self, message, line)
+
+    # Only send the cells which have changed
+    for addr, data in self.fb.update(line, message):
+      self.command(addr)
+      self.write(data)
+
+  # Load 5x8 custom characters into CGRAM, 8 bytes per character
+  # starting at character 0, then clear the display
+  def mkchars(self, chars):
+    self.command(0x40)
+    self.write(chars)
+    self.clear()
+
+  # Nothing is held back on a panel of its own; see Group.flush()
+  def flush(self):
+    pass
+
+  # Glyphs counters of each panel (just this one), None where there are
+  # no glyphs. Only safe from the thread drawing, such as a Renderer's.
+  def glyph_stats(self):
+    return [self.glyphs.stats() if self.glyphs else None]
+
+  def close(self):
+    self.backend.cleanup()
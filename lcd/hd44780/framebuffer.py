@@ -0,0 +1,81 @@
+# framebuffer.py: Shadow copy of HD44780 DDRAM, so only changes are sent
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# In 2-line mode the HD44780 has 40 bytes of DDRAM per line, at 0x00 and
+# 0x40, whether or not the glass shows all of them. Framebuffer keeps a
+# copy of both lines and turns each new frame into the fewest set-address
+# commands and characters that get the glass from what it shows now to
+# what it should show.
+
+LCD_BUFFER = 40 # DDRAM bytes per line
+
+class Framebuffer:
+  def __init__(self, lines=2, size=LCD_BUFFER):
+    self.lines = lines
+    self.size = size
+    self.ram = [bytearray(b" " * size) for l in range(lines)]
+    # Counters, in bus bytes (commands and characters)
+    self.frames = 0
+    self.bytes_sent = 0
+    self.bytes_saved = 0
+    self.last_saved = 0
+
+  # The clear display command fills DDRAM with spaces
+  def clear(self):
+    for ram in self.ram:
+      ram[:] = b" " * self.size
+
+  # Compare text, to be written at the set-DDRAM command addr (0x80 for
+  # line 1, 0xC0 for line 2, plus a column), with what is already there.
+  # Returns a list of (command, data) runs to send, and records the new
+  # contents. Runs of dirty cells separated by a single clean cell are
+  # merged, since rewriting that cell costs the same as another address.
+  # Text past the end of the line's buffer is dropped.
+  def update(self, addr, text):
+    line = (addr >> 6) & 1
+    col = addr & 0x3F
+    ram = self.ram[line]
+    data = bytes(ord(c) & 0xFF for c in text[:max(self.size - col, 0)])
+
+    runs = []
+    first = last = None
+    for i, b in enumerate(data):
+      if ram[col + i] == b:
+        continue
+      if last is not None and i - last <= 2:
+        last = i
+        continue
+      if last is not None:
+        runs.append((first, last))
+      first = last = i
+    if last is not None:
+      runs.append((first, last))
+
+    ret = []
+    sent = 0
+    for first, last in runs:
+      ram[col + first:col + last + 1] = data[first:last + 1]
+      ret.append((0x80 | (line << 6) | (col + first), data[first:last + 1]))
+      sent += 1 + last - first + 1
+
+    # A plain rewrite is one address command plus every character
+    self.frames += 1
+    self.bytes_sent += sent
+    self.last_saved = 1 + len(data) - sent
+    self.bytes_saved += self.last_saved
+    return ret
@@ -0,0 +1,136 @@
+# glyphs.py: More custom characters than CGRAM has room for
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# CGRAM holds eight 5x8 characters, 0x00 to 0x07. Glyphs keeps a library
+# of any number of them by name, and loads each into a slot the first
+# time it is written, when it isn't there already.
+#
+# Text refers to a glyph by char(name), a character from the Unicode
+# private use area. Set lcd.glyphs and string() swaps those for the
+# slot, loading the glyph first if need be:
+#   lcd.glyphs = Glyphs({"up": [0b00000, 0b00100, ...], ...})
+#   lcd.string(lcd.glyphs.char("up") + "BTC", lcd.line(0))
+#
+# A full CGRAM gives up the least recently used glyph. Changing a slot
+# redraws every cell showing it at once, so a glyph still anywhere in
+# DDRAM (which includes whatever is scrolled off the glass) is never
+# given up; if every slot is in use the glyph is written as fallback.
+
+from collections import OrderedDict
+
+SLOTS = 8
+# Where char() numbers from
+PRIVATE_USE = 0xE000
+
+class Glyphs:
+  # library is {name: [8 rows of 5 bits]}
+  def __init__(self, library, fallback="?"):
+    self.library = library
+    self.fallback = fallback
+    self.chars = {}
+    self.names = {}
+    for n, name in enumerate(library):
+      self.chars[name] = chr(PRIVATE_USE + n)
+      self.names[chr(PRIVATE_USE + n)] = name
+    # {name: slot}, least recently used first
+    self.resident = OrderedDict()
+    self.free = list(range(SLOTS))
+    # Counters
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.fallbacks = 0
+    self.upload_bytes = 0
+
+  # The character standing for glyph name, to put in text
+  def char(self, name):
+    return self.chars[name]
+
+  # text, about to be written at DDRAM address command addr, with glyph
+  # characters swapped for their slots. Uploads any that aren't loaded.
+  def map(self, lcd, text, addr):
+    wanted = list(dict.fromkeys(self.names[c] for c in text if c in self.names))
+    if not wanted:
+      return text
+
+    # Glyphs already loaded first, so that loading the others can't
+    # give up a slot this text needs
+    slots = {}
+    missing = []
+    for name in wanted:
+      if name in self.resident:
+        self.hits += 1
+        self.resident.move_to_end(name)
+        slots[name] = self.resident[name]
+      else:
+        self.misses += 1
+        missing.append(name)
+
+    if missing:
+      busy = self.in_use(lcd, text, addr) | set(slots.values())
+      for name in missing:
+        slot = self.allocate(busy)
+        if slot is None:
+          self.fallbacks += 1
+          continue
+        self.upload(lcd, slot, self.library[name])
+        self.resident[name] = slot
+        slots[name] = slot
+        busy.add(slot)
+
+    out = []
+    for c in text:
+      if c in self.names:
+        slot = slots.get(self.names[c])
+        c = self.fallback if slot is None else chr(slot)
+      out.append(c)
+    return "".join(out)
+
+  # Slots showing in DDRAM once text is written at addr
+  def in_use(self, lcd, text, addr):
+    line = (addr >> 6) & 1
+    col = addr & 0x3F
+    busy = {ord(c) for c in text if ord(c) < SLOTS}
+    for n, ram in enumerate(lcd.fb.ram):
+      for i, b in enumerate(ram):
+        if b < SLOTS and not (n == line and col <= i < col + len(text)):
+          busy.add(b)
+    return busy
+
+  # A free slot, or the least recently used one not in busy
+  def allocate(self, busy):
+    if self.free:
+      return self.free.pop(0)
+    for name, slot in self.resident.items():
+      if slot not in busy:
+        del self.resident[name]
+        self.evictions += 1
+        return slot
+    return None
+
+  def upload(self, lcd, slot, bitmap):
+    lcd.command(0x40 | (slot << 3))
+    lcd.write(bitmap)
+    self.upload_bytes += 1 + len(bitmap)
+
+  def stats(self):
+    looked = self.hits + self.misses
+    return {"hits": self.hits, "misses": self.misses,
+            "hit_rate": self.hits / looked if looked else 0.0,
+            "evictions": self.evictions, "fallbacks": self.fallbacks,
+            "upload_bytes": self.upload_bytes, "resident": list(self.resident)}
@@ -0,0 +1,94 @@
+# group.py: Several HD44780 panels sharing one bus
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# RS, D4..D7 (and R/W, if used) are wired to every panel, and each panel
+# has an E line of its own. A panel only takes in what is on the bus when
+# its E is strobed, so while one is still executing the last byte it was
+# sent, the bus is free for the others.
+#
+# Group collects what is written to each panel, and flush() sends it,
+# a byte at a time to whichever panel is ready, so the 37us every byte
+# takes to execute on one panel is spent writing to the rest.
+#
+# Addresses and commands carry the panel number above the low byte, so
+# a Group can stand in for an HD44780 with the Renderer and Scroller:
+#   group = Group(RPiGPIO(), PINS, [(8, "16x2"), (17, "20x4")])
+#   group.init()
+#   group.string("Hello", group.line(0, panel=1))
+#   group.command(group.panel(1) | 0x01)
+#   group.flush()
+
+import time
+from collections import deque
+from .driver import HD44780, delay
+
+class Group:
+  # pins is the shared Pins, panels a list of (E pin, geometry)
+  def __init__(self, backend, pins, panels, timing="datasheet", busy=False):
+    self.backend = backend
+    self.panels = [HD44780(backend, pins._replace(e=e), geometry, timing, busy)
+                   for e, geometry in panels]
+
+  def panel(self, n):
+    return n << 8
+
+  def line(self, row, panel=0):
+    return self.panel(panel) | self.panels[panel].line(row)
+
+  def width_at(self, line):
+    return self.panels[line >> 8].width
+
+  # Initialise every panel, then start collecting
+  def init(self, display=0x0C):
+    for lcd in self.panels:
+      lcd.queue = None
+      lcd.init(display)
+      lcd.queue = []
+
+  def string(self, message, line, fill=True, fillchar=" "):
+    self.panels[line >> 8].string(message, line & 0xFF, fill, fillchar)
+
+  def command(self, bits):
+    self.panels[bits >> 8].command(bits & 0xFF)
+
+  # Send everything collected, interleaved across the panels
+  def flush(self):
+    queues = []
+    for lcd in self.panels:
+      if lcd.queue:
+        queues.append((lcd, deque(lcd.queue)))
+        lcd.queue = []
+    while queues:
+      now = time.perf_counter()
+      soonest = None
+      for lcd, queue in queues:
+        if lcd.ready <= now:
+          lcd.wait()
+          lcd.send(*queue.popleft())
+          now = time.perf_counter()
+        elif soonest is None or lcd.ready < soonest:
+          soonest = lcd.ready
+      queues = [(lcd, queue) for lcd, queue in queues if queue]
+      if soonest is not None and queues:
+        delay(soonest - time.perf_counter())
+
+  def glyph_stats(self):
+    return [stats for lcd in self.panels for stats in lcd.glyph_stats()]
+
+  def close(self):
+    self.backend.cleanup()
@@ -0,0 +1,184 @@
+# render.py: Display thread fed by a queue of frames
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Renderer owns the LCD. Anything else that wants to show something
+# (price fetchers, clocks, sensors) calls submit() with a frame, which
+# only queues it and returns, so nobody waits on the LCD bus. Once per
+# tick the renderer takes everything queued and draws it.
+#
+# A frame is a list of operations, done in order:
+#   (addr, text)         string(text, addr)
+#   (addr, text, False)  string(text, addr, False), no padding
+#   (None, command)      command(command)
+#
+# When several frames are waiting, text written to an address by an
+# earlier frame is skipped in favour of later text at the same address
+# (coalesced), as long as no command comes between them and the later
+# text covers at least as many cells. When the queue is full the oldest
+# frame is merged into the next one (merged): its commands are all kept,
+# and only text that the next one writes over goes.
+#
+# If drawing fails (the GPIO goes away, say) the renderer stops, and
+# submit() and stop() raise a RuntimeError caused by what went wrong,
+# rather than frames piling up for a display that is never updated.
+#
+# The LCD's glyph counters change as it draws, so they are read here,
+# after every tick, and handed out by stats() with the renderer's own.
+
+import threading
+import time
+from collections import deque
+
+class Renderer(threading.Thread):
+  def __init__(self, lcd, fps=20, depth=16):
+    threading.Thread.__init__(self, daemon=True)
+    self.lcd = lcd
+    self.period = 1.0 / fps
+    self.frames = deque()
+    self.depth = depth
+    self.cond = threading.Condition()
+    self.running = True
+    # What stopped run(), if anything did
+    self.error = None
+    # Counters
+    self.submitted = 0
+    self.rendered = 0
+    self.coalesced = 0
+    self.merged = 0
+    self.latency_max = 0.0
+    self.latency_total = 0.0
+    self.glyphs = lcd.glyph_stats()
+
+  # Queue a frame for the next tick. Never blocks on the LCD.
+  def submit(self, frame):
+    with self.cond:
+      self.check()
+      self.submitted += 1
+      submitted = time.monotonic()
+      if len(self.frames) >= self.depth:
+        # Keeps the time of the oldest, for latency
+        submitted, oldest = self.frames.popleft()
+        if self.frames:
+          self.frames[0] = (submitted, self.compact(oldest + self.frames[0][1]))
+        else:
+          frame = self.compact(oldest + frame)
+        self.merged += 1
+      self.frames.append((submitted, frame))
+
+  def stop(self):
+    with self.cond:
+      self.running = False
+      self.cond.notify()
+    self.join()
+    self.check()
+
+  # Pass on whatever stopped run(), to the thread that is still going
+  def check(self):
+    if self.error:
+      raise RuntimeError("Renderer stopped: " + str(self.error)) from self.error
+
+  def run(self):
+    deadline = time.monotonic()
+    while True:
+      with self.cond:
+        wait = deadline - time.monotonic()
+        if self.running and wait > 0:
+          self.cond.wait(wait)
+        frames = list(self.frames)
+        self.frames.clear()
+        running = self.running
+      if frames:
+        try:
+          self.render(frames)
+        except Exception as e:
+          with self.cond:
+            self.error = e
+            self.running = False
+          return
+      if not running:
+        return
+      # Keep to the frame rate, but don't try to catch up on ticks
+      # which were missed while drawing
+      deadline += self.period
+      now = time.monotonic()
+      if deadline < now:
+        deadline = now
+
+  # How many cells a text op writes: the width of the line if padded
+  def cells(self, op):
+    if len(op) < 3 or op[2]:
+      return self.lcd.width_at(op[0])
+    return len(str(op[1]))
+
+  # ops with text that later text at the same address writes over taken
+  # out. Commands are all kept, and nothing moves across one.
+  def compact(self, ops):
+    ret = []
+    # {addr: [(index in ret, cells)]} since the last command
+    written = {}
+    for op in ops:
+      if op[0] is None:
+        written = {}
+      else:
+        cells = self.cells(op)
+        kept = []
+        for n, earlier in written.get(op[0], ()):
+          if earlier <= cells:
+            ret[n] = None
+            self.coalesced += 1
+          else:
+            kept.append((n, earlier))
+        kept.append((len(ret), cells))
+        written[op[0]] = kept
+      ret.append(op)
+    return [op for op in ret if op is not None]
+
+  def render(self, frames):
+    for op in self.compact([op for submitted, frame in frames for op in frame]):
+      if op[0] is None:
+        self.lcd.command(op[1])
+      else:
+        self.lcd.string(op[1], op[0], *op[2:])
+    # A Group only collects until now
+    self.lcd.flush()
+    glyphs = self.lcd.glyph_stats()
+
+    now = time.monotonic()
+    with self.cond:
+      for submitted, frame in frames:
+        latency = now - submitted
+        self.latency_total += latency
+        if latency > self.latency_max:
+          self.latency_max = latency
+      self.rendered += len(frames)
+      self.glyphs = glyphs
+
+  # Counters, latency from submit() to being on the glass in seconds, and
+  # each panel's Glyphs counters as of the last tick
+  def stats(self):
+    with self.cond:
+      return {
+        "submitted": self.submitted,
+        "rendered": self.rendered,
+        "coalesced": self.coalesced,
+        "merged": self.merged,
+        "queued": len(self.frames),
+        "latency_avg": self.latency_total / self.rendered if self.rendered else 0.0,
+        "latency_max": self.latency_max,
+        "glyphs": self.glyphs,
+      }
@@ -0,0 +1,121 @@
+# scroll.py: Ticker tape scrolling with the display shift command
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Scroller turns a ticker tape, one string per line, into Renderer
+# frames. The glass is a window onto the 40 bytes of DDRAM per line, and
+# the display shift command (0x18 left, 0x1C right) moves that window
+# without touching DDRAM.
+#
+# A tape that fits in DDRAM is written once, coming in from the edge of
+# the glass, and after that every step is a single shift: one bus byte.
+# Setting a new tape rewrites only the cells that changed.
+#
+# A longer tape can't be held whole, so each step writes the column
+# about to come into view, just off the edge of the glass, and then
+# shifts (incremental). A new tape is picked up at the end of a pass.
+#
+# The scroller keeps count of the shift itself, so call reset() after
+# a clear display or return home, which put the shift back to 0.
+
+from .framebuffer import LCD_BUFFER
+
+class Scroller:
+  def __init__(self, width=16, lines=(0x80, 0xC0), left=True, size=LCD_BUFFER):
+    self.width = width
+    self.lines = lines
+    self.left = left
+    self.size = size
+    # With a Group, the panel number is above the low byte of lines
+    self.command = (lines[0] & ~0xFF) | (0x18 if left else 0x1C)
+    self.tape = None
+    self.next = None
+    self.reset()
+    # Counters
+    self.steps = 0
+    self.renders = 0
+    self.cells = 0
+
+  def reset(self):
+    self.shift = 0
+    # DDRAM column of the start of the tape, once written whole
+    self.start = None
+    # Next column of the tape to write, when incremental
+    self.pos = 0
+
+  # Strings for each line, shorter ones are padded with spaces. Takes
+  # effect on the next step().
+  def set(self, tape):
+    length = max(len(t) for t in tape)
+    self.next = [t.ljust(length) for t in tape]
+
+  def fits(self):
+    return self.tape is not None and len(self.tape[0]) <= self.size
+
+  # The frame for one step of the scroll
+  def step(self):
+    frame = []
+    if self.next is not None and (self.pos == 0 or len(self.next[0]) <= self.size):
+      self.tape = self.next
+      self.next = None
+      if self.fits():
+        frame = self.render()
+      else:
+        self.start = None
+    if self.tape is None:
+      return frame
+
+    if not self.fits():
+      # The column just off the edge of the glass
+      if self.left:
+        col = (self.shift + self.width) % self.size
+        pos = self.pos
+        self.pos = (pos + 1) % len(self.tape[0])
+      else:
+        col = (self.shift - 1) % self.size
+        pos = self.pos = (self.pos - 1) % len(self.tape[0])
+      for addr, text in zip(self.lines, self.tape):
+        frame.append((addr | col, text[pos], False))
+      self.cells += len(self.lines)
+
+    frame.append((None, self.command))
+    self.shift = (self.shift + (1 if self.left else -1)) % self.size
+    self.steps += 1
+    return frame
+
+  # Write the whole tape into DDRAM, starting just off the edge of the
+  # glass the first time and where it was after that
+  def render(self):
+    length = len(self.tape[0])
+    if self.start is None:
+      if self.left:
+        self.start = (self.shift + self.width) % self.size
+      else:
+        self.start = (self.shift - length) % self.size
+      self.pos = 0
+    frame = []
+    for addr, text in zip(self.lines, self.tape):
+      text = text.ljust(self.size)
+      # Rotate so that DDRAM column start holds the start of the tape
+      cut = (self.size - self.start) % self.size
+      frame.append((addr, text[cut:] + text[:cut], False))
+    self.renders += 1
+    return frame
+
+  def stats(self):
+    return {"steps": self.steps, "renders": self.renders, "cells": self.cells,
+            "mode": "shift" if self.fits() else "incremental"}
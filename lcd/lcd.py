@@ -1,4 +1,4 @@
-#!/usr/bin/python
+#!/usr/bin/env python3
 #
 # This is based off Leon Anavi's repository
 #   https://github.com/leon-anavi/raspberrypi-lcd
@@ -32,7 +32,7 @@
 # 2 : 5V
 # 3 : Contrast (0-5V)*
 # 4 : RS (Register Select)
-# 5 : R/W (Read Write)       - GROUND THIS PIN
+# 5 : R/W (Read Write)       - GROUND THIS PIN, or see busy in hd44780/driver.py
 # 6 : Enable or Strobe
 # 7 : Data Bit 0             - NOT USED
 # 8 : Data Bit 1             - NOT USED
@@ -76,13 +76,13 @@
 # C0  11000000 Force cursor to beginning ( 2nd line)
 # 38  00111000 2 lines and 5x7 matrix
 
-import RPi.GPIO as GPIO
 import os
 import socket
 import fcntl
 import struct
 import time
 import requests
+from hd44780 import HD44780, Pins, RPiGPIO
 from time import localtime, strftime
 
 def getCPUtemperature():
@@ -92,8 +92,8 @@ def getCPUtemperature():
 def printDateTime():
   textDate = strftime("%d %A %Y", localtime())
   textTime = strftime("%H:%M:%S", localtime())
-  lcd_string(textDate,LCD_LINE_1)
-  lcd_string(textTime,LCD_LINE_2)
+  lcd.string(textDate,LCD_LINE_1)
+  lcd.string(textTime,LCD_LINE_2)
   return
 
 def getInterfaceAddress(ifname):
@@ -102,7 +102,7 @@ def getInterfaceAddress(ifname):
     return socket.inet_ntoa(fcntl.ioctl(
       s.fileno(),
       0x8915,  # SIOCGIFADDR
-      struct.pack('256s', ifname[:15])
+      struct.pack('256s', ifname[:15].encode())
     )[20:24])
   except:
     return ''
@@ -135,30 +135,17 @@ LCD_D7 = 18
 
 # Define some device constants
 LCD_WIDTH = 16    # Maximum characters per line
-LCD_CHR = True
-LCD_CMD = False
 
 LCD_LINE_1 = 0x80 # LCD RAM address for the 1st line
 LCD_LINE_2 = 0xC0 # LCD RAM address for the 2nd line
 
-# Timing constants
-E_PULSE = 0.0005
-E_DELAY = 0.0005
+lcd = HD44780(RPiGPIO(), Pins(LCD_RS, LCD_E, LCD_D4, LCD_D5, LCD_D6, LCD_D7), "16x2")
 
 def main():
   # Main program block
-  
-  GPIO.setwarnings(False)
-  GPIO.setmode(GPIO.BCM)       # Use BCM GPIO numbers
-  GPIO.setup(LCD_E, GPIO.OUT)  # E
-  GPIO.setup(LCD_RS, GPIO.OUT) # RS
-  GPIO.setup(LCD_D4, GPIO.OUT) # DB4
-  GPIO.setup(LCD_D5, GPIO.OUT) # DB5
-  GPIO.setup(LCD_D6, GPIO.OUT) # DB6
-  GPIO.setup(LCD_D7, GPIO.OUT) # DB7
 
-  # Initialise display
-  lcd_init()
+  # Initialise display, with a blinking cursor
+  lcd.init(0x0F)
 
   # Get the BTC-USD price here and only once because it is slow to respond
   # and there may be rate-limiting on the free API
@@ -172,101 +159,19 @@ def main():
       time.sleep(1)
       index += 1
     # Display CPU temperature
-    lcd_string("CPU temperature:",LCD_LINE_1)
+    lcd.string("CPU temperature:",LCD_LINE_1)
     textCPU = getCPUtemperature()+"C"
-    lcd_string(textCPU,LCD_LINE_2)
+    lcd.string(textCPU,LCD_LINE_2)
     time.sleep(3)
     # Display local IP
-    lcd_string("IP:",LCD_LINE_1)
+    lcd.string("IP:",LCD_LINE_1)
     textIP = getIP()
-    lcd_string(textIP,LCD_LINE_2)
+    lcd.string(textIP,LCD_LINE_2)
     time.sleep(3)
-    lcd_string("BTC-USD", LCD_LINE_1)
-    lcd_string(btcusd, LCD_LINE_2)
+    lcd.string("BTC-USD", LCD_LINE_1)
+    lcd.string(btcusd, LCD_LINE_2)
     time.sleep(3)
 
-def lcd_init():
-  # Initialise display
-#  lcd_byte(0x33,LCD_CMD) # 110011 Initialise
-#  lcd_byte(0x32,LCD_CMD) # 110010 Initialise
-  lcd_byte(0x22,LCD_CMD) # 100010 Initialise 4-bit mode
-  lcd_byte(0x06,LCD_CMD) # 000110 Cursor move direction
-  #lcd_byte(0x0C,LCD_CMD) # 001100 Display On,Cursor Off, Blink Off
-  lcd_byte(0x0F,LCD_CMD) # 001111 Display On,Cursor On, Blink On
-  lcd_byte(0x28,LCD_CMD) # 101000 Data length, number of lines, font size
-  lcd_byte(0x01,LCD_CMD) # 000001 Clear display
-  time.sleep(E_DELAY)
-
-def lcd_byte(bits, mode):
-  # Send byte to data pins
-  # bits = data
-  # mode = True  for character
-  #        False for command
-
-  GPIO.output(LCD_RS, mode) # RS
-
-  # High bits
-  GPIO.output(LCD_D4, False)
-  GPIO.output(LCD_D5, False)
-  GPIO.output(LCD_D6, False)
-  GPIO.output(LCD_D7, False)
-  if bits&0x10==0x10:
-    GPIO.output(LCD_D4, True)
-  if bits&0x20==0x20:
-    GPIO.output(LCD_D5, True)
-  if bits&0x40==0x40:
-    GPIO.output(LCD_D6, True)
-  if bits&0x80==0x80:
-    GPIO.output(LCD_D7, True)
-
-  # Toggle 'Enable' pin
-  lcd_toggle_enable()
-
-  # Low bits
-  GPIO.output(LCD_D4, False)
-  GPIO.output(LCD_D5, False)
-  GPIO.output(LCD_D6, False)
-  GPIO.output(LCD_D7, False)
-  if bits&0x01==0x01:
-    GPIO.output(LCD_D4, True)
-  if bits&0x02==0x02:
-    GPIO.output(LCD_D5, True)
-  if bits&0x04==0x04:
-    GPIO.output(LCD_D6, True)
-  if bits&0x08==0x08:
-    GPIO.output(LCD_D7, True)
-
-  # Toggle 'Enable' pin
-  lcd_toggle_enable()
-
-def lcd_toggle_enable():
-  # Toggle enable
-  time.sleep(E_DELAY)
-  GPIO.output(LCD_E, True)
-  time.sleep(E_PULSE)
-  GPIO.output(LCD_E, False)
-  time.sleep(E_DELAY)
-
-def lcd_string(message,line):
-  # Cast to string
-  message = str(message)
-  # Send string to display
-  message = message.ljust(LCD_WIDTH," ")
-
-  lcd_byte(line, LCD_CMD)
-
-  for i in range(LCD_WIDTH):
-    lcd_byte(ord(message[i]),LCD_CHR)
-
-  # TESTING
-  # Scroll text (there and back again...)
-#  for i in range(LCD_WIDTH):
-#    lcd_byte(0x1C, LCD_CMD)
-#    time.sleep(0.1)
-#  for i in range(LCD_WIDTH):
-#    lcd_byte(0x1B, LCD_CMD)
-#    time.sleep(0.1)
-
 if __name__ == '__main__':
 
   try:
@@ -274,6 +179,6 @@ if __name__ == '__main__':
   except KeyboardInterrupt:
     pass
   finally:
-    lcd_byte(0x01, LCD_CMD)
-    lcd_string("Goodbye!",LCD_LINE_1)
-    GPIO.cleanup()
+    lcd.clear()
+    lcd.string("Goodbye!",LCD_LINE_1)
+    lcd.close()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+#
+# lcd_bench.py: Measure LCD write throughput against a simulated GPIO
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Usage: ./lcd_bench.py [--lines N] [--call-cost SECONDS] [nibble|framebuffer|busy|render|scroll|glyphs|panels]
+
+import argparse
+import time
+import random
+from hd44780 import HD44780, PINS, Simulator, Renderer, Scroller, Glyphs, Bus, Group
+
+# Roughly what one RPi.GPIO output() call costs on a Pi 3
+CALL_COST = 0.000002
+
+# The original lcd_byte(): ten output() calls and three 0.5ms sleeps
+# per nibble
+def legacy_byte(sim, bits, mode):
+  sim.output((PINS.rs,), (mode,))
+  for nibble in (bits >> 4, bits & 0x0F):
+    sim.output((PINS.d4,), (False,))
+    sim.output((PINS.d5,), (False,))
+    sim.output((PINS.d6,), (False,))
+    sim.output((PINS.d7,), (False,))
+    if nibble&0x01==0x01:
+      sim.output((PINS.d4,), (True,))
+    if nibble&0x02==0x02:
+      sim.output((PINS.d5,), (True,))
+    if nibble&0x04==0x04:
+      sim.output((PINS.d6,), (True,))
+    if nibble&0x08==0x08:
+      sim.output((PINS.d7,), (True,))
+    time.sleep(0.0005)
+    sim.output((PINS.e,), (True,))
+    time.sleep(0.0005)
+    sim.output((PINS.e,), (False,))
+    time.sleep(0.0005)
+
+# Write 16 character lines the way string() does without the
+# framebuffer: an address command followed by the characters
+def run(write, lines):
+  count = 0
+  start = time.perf_counter()
+  for n in range(lines):
+    write(0x80 if n & 1 else 0xC0, False)
+    for ch in format(n, "016d"):
+      write(ord(ch), True)
+    count += 17
+  return count, time.perf_counter() - start
+
+def report(name, sim, count, elapsed):
+  print(format(name, "8s") + ": " + format(count / elapsed, "10.0f") + " bytes/s, "
+        + format(sim.calls / count, "4.1f") + " GPIO calls/byte")
+
+def bench_nibble(args):
+  sim = Simulator(args.call_cost)
+  lcd = HD44780(sim)
+  lcd.init()
+
+  sim.reset()
+  count, elapsed = run(lambda b, m: legacy_byte(sim, b, m), args.lines)
+  before = sim.received
+  report("before", sim, count, elapsed)
+
+  sim.reset()
+  count, elapsed = run(lcd.byte, args.lines)
+  report("after", sim, count, elapsed)
+
+  if sim.received != before:
+    print("MISMATCH: the two write paths sent different bytes")
+    exit(1)
+
+# Run lcd.py's clock for a while, and count what reaches the LCD
+def bench_framebuffer(args):
+  sim = Simulator(args.call_cost)
+  lcd = HD44780(sim)
+  lcd.init()
+  sim.reset()
+  seconds = args.lines * 10
+  start = time.mktime((2026, 1, 1, 23, 59, 0, 0, 1, -1))
+  for t in range(seconds):
+    text = (time.strftime("%d %A %Y", time.localtime(start + t)),
+            time.strftime("%H:%M:%S", time.localtime(start + t)))
+    lcd.string(text[0], lcd.line(0))
+    lcd.string(text[1], lcd.line(1))
+    if sim.text(0x00) != text[0].ljust(16)[:16] or sim.text(0x40) != text[1].ljust(16):
+      print("MISMATCH: the glass shows something else")
+      exit(1)
+  frames = lcd.fb.frames
+  print("frames  : " + str(frames) + " lines over " + str(seconds) + " seconds")
+  print("before  : " + format(frames * (1 + lcd.width) / seconds, "6.1f") + " bus bytes/s")
+  print("after   : " + format(len(sim.received) / seconds, "6.1f") + " bus bytes/s, "
+        + format(lcd.fb.bytes_saved / frames, "4.1f") + " bytes saved/frame")
+
+# Fixed waits against busy flag polling, on fast, typical and slow parts
+def bench_busy(args):
+  modes = (("legacy", "legacy", False), ("fixed", "datasheet", False),
+           ("busy", "datasheet", True))
+  for fosc in (350000, 270000, 190000):
+    print("fosc " + str(fosc // 1000) + "kHz:")
+    for name, timing, busy in modes:
+      sim = Simulator(args.call_cost, fosc)
+      lcd = HD44780(sim, PINS._replace(rw=4), timing=timing, busy=busy)
+      lcd.init()
+      sim.reset()
+      count, elapsed = run(lcd.byte, args.lines)
+      print("  " + format(name, "6s") + ": " + format(count / elapsed, "10.0f") + " bytes/s, "
+            + str(sim.overruns) + " overruns")
+
+# A producer updating a clock at 100Hz, drawing either itself or through
+# the renderer at 20fps. Reports how long the producer was held up.
+def bench_render(args):
+  for threaded in (False, True):
+    sim = Simulator(args.call_cost)
+    lcd = HD44780(sim)
+    lcd.init()
+    renderer = Renderer(lcd, fps=20)
+    if threaded:
+      renderer.start()
+    worst = 0.0
+    end = time.monotonic() + args.lines / 10.0
+    n = 0
+    while time.monotonic() < end:
+      frame = [(lcd.line(0), "Tick " + str(n)), (lcd.line(1), format(time.time(), ".2f"))]
+      start = time.perf_counter()
+      if threaded:
+        renderer.submit(frame)
+      else:
+        for addr, text in frame:
+          lcd.string(text, addr)
+      worst = max(worst, time.perf_counter() - start)
+      n += 1
+      time.sleep(0.01)
+    print(("threaded" if threaded else "direct") + ": " + str(n) + " frames, worst producer stall "
+          + format(worst * 1000, ".3f") + "ms, " + str(len(sim.received)) + " bus bytes")
+    if threaded:
+      renderer.stop()
+      stats = renderer.stats()
+      print("  coalesced " + str(stats["coalesced"]) + ", merged " + str(stats["merged"])
+            + ", latency avg " + format(stats["latency_avg"] * 1000, ".1f") + "ms max "
+            + format(stats["latency_max"] * 1000, ".1f") + "ms")
+
+  # A full queue must keep every shift, and a shorter string after a
+  # longer one at the same address must leave the rest of the longer one
+  sim = Simulator(args.call_cost)
+  lcd = HD44780(sim)
+  lcd.init()
+  renderer = Renderer(lcd, depth=2)
+  sent = []
+  lcd.command = lambda bits: sent.append(bits)
+  for n in range(10):
+    renderer.submit([(lcd.line(0), "ABCDEF" + str(n), False), (None, 0x18),
+                     (lcd.line(0), "XY", False)])
+  renderer.render(list(renderer.frames))
+  del lcd.command
+  shifts = sent.count(0x18)
+  if shifts != 10 or renderer.stats()["merged"] != 8:
+    print("MISMATCH: " + str(shifts) + " of 10 shifts sent through a queue of 2")
+    exit(1)
+  if lcd.fb.ram[0][:7] != b"XYCDEF9":
+    print("MISMATCH: a shorter string left " + repr(bytes(lcd.fb.ram[0][:7])))
+    exit(1)
+
+  # A backend that fails stops the renderer, and the next submit() says so
+  sim = Simulator(args.call_cost)
+  lcd = HD44780(sim)
+  lcd.init()
+  def unplugged(pins, values):
+    raise OSError("GPIO gone")
+  sim.output = unplugged
+  renderer = Renderer(lcd)
+  renderer.start()
+  renderer.submit([(lcd.line(0), "Lost")])
+  renderer.join(1)
+  try:
+    renderer.submit([(lcd.line(0), "Found")])
+    print("MISMATCH: submit() took a frame after the renderer died")
+    exit(1)
+  except RuntimeError as e:
+    print("backend failure: " + str(e))
+
+# Frames the way prices_scroll() used to send them: display off, a
+# character on each line, shift, display on
+def legacy_scroll(ch_one, ch_two, col):
+  return [(None, 0x08), (0x80 | col, ch_one, False), (0xC0 | col, ch_two, False),
+          (None, 0x1B), (None, 0x0C)]
+
+# Scroll a tape that fits in DDRAM and one that doesn't, the old way
+# and with Scroller. Bus bytes/s are at the ticker's 0.8s per step.
+def bench_scroll(args):
+  for name, count in (("short", 3), ("long", 6)):
+    pairs = "".join(("BTC-" + c).ljust(11) for c in ("USD", "EUR", "GBP", "JPY", "CAD", "AUD")[:count])
+    prices = "".join(format(67000.12 + n, ".2f").ljust(11) for n in range(count))
+    tape = [pairs, prices]
+    steps = args.lines * 10
+    glass = {}
+    for after in (False, True):
+      sim = Simulator(args.call_cost)
+      lcd = HD44780(sim)
+      lcd.init()
+      sim.reset()
+      scroller = Scroller(lcd.width)
+      scroller.set(tape)
+      shown = []
+      for step in range(steps):
+        if after:
+          frame = scroller.step()
+        else:
+          # The old loop started at column 16 and carried on round DDRAM
+          c = step % len(tape[0])
+          frame = legacy_scroll(tape[0][c], tape[1][c], (16 + step) % 40)
+        for op in frame:
+          if op[0] is None:
+            lcd.command(op[1])
+          else:
+            lcd.string(op[1], op[0], *op[2:])
+        shown.append((sim.text(0x00), sim.text(0x40)))
+      glass[after] = shown
+      print(format(name, "5s") + " " + ("after " if after else "before") + ": "
+            + format(len(sim.received) / steps, "4.1f") + " bus bytes/step, "
+            + format(len(sim.received) / steps / 0.8, "5.2f") + " bus bytes/s"
+            + (", " + scroller.stats()["mode"] if after else ""))
+    # A tape held in DDRAM goes round every 40 columns, with a gap; the
+    # old loop and an incremental one start over straight after the tape
+    if len(tape[0]) <= 40:
+      ring = [t.ljust(40) for t in tape]
+      expect = [tuple("".join(r[(step + 1 + i - 16) % 40] for i in range(16)) for r in ring)
+                for step in range(steps)]
+    else:
+      expect = glass[False]
+    if glass[True] != expect:
+      print("MISMATCH: the glass shows something else")
+      exit(1)
+
+# Pages of prices dropped into the 40 columns of DDRAM, as a scrolling
+# ticker would, so more of them are kept than are on the glass. Each has
+# two currency glyphs from a library of 16, some more popular than
+# others. Checks after every page that each glyph in DDRAM still has its
+# own bitmap in CGRAM.
+def bench_glyphs(args):
+  library = {"g" + str(n): [(n * 7 + row) & 0x1F for row in range(8)] for n in range(16)}
+  names = list(library)
+  weights = [1.0 / (n + 1) for n in range(len(names))]
+  sim = Simulator(args.call_cost)
+  lcd = HD44780(sim)
+  lcd.glyphs = Glyphs(library)
+  lcd.init()
+  sim.reset()
+  rng = random.Random(1)
+  pages = args.lines * 50
+  shown = {}
+  for page in range(pages):
+    row = rng.randrange(2)
+    col = rng.randrange(3) * 12
+    picked = rng.choices(names, weights, k=2)
+    lcd.string("".join(lcd.glyphs.char(name) + "1234 " for name in picked).ljust(12),
+               lcd.line(row) + col, False)
+    for n, name in enumerate(picked):
+      shown[(row, col + n * 6)] = name
+    for (row, col), name in shown.items():
+      slot = sim.ddram[(row << 6) + col]
+      if slot < 8 and list(sim.cgram[slot * 8:slot * 8 + 8]) != library[name]:
+        print("MISMATCH: " + name + " shows slot " + str(slot) + " with something else in it")
+        exit(1)
+  stats = lcd.glyphs.stats()
+  print("pages   : " + str(pages) + ", 2 glyphs each from " + str(len(library)))
+  print("hits    : " + format(stats["hit_rate"] * 100, ".1f") + "%, " + str(stats["evictions"])
+        + " evictions, " + str(stats["fallbacks"]) + " fallbacks")
+  print("uploads : " + format(stats["upload_bytes"] / pages, ".1f") + " bus bytes/page, of "
+        + format(len(sim.received) / pages, ".1f") + " in all")
+  # Uploading every glyph every time it is written
+  print("always  : " + format((stats["hits"] + stats["misses"]) * 9 / pages, ".1f")
+        + " bus bytes/page of uploads")
+
+# 1 to 4 panels on one bus, each sent --lines different lines, one
+# panel after another and interleaved by Group.flush()
+def bench_panels(args):
+  for count in (1, 2, 4):
+    for interleaved in (False, True):
+      bus = Bus(args.call_cost)
+      group = Group(bus, PINS, [(8 + n, "16x2") for n in range(count)])
+      group.init()
+      bus.reset()
+      rng = random.Random(count)
+      lines = [[format(rng.randrange(10 ** 16), "016d") for l in range(args.lines)]
+               for n in range(count)]
+      start = time.perf_counter()
+      for n in range(count):
+        for l, text in enumerate(lines[n]):
+          group.string(text, group.line(l & 1, n))
+        if not interleaved:
+          group.flush()
+      group.flush()
+      elapsed = time.perf_counter() - start
+      sent = sum(len(sim.received) for sim in bus.panels.values())
+      overruns = sum(sim.overruns for sim in bus.panels.values())
+      print(str(count) + " panel" + ("s " if count > 1 else "  ")
+            + ("interleaved" if interleaved else "in turn    ") + ": "
+            + format(sent / elapsed, "8.0f") + " bytes/s, " + str(overruns) + " overruns")
+      for n in range(count):
+        sim = bus.panels[8 + n]
+        if sim.text(0x40 if (args.lines - 1) & 1 else 0x00) != lines[n][-1]:
+          print("MISMATCH: panel " + str(n) + " shows something else")
+          exit(1)
+
+def main():
+  parser = argparse.ArgumentParser(description="HD44780 write benchmark")
+  parser.add_argument("bench", nargs="?", default="nibble", choices=["nibble", "framebuffer", "busy", "render", "scroll", "glyphs", "panels"])
+  parser.add_argument("--lines", type=int, default=20, help="16 character lines to write")
+  parser.add_argument("--call-cost", type=float, default=CALL_COST,
+                      help="simulated cost of one GPIO output() call in seconds")
+  args = parser.parse_args()
+
+  if args.bench == "nibble":
+    bench_nibble(args)
+  elif args.bench == "framebuffer":
+    bench_framebuffer(args)
+  elif args.bench == "busy":
+    bench_busy(args)
+  elif args.bench == "render":
+    bench_render(args)
+  elif args.bench == "scroll":
+    bench_scroll(args)
+  elif args.bench == "glyphs":
+    bench_glyphs(args)
+  else:
+    bench_panels(args)
+
+if __name__ == '__main__':
+  main()
@@ -1,4 +1,4 @@
-#!/usr/bin/python
+#!/usr/bin/env python3
 #
 # This is based off Leon Anavi's repository
 #   https://github.com/leon-anavi/raspberrypi-lcd
@@ -32,7 +32,7 @@
 # 2 : 5V
 # 3 : Contrast (0-5V)*
 # 4 : RS (Register Select)
-# 5 : R/W (Read Write)       - GROUND THIS PIN
+# 5 : R/W (Read Write)       - GROUND THIS PIN, or see busy in hd44780/driver.py
 # 6 : Enable or Strobe
 # 7 : Data Bit 0             - NOT USED
 # 8 : Data Bit 1             - NOT USED
@@ -76,27 +76,38 @@
 # C0  11000000 Force cursor to beginning ( 2nd line)
 # 38  00111000 2 lines and 5x7 matrix
 
-import RPi.GPIO as GPIO
 #import struct
 import time
-import requests
+from hd44780 import HD44780, Pins, RPiGPIO
+from crypto import Fetcher, PriceCache, amount
 #from time import localtime, strftime
 
+# Trade pairs to show:
 # a = "base"
 # b = "target"
 # d = digits of precision (right of ".")
-def cryptoprice(a, b, d=8):
-  # https://api.cryptonator.com/api/ticker/a-b
-  price_url = "https://api.cryptonator.com/api/ticker/" + a + "-" + b
-  # ClourFlare requires a User-Agent header, otherwise returns 502 error
-  # https://stackoverflow.com/questions/43616566/python-requests-response-520/43616647#43616647
-  price_result = requests.get(price_url, headers={'User-Agent': 'lcd.py'})
-  price_json = price_result.json()
-  price = float(price_json["ticker"]["price"])
-  # Truncate to precision d
-  precision = "." + str(d) + "f"
-  #p = str(int(price * precision) / float(precision))
-  return format(price, precision)
+PAIRS = [
+  ("BTC", "USD", 2),
+  ("BTC", "CAD", 2),
+  ("LTC", "BTC", 8),
+  ("ETH", "BTC", 8),
+  ("XMR", "BTC", 8),
+  ("DOGE", "BTC", 8),
+]
+
+# Latest prices of PAIRS from the cache, without waiting on the network
+# Returns a list of ("a-b", price) with price formatted to precision d
+def cryptoprices(cache):
+  prices = cache.get_many([(a, b) for a, b, d in PAIRS])
+  ret = []
+  for a, b, d in PAIRS:
+    price = prices.get((a, b))
+    if price is not None:
+      # Truncate to precision d, and to the width of the display
+      ret.append((a + "-" + b, amount(price, d, LCD_WIDTH)))
+    else:
+      ret.append((a + "-" + b, "Getting"))
+  return ret
 
 # Define GPIO to LCD mapping
 LCD_RS = 7
@@ -109,144 +120,30 @@ LCD_D7 = 18
 
 # Define some device constants
 LCD_WIDTH = 16    # Maximum characters per line
-LCD_CHR = True
-LCD_CMD = False
 
 LCD_LINE_1 = 0x80 # LCD RAM address for the 1st line
 LCD_LINE_2 = 0xC0 # LCD RAM address for the 2nd line
 
-# Timing constants
-E_PULSE = 0.0005
-E_DELAY = 0.0005
+lcd = HD44780(RPiGPIO(), Pins(LCD_RS, LCD_E, LCD_D4, LCD_D5, LCD_D6, LCD_D7), "16x2")
 
 # API rate limiter
 API_RATE = 4500
 
 def main():
   # Main program block
-  
-  GPIO.setwarnings(False)
-  GPIO.setmode(GPIO.BCM)       # Use BCM GPIO numbers
-  GPIO.setup(LCD_E, GPIO.OUT)  # E
-  GPIO.setup(LCD_RS, GPIO.OUT) # RS
-  GPIO.setup(LCD_D4, GPIO.OUT) # DB4
-  GPIO.setup(LCD_D5, GPIO.OUT) # DB5
-  GPIO.setup(LCD_D6, GPIO.OUT) # DB6
-  GPIO.setup(LCD_D7, GPIO.OUT) # DB7
 
-  # Initialise display
-  lcd_init()
+  # Initialise display, with a blinking cursor
+  lcd.init(0x0F)
 
-  # Get prices
-  # TODO: Loop this, and observe API_RATE limit
-  btcusd = cryptoprice("BTC", "USD", 2)
-  btccad = cryptoprice("BTC", "CAD", 2)
-  ltcbtc = cryptoprice("LTC", "BTC")
-  ethbtc = cryptoprice("ETH", "BTC")
-  xmrbtc = cryptoprice("XMR", "BTC")
-  dogebtc = cryptoprice("DOGE", "BTC")
+  # Prices from the last run are shown straight away, and refreshed in
+  # the background once they are API_RATE old
+  cache = PriceCache(Fetcher(), API_RATE)
 
   while True:
-    lcd_string("BTC-USD", LCD_LINE_1)
-    lcd_string(btcusd, LCD_LINE_2)
-    time.sleep(3)
-    lcd_string("BTC-CAD", LCD_LINE_1)
-    lcd_string(btccad, LCD_LINE_2)
-    time.sleep(3)
-    lcd_string("LTC-BTC", LCD_LINE_1)
-    lcd_string(ltcbtc, LCD_LINE_2)
-    time.sleep(3)
-    lcd_string("ETH-BTC", LCD_LINE_1)
-    lcd_string(ethbtc, LCD_LINE_2)
-    time.sleep(3)
-    lcd_string("XMR-BTC", LCD_LINE_1)
-    lcd_string(xmrbtc, LCD_LINE_2)
-    time.sleep(3)
-    lcd_string("DOGE-BTC", LCD_LINE_1)
-    lcd_string(dogebtc, LCD_LINE_2)
-    time.sleep(3)
-
-def lcd_init():
-  # Initialise display
-#  lcd_byte(0x33,LCD_CMD) # 110011 Initialise
-#  lcd_byte(0x32,LCD_CMD) # 110010 Initialise
-  lcd_byte(0x22,LCD_CMD) # 100010 Initialise 4-bit mode
-  lcd_byte(0x06,LCD_CMD) # 000110 Cursor move direction
-  #lcd_byte(0x0C,LCD_CMD) # 001100 Display On,Cursor Off, Blink Off
-  lcd_byte(0x0F,LCD_CMD) # 001111 Display On,Cursor On, Blink On
-  lcd_byte(0x28,LCD_CMD) # 101000 Data length, number of lines, font size
-  lcd_byte(0x01,LCD_CMD) # 000001 Clear display
-  time.sleep(E_DELAY)
-
-def lcd_byte(bits, mode):
-  # Send byte to data pins
-  # bits = data
-  # mode = True  for character
-  #        False for command
-
-  GPIO.output(LCD_RS, mode) # RS
-
-  # High bits
-  GPIO.output(LCD_D4, False)
-  GPIO.output(LCD_D5, False)
-  GPIO.output(LCD_D6, False)
-  GPIO.output(LCD_D7, False)
-  if bits&0x10==0x10:
-    GPIO.output(LCD_D4, True)
-  if bits&0x20==0x20:
-    GPIO.output(LCD_D5, True)
-  if bits&0x40==0x40:
-    GPIO.output(LCD_D6, True)
-  if bits&0x80==0x80:
-    GPIO.output(LCD_D7, True)
-
-  # Toggle 'Enable' pin
-  lcd_toggle_enable()
-
-  # Low bits
-  GPIO.output(LCD_D4, False)
-  GPIO.output(LCD_D5, False)
-  GPIO.output(LCD_D6, False)
-  GPIO.output(LCD_D7, False)
-  if bits&0x01==0x01:
-    GPIO.output(LCD_D4, True)
-  if bits&0x02==0x02:
-    GPIO.output(LCD_D5, True)
-  if bits&0x04==0x04:
-    GPIO.output(LCD_D6, True)
-  if bits&0x08==0x08:
-    GPIO.output(LCD_D7, True)
-
-  # Toggle 'Enable' pin
-  lcd_toggle_enable()
-
-def lcd_toggle_enable():
-  # Toggle enable
-  time.sleep(E_DELAY)
-  GPIO.output(LCD_E, True)
-  time.sleep(E_PULSE)
-  GPIO.output(LCD_E, False)
-  time.sleep(E_DELAY)
-
-def lcd_string(message,line):
-  # Cast to string
-  message = str(message)
-  # Send string to display
-  message = message.ljust(LCD_WIDTH," ")
-
-  lcd_byte(line, LCD_CMD)
-
-  for i in range(LCD_WIDTH):
-    lcd_byte(ord(message[i]),LCD_CHR)
-
-  # TESTING
-  # Scroll text (there and back again...)
-#  for i in range(LCD_WIDTH):
-#    lcd_byte(0x1C, LCD_CMD)
-#    time.sleep(0.1)
-#  for i in range(LCD_WIDTH):
-#    lcd_byte(0x1B, LCD_CMD)
-#    time.sleep(0.1)
+    for pair, price in cryptoprices(cache):
+      lcd.string(pair, LCD_LINE_1)
+      lcd.string(price, LCD_LINE_2)
+      time.sleep(3)
 
 if __name__ == '__main__':
 
@@ -255,6 +152,6 @@ if __name__ == '__main__':
   except KeyboardInterrupt:
     pass
   finally:
-    lcd_byte(0x01, LCD_CMD)
-    lcd_string("Goodbye!",LCD_LINE_1)
-    GPIO.cleanup()
+    lcd.clear()
+    lcd.string("Goodbye!",LCD_LINE_1)
+    lcd.close()
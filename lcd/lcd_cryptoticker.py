@@ -32,7 +32,7 @@
 # 2 : 5V
 # 3 : Contrast (0-5V)*
 # 4 : RS (Register Select)
-# 5 : R/W (Read Write)       - GROUND THIS PIN
+# 5 : R/W (Read Write)       - GROUND THIS PIN, or see busy in hd44780/driver.py
 # 6 : Enable or Strobe
 # 7 : Data Bit 0             - NOT USED
 # 8 : Data Bit 1             - NOT USED
@@ -76,11 +76,13 @@
 # C0  11000000 Force cursor to beginning ( 2nd line)
 # 38  00111000 2 lines and 5x7 matrix
 
-import RPi.GPIO as GPIO
+import argparse
 import time
-import requests
+from hd44780 import Group, Pins, RPiGPIO, Renderer, Scroller, Glyphs
+from crypto import Fetcher, PriceCache, currency, amount, decimal
 
-# Define GPIO to LCD mapping
+# Define GPIO to LCD mapping. RS and D4..D7 are wired to every panel,
+# and each has an E of its own (see PANELS).
 LCD_RS = 7
 LCD_E  = 8
 LCD_D4 = 25
@@ -88,78 +90,68 @@ LCD_D5 = 24
 LCD_D6 = 23
 LCD_D7 = 18
 
-
 # Define some device constants
 LCD_WIDTH = 16    # Maximum characters per line
-LCD_CHR = True
-LCD_CMD = False
-LCD_BUFFER = 0x27 # Per-line character buffer width
 
 LCD_LINE_1 = 0x80 # LCD RAM address for the 1st line
 LCD_LINE_2 = 0xC0 # LCD RAM address for the 2nd line
 
+# One line per panel: its E pin, its size and the pairs it scrolls
+PANELS = [
+  (LCD_E, "16x2", [("BTC","USD"), ("BTC","EUR"), ("BTC","ETH")]),
+#  (17, "20x4", [("BTC","GBP"), ("BTC","JPY"), ("LTC","BTC"), ("BTC","XMR"), ("USD","DOGE")]),
+]
+
+# Custom chars (5x8), loaded into the 8 CGRAM slots as they are shown.
+# Dollar (0x24) and Yen (0x5C) are in CGROM.
+GLYPHS = {
+  "up":       [0b00000,0b00100,0b01110,0b11111,0b00000,0b00000,0b00000,0b00000],
+  "down":     [0b00000,0b00000,0b00000,0b11111,0b01110,0b00100,0b00000,0b00000],
+  "bitcoin":  [0b01100,0b11110,0b01001,0b01110,0b01001,0b01001,0b11110,0b01100],
+  "ether":    [0b00000,0b11111,0b00000,0b01110,0b00000,0b11111,0b00000,0b00000],
+  "doge":     [0b01100,0b01010,0b01001,0b11101,0b01001,0b01010,0b01100,0b00000],
+  "monero":   [0b10001,0b11011,0b11111,0b10101,0b10001,0b10001,0b11011,0b00000],
+  "euro":     [0b00110,0b01001,0b11100,0b01000,0b11100,0b01001,0b00110,0b00000],
+  "pound":    [0b00110,0b01001,0b01000,0b11100,0b01000,0b01001,0b11111,0b00000],
+  "litecoin": [0b01000,0b01000,0b01010,0b01100,0b11000,0b01000,0b01111,0b00000],
+  "ruble":    [0b01110,0b01001,0b01001,0b11110,0b01000,0b11100,0b01000,0b00000],
+  "rupee":    [0b11111,0b00100,0b11111,0b00100,0b11000,0b00110,0b00001,0b00000],
+  "won":      [0b10001,0b10001,0b11111,0b10101,0b11111,0b01010,0b01010,0b00000],
+  #"dots":     [0b01010,0b10101,0b01010,0b10101,0b01010,0b10101,0b01010,0b10101],
+  #"undots":   [0b10101,0b01010,0b10101,0b01010,0b10101,0b01010,0b10101,0b01010],
+  #"inv up":   [0b11111,0b11011,0b10001,0b00000,0b11111,0b11111,0b11111,0b11111],
+  #"inv down": [0b11111,0b11111,0b11111,0b00000,0b10001,0b11011,0b11111,0b11111],
+}
+
+lcd = Group(RPiGPIO(), Pins(LCD_RS, LCD_E, LCD_D4, LCD_D5, LCD_D6, LCD_D7),
+            [(e, size) for e, size, pairs in PANELS])
+for panel in lcd.panels:
+  panel.glyphs = Glyphs(GLYPHS)
+# Every panel numbers the glyphs the same, so text can use any of them
+glyphs = lcd.panels[0].glyphs
+# Only the renderer thread touches the LCDs, everybody else submits frames
+renderer = Renderer(lcd, fps=20)
+
+# Widest a price may be on the tape
+PRICE_WIDTH = 12
+
 # Timing constants
-E_PULSE = 0.0005
-E_DELAY = 0.0005
 SCROLL_DELAY = 0.8
 
 # API rate limiter (seconds)
 API_RATE = 300
 
-class Currency:
-  def __init__(self,code):
-    self.code = code
-    # Precisions from ISO 4217 and other resources
-    # Dollars from https://en.wikipedia.org/wiki/Dollar
-    # Other cryptocurrencies have other specific denominations/precision
-    if code in ["AUD","BBD","MD","BND","BSD","BZD","CAD","FJD","GYD","HKD","JMD","KYD","LRD","NZD","SBD","SGD","TTD","TVD","TWD","USD","XCD"]:
-      self.precision = 2 # Cent
-      self.symbol = 0x24 # Dollar
-    elif code in ["EUR"]:
-      self.precision = 2
-      self.symbol = 0x06 # Euro
-    elif code in ["EGP","FKP","GIP","GBP","SHP","SSP","SYP"]:
-      self.precision = 2
-      self.symbol = 0x07
-    elif code in ["JPY"]:
-      self.precision = 0
-      self.symbol = 0x5C
-    elif code in ["CNY"]:
-      self.precision = 2
-      self.symbol = 0x5C
-    elif code in ["AED","AFN","ALL","AMD","AOA","ARS","AWG","AZN","BAM","BDT","BGN","BOB","BRL","BTN","BWP","BYN","CDF","CHF","COP","CRC","CUP","CVE","CZK","DKK","DOP","DZD","ERN","ETB","GEL","GHS","GMD","GTQ","HNL","HRK","HTG","HUF","IDR","ILS","INR","IRR","KES","KGS","KHR","KPW","KZT","LAK","LBP","LKR","LSL","MAD","MDL","MGA","MKD","MMK","MNT","MOP","MRU","MUR","MVR","MWK","MXN","MYR","MZN","NAD","NGN","NIO","NOK","NPR","PAB","PEN","PGK","PHP","PKR","PLN","QAR","RON","RSD","RUB","SAR","SCR","SDG","SEK","SLL","SOS","SRD","STN","SZL","THB","TJS","TMT","TOP","TRY","TZS","UAH","UYU","UZS","VEF","WST","YER","ZAR","ZMW","ZWL"]:
-      self.precision = 2
-      self.symbol = 0xFE # null
-    elif code in ["BIF","CLP","DJF","GNF","ISK","KMF","KRW","PYG","RWF","UGX","VND","VUV","XAF","XPF"]:
-      self.precision = 0
-      self.symbol = 0xFE
-    elif code in ["BHD","IQD","JOD","KWD","LYD","OMR","TND"]:
-      self.precision = 3
-      self.symbol = 0xFE
-    elif code in ["BTC","BCH","BSV","BTG"]:
-      self.precision = 8 # Satoshi
-      self.symbol = 0x02 # Bitcoin
-    elif code in ["XMR"]:
-      self.precision = 12 # Picomonero
-      self.symbol = 0x05 # Monero
-    elif code in ["ETH","ETC"]:
-      self.precision = 18 # Wei
-      self.symbol = 0x03 # Ethereum
-    elif code in ["DOGE"]:
-      self.precision = 8
-      self.symbol = 0x04
-    else:
-      self.precision=8
-      self.symbol = 0xFE
-
 class Price:
   def __init__(self,base,target):
-    self.base=Currency(base)
-    self.target=Currency(target)
+    self.base=currency(base)
+    self.target=currency(target)
     self.precision=self.target.precision
-    self.symbol=self.target.symbol
-    self.value=0.0
-    #self.old=0.0
+    # Decimal, so that there is no float noise in the last places
+    self.value=decimal(0)
+    self.old=decimal(0)
+    # Goes up with every new value, so show() knows when to format again
+    self.version=0
+    self.shown=None
     #self.update()
 
   def __str__(self):
@@ -168,229 +160,129 @@ class Price:
   # Return the name of the trade pair "base-target"
   def pair(self):
     return self.base.code + "-" + self.target.code
-  # Return a nicely formatted value
-  def show(self):
-    ret = "" if self.symbol==0xFE else chr(self.symbol)
-    if self.precision==0:
-      return ret + format(int(self.value), "d")
-    return ret + format(self.value, "."+str(self.precision)+"f")
-
-  def update(self):
+  # Return a nicely formatted value, at most width characters
+  def show(self, width=PRICE_WIDTH):
+    if self.shown is None or self.shown[:2] != (self.version, width):
+      self.shown = (self.version, width,
+                    amount(self.value, self.precision, width, sign=self.target.char(glyphs)))
+    return self.shown[2]
+
+  def update(self, value):
     self.old = self.value
-    price_url = "https://api.cryptonator.com/api/ticker/" + self.pair()
-    # ClourFlare requires a User-Agent header, otherwise returns 502 error
-    # https://stackoverflow.com/questions/43616566/python-requests-response-520/43616647#43616647
-    price_result = requests.get(price_url, headers={'User-Agent': 'lcd.py'})
-    price_json = price_result.json()
-    self.value = float(price_json["ticker"]["price"])
+    self.value = decimal(value)
+    self.version += 1
     # DEBUG
     print("Got " + self.pair() + ": " + self.show())
     return self.value
 
+# Take the latest prices from the cache. This never waits on the network;
+# stale prices are refreshed in the background, all at once.
+# Returns how many prices changed.
+def prices_get(prices, cache):
+  values = cache.get_many([(price.base.code, price.target.code) for price in prices])
+  changed = 0
+  for price in prices:
+    value = values.get((price.base.code, price.target.code))
+    if value is not None and decimal(value) != price.value:
+      price.update(value)
+      changed += 1
+  return changed
+
 def prices_show(prices):
   for pair in list(prices.keys()):
-    lcd_string(pair, LCD_LINE_1)
-    lcd_string(prices[pair], LCD_LINE_2)
+    lcd.string(pair, LCD_LINE_1)
+    lcd.string(prices[pair], LCD_LINE_2)
     time.sleep(3)
 
-def prices_scroll(prices, col = LCD_WIDTH):
-  # DEBUG
-  print("COL | ADR1 | CH1 | ADR2 | CH2")
-
-  # Show prices
+# The ticker tape: each pair above its price, with an arrow for which way
+# it last went. Only rebuilt when prices change.
+def prices_tape(prices):
+  pair_line = ""
+  price_line = ""
   for price in prices:
     if price.old!=0 and price.value > price.old:
-      pair_str = chr(0x00) + price.pair()
+      pair_str = glyphs.char("up") + price.pair()
     elif price.old!=0 and price.value < price.old:
-      pair_str = chr(0x01) + price.pair()
+      pair_str = glyphs.char("down") + price.pair()
     else:
       #pair_str = "=" + price.pair()
       pair_str = price.pair()
-
-    num_chars = (len(pair_str) if (len(pair_str) > len(price.show())) else len(price.show())) + 2
-    pair_str = pair_str.ljust(num_chars)
-    price_str = price.show().ljust(num_chars)
-    for c in range(num_chars):
-      ch_one = pair_str[c]
-      ch_two = price_str[c]
-      # Display off
-      lcd_byte(0x08, LCD_CMD)
-      # Line one
-      lcd_byte(0x80 | col, LCD_CMD)
-      lcd_byte(ord(ch_one), LCD_CHR)
-      # Line two
-      lcd_byte(0xC0 | col, LCD_CMD)
-      lcd_byte(ord(ch_two), LCD_CHR)
-      # Scroll both lines
-      lcd_byte(0x1B, LCD_CMD)
-      # Display on
-      lcd_byte(0x0C, LCD_CMD)
-      # Mind the buffer
-      #col = 0 if col >= 32 else col + 1
-      col+=1
-      if col > LCD_BUFFER:
-        col=0
-      # DEBUG
-      print(" " + format(col, "2d") + " | 0x" + format(0x80 | col, "02X") + " | '" + ch_one + "' | 0x" + format(0xC0 | col, "02X") + " | '" + ch_two + "'")
-      # Wait for keypress
-      #if ord(readchar.readkey()) == 3:
-      #  raise KeyboardInterrupt
-      # Delay the scroll
-      time.sleep(SCROLL_DELAY)
-  # Return the active column, to be reused on subsequent calls
-  return col
-
-def main():
-  GPIO.setwarnings(False)
-  GPIO.setmode(GPIO.BCM)       # Use BCM GPIO numbers
-  GPIO.setup(LCD_E, GPIO.OUT)  # E
-  GPIO.setup(LCD_RS, GPIO.OUT) # RS
-  GPIO.setup(LCD_D4, GPIO.OUT) # DB4
-  GPIO.setup(LCD_D5, GPIO.OUT) # DB5
-  GPIO.setup(LCD_D6, GPIO.OUT) # DB6
-  GPIO.setup(LCD_D7, GPIO.OUT) # DB7
-
-  # Initialise display
-  lcd_init()
-
-  # Custom font
-  lcd_mkchars()
-
-  prices = [
-    Price("BTC","USD"),
-    Price("BTC","EUR"),
-#    Price("BTC","GBP"),
-#    Price("BTC","JPY"),
-#    Price("LTC","BTC"),
-    Price("BTC","ETH"),
-#    Price("BTC","XMR"),
-#    Price("USD","DOGE"),
-  ]
-
-  timer = 0
-  col = LCD_WIDTH
-
+    price_str = price.show()
+
+    num_chars = max(len(pair_str), len(price_str)) + 2
+    pair_line += pair_str.ljust(num_chars)
+    price_line += price_str.ljust(num_chars)
+  return [pair_line, price_line]
+
+# Scroll every panel forever, all a step at a time. A tape of up to the
+# 40 characters of a DDRAM line sits there and each step is one display
+# shift; a longer one is written a column at a time just off the glass.
+# With stats, each panel's tape, scroller and glyph counters, and the
+# renderer's and the cache's, are printed whenever prices change.
+def prices_scroll(tickers, cache, stats=False):
+  scrollers = [Scroller(panel.width, (lcd.line(0, n), lcd.line(1, n)))
+               for n, panel in enumerate(lcd.panels)]
+  changed = [len(prices) for prices in tickers]
   while True:
-    # Get prices
-    if time.time() > (timer+API_RATE):
-      # Clear the display
-      lcd_byte(0x01, LCD_CMD)
-      # Blinky cursor
-      lcd_byte(0x0F, LCD_CMD)
-      lcd_string("Getting", LCD_LINE_1)
-      for price in prices:
-        lcd_string("", LCD_LINE_2) # Clear
-        lcd_string(price.pair(), LCD_LINE_2, False)
-        price.update()
-      timer = time.time()
-      # Reset the starting column
-      col = LCD_WIDTH
-    # Show prices
-    #prices_show(prices)
-    col = prices_scroll(prices, col)
-
-def lcd_init():
-  # Initialise display
-  lcd_byte(0x33,LCD_CMD) # 110011 Initialise
-  lcd_byte(0x32,LCD_CMD) # 110010 Initialise
-  #lcd_byte(0x22,LCD_CMD) # 100010 Initialise 4-bit mode
-  lcd_byte(0x06,LCD_CMD) # 000110 Cursor move direction
-  #lcd_byte(0x0C,LCD_CMD) # 001100 Display On,Cursor Off, Blink Off
-  lcd_byte(0x0F,LCD_CMD) # 001111 Display On,Cursor On, Blink On
-  lcd_byte(0x28,LCD_CMD) # 101000 Data length, number of lines, font size
-  lcd_byte(0x01,LCD_CMD) # 000001 Clear display
-  time.sleep(E_DELAY)
-
-def lcd_byte(bits, mode):
-  # Send byte to data pins
-  # bits = data
-  # mode = True  for character
-  #        False for command
-  GPIO.output(LCD_RS, mode)
-
-  # High bits
-  GPIO.output(LCD_D4, False)
-  GPIO.output(LCD_D5, False)
-  GPIO.output(LCD_D6, False)
-  GPIO.output(LCD_D7, False)
-  if bits&0x10==0x10:
-    GPIO.output(LCD_D4, True)
-  if bits&0x20==0x20:
-    GPIO.output(LCD_D5, True)
-  if bits&0x40==0x40:
-    GPIO.output(LCD_D6, True)
-  if bits&0x80==0x80:
-    GPIO.output(LCD_D7, True)
-
-  # Toggle 'Enable' pin
-  lcd_toggle_enable()
-
-  # Low bits
-  GPIO.output(LCD_D4, False)
-  GPIO.output(LCD_D5, False)
-  GPIO.output(LCD_D6, False)
-  GPIO.output(LCD_D7, False)
-  if bits&0x01==0x01:
-    GPIO.output(LCD_D4, True)
-  if bits&0x02==0x02:
-    GPIO.output(LCD_D5, True)
-  if bits&0x04==0x04:
-    GPIO.output(LCD_D6, True)
-  if bits&0x08==0x08:
-    GPIO.output(LCD_D7, True)
-
-  # Toggle 'Enable' pin
-  lcd_toggle_enable()
-
-def lcd_toggle_enable():
-  # Toggle enable
-  time.sleep(E_DELAY)
-  GPIO.output(LCD_E, True)
-  time.sleep(E_PULSE)
-  GPIO.output(LCD_E, False)
-  time.sleep(E_DELAY)
-
-def lcd_string(message,line,fill=True,fillchar=" "):
-  # Cast to string
-  message = str(message)
-  # Send string to display
-  if fill:
-    message = message.ljust(LCD_WIDTH,fillchar)
-
-  lcd_byte(line, LCD_CMD)
-
-  for i in range(len(message)):
-    lcd_byte(ord(message[i]),LCD_CHR)
-
-def lcd_mkchars():
-  # Custom chars (CGRAM)
-  # 8 * (5x8)
-  # Dollar (0x24) and Yen (0x5C) are in CGROM
-  lcd_byte(0x40, LCD_CMD)
-  chars = [
-    0b00000,0b00100,0b01110,0b11111,0b00000,0b00000,0b00000,0b00000,# Up
-    0b00000,0b00000,0b00000,0b11111,0b01110,0b00100,0b00000,0b00000,# Down
-    0b01100,0b11110,0b01001,0b01110,0b01001,0b01001,0b11110,0b01100,# BTC
-    0b00000,0b11111,0b00000,0b01110,0b00000,0b11111,0b00000,0b00000,# ETH
-    0b01100,0b01010,0b01001,0b11101,0b01001,0b01010,0b01100,0b00000,# DOGE
-    0b10001,0b11011,0b11111,0b10101,0b10001,0b10001,0b11011,0b00000,# XMR
-    0b00110,0b01001,0b11100,0b01000,0b11100,0b01001,0b00110,0b00000,# EUR
-    0b00110,0b01001,0b01000,0b11100,0b01000,0b01001,0b11111,0b00000,# GBP
-    #0b01010,0b10101,0b01010,0b10101,0b01010,0b10101,0b01010,0b10101,# Dots
-    #0b10101,0b01010,0b10101,0b01010,0b10101,0b01010,0b10101,0b01010,# Inverted Dots
-    #0b11111,0b11011,0b10001,0b00000,0b11111,0b11111,0b11111,0b11111,# Inverted Up Arrow
-    #0b11111,0b11111,0b11111,0b00000,0b10001,0b11011,0b11111,0b11111,# Inverted Down Arrow
-  ]
-  for b in chars:
-    lcd_byte(b, LCD_CHR)
-  lcd_byte(0x01, LCD_CMD)
+    frame = []
+    if stats and any(changed):
+      # The glyphs are the renderer's to touch, so it hands their counters out
+      counters = renderer.stats()
+      glyph_stats = counters.pop("glyphs")
+    for n, scroller in enumerate(scrollers):
+      if changed[n]:
+        scroller.set(prices_tape(tickers[n]))
+        if stats:
+          print("Panel " + str(n) + " tape: " + str(len(scroller.next[0])) + " characters")
+          print("Scroller: " + str(scroller.stats()))
+          print("Glyphs: " + str(glyph_stats[n]))
+      frame += scroller.step()
+    if stats and any(changed):
+      print("Renderer: " + str(counters))
+      print("Cache: " + str(cache.stats()))
+    renderer.submit(frame)
+    # Delay the scroll
+    time.sleep(SCROLL_DELAY)
+    changed = [prices_get(prices, cache) for prices in tickers]
+
+def main(stats=False):
+  # Initialise displays, with a blinking cursor while prices come in
+  lcd.init(0x0F)
+
+  tickers = [[Price(base, target) for base, target in pairs] for e, size, pairs in PANELS]
+
+  renderer.start()
+
+  # Prices from the last run are shown straight away, and refreshed once
+  # they are API_RATE old. Only wait if there are none at all.
+  cache = PriceCache(Fetcher(), API_RATE)
+  everything = [price for prices in tickers for price in prices]
+  prices_get(everything, cache)
+  while not all(price.value for price in everything):
+    for n, prices in enumerate(tickers):
+      renderer.submit([(lcd.line(0, n), "Getting"), (lcd.line(1, n), str(len(prices)) + " prices")])
+    time.sleep(5)
+    prices_get(everything, cache)
+
+  # Clear, and hide the cursor
+  for n in range(len(lcd.panels)):
+    renderer.submit([(None, lcd.panel(n) | 0x01), (None, lcd.panel(n) | 0x0C)])
+  # Show prices
+  #prices_show(tickers[0])
+  prices_scroll(tickers, cache, stats)
 
 if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Scroll crypto prices across HD44780 LCDs")
+  parser.add_argument("--stats", action="store_true",
+                      help="print the panel, display and price cache counters as prices change")
+  args = parser.parse_args()
   try:
-    main()
+    main(args.stats)
   except KeyboardInterrupt:
     pass
   finally:
-    #lcd_byte(0x01, LCD_CMD)
-    #lcd_string("Goodbye!",LCD_LINE_1)
-    GPIO.cleanup()
+    if renderer.is_alive():
+      renderer.stop()
+    #lcd.clear()
+    #lcd.string("Goodbye!",LCD_LINE_1)
+    lcd.close()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+#
+# A script to blink a bank of status beacons in morse code, one message
+# per LED, all from one process.
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Usage: ./morse_beacon.py [--wpm WPM] [--stdin] PIN[@WPM]=MESSAGE ...
+#
+#   ./morse_beacon.py 15=OK 16@8=SOS
+#
+# Each message repeats on its pin. With --stdin, a line "PIN MESSAGE"
+# plays MESSAGE once on that pin, between repeats of its beacon.
+
+from gpiozero import LED
+import argparse
+import sys
+import time
+import morsecode
+import morsebank
+
+# Speed for beacons that don't give their own
+WPM=12
+
+def beacon(spec):
+  pin, msg = spec.split("=", 1)
+  pin, at, wpm = pin.partition("@")
+  return int(pin), float(wpm) if wpm else None, msg
+
+def main():
+  parser = argparse.ArgumentParser(description="Blink status beacons in morse code")
+  parser.add_argument("--wpm", type=float, default=WPM, help="words per minute")
+  parser.add_argument("--stdin", action="store_true",
+                      help="play lines \"PIN MESSAGE\" from stdin once each")
+  parser.add_argument("beacons", nargs="*", type=beacon, metavar="PIN[@WPM]=MESSAGE")
+  args = parser.parse_args()
+  if not args.beacons and not args.stdin:
+    parser.error("nothing to send: give a beacon or --stdin")
+
+  bank = morsebank.Bank()
+  channels = {}
+  for pin, wpm, msg in args.beacons:
+    channels[pin] = bank.channel(LED(pin), morsecode.unit(wpm or args.wpm))
+    channels[pin].beacon(msg)
+  bank.start()
+  try:
+    if args.stdin:
+      for line in sys.stdin:
+        pin, sep, msg = line.strip().partition(" ")
+        if not pin.isdigit():
+          print("Not a pin: " + pin)
+          continue
+        pin = int(pin)
+        if pin not in channels:
+          channels[pin] = bank.channel(LED(pin), morsecode.unit(args.wpm))
+        channels[pin].send(msg)
+      if not args.beacons:
+        while not bank.idle():
+          time.sleep(0.1)
+        return
+    bank.thread.join()
+  finally:
+    bank.stop()
+
+# Executes the main function
+if __name__ == '__main__':
+  try:
+    main()
+  except KeyboardInterrupt:
+    pass
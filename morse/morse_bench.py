@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+#
+# morse_bench.py: Measure Morse keying jitter against a simulated pin
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Usage: ./morse_bench.py [--words N] [--wpm WPM ...] [--call-cost SECONDS] [timeline|stream|bank|decode]
+
+import argparse
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+import morsecode
+import morsestream
+import morsebank
+import morsedecode
+
+# Roughly what one gpiozero on() or off() costs on a Pi 3
+CALL_COST = 0.00005
+
+# Stands in for a gpiozero LED: notes the time of every edge, and takes
+# call_cost seconds to do it
+class SimulatedPin:
+  def __init__(self, call_cost=0.0):
+    self.call_cost = call_cost
+    self.edges = []
+    self.level = 0
+    self.stop = threading.Event()
+
+  def set(self, level):
+    end = time.monotonic() + self.call_cost
+    while time.monotonic() < end:
+      pass
+    if level != self.level:
+      self.edges.append((time.monotonic(), level))
+      self.level = level
+
+  def on(self):
+    self.set(1)
+
+  def off(self):
+    self.set(0)
+
+  # What gpiozero's blink(on_time, off_time, 1, False) does: stop any
+  # blink thread, start one of its own to turn the pin on, wait, turn it
+  # off, wait, and then join it
+  def blink(self, on_time, off_time, n=1, background=True):
+    def blinker():
+      for i in range(n):
+        self.on()
+        if self.stop.wait(on_time):
+          break
+        self.off()
+        if self.stop.wait(off_time):
+          break
+    self.stop.set()
+    self.stop = threading.Event()
+    thread = threading.Thread(target=blinker)
+    thread.start()
+    if not background:
+      thread.join()
+
+# The original morsify(), with the original timing: element gaps and
+# letter gaps slept separately, and 6 more units for a word
+def legacy_morsify(out, msg, pulse):
+  for symbol in msg.upper():
+    if symbol == ' ':
+      time.sleep(pulse * 6)
+      continue
+    if symbol not in morsecode.MORSE_CODE_CHARS:
+      continue
+    for d in morsecode.MORSE_CODE_DICT[symbol]:
+      if d == '.':
+        out.blink(pulse, pulse, 1, False)
+      if d == '-':
+        out.blink(pulse * 3, pulse, 1, False)
+    time.sleep(pulse * 2)
+
+# The timeline legacy_morsify() was meant to key
+def legacy_timeline(msg):
+  timeline = []
+  for symbol in msg.upper():
+    if symbol == ' ':
+      morsecode.extend(timeline, 0, 6)
+      continue
+    for d in morsecode.MORSE_CODE_DICT[symbol]:
+      morsecode.extend(timeline, 1, 1 if d == '.' else 3)
+      morsecode.extend(timeline, 0, 1)
+    morsecode.extend(timeline, 0, 2)
+  return timeline
+
+# How far each edge was from where the timeline put it, in seconds,
+# counting from the first. Every entry in a timeline starts with an edge.
+def errors(pin, timeline, unit):
+  if [level for t, level in pin.edges] != [level for level, units in timeline]:
+    print("MISMATCH: the pin went through the wrong levels")
+    exit(1)
+  errs = []
+  due = pin.edges[0][0]
+  for (t, level), (level, units) in zip(pin.edges, timeline):
+    errs.append(t - due)
+    due += units * unit
+  return errs
+
+def report(name, unit, errs):
+  errs = [abs(e) for e in errs]
+  print(format(name, "8s") + ": " + format(1000 * max(errs), "7.3f") + "ms max, "
+        + format(1000 * sum(errs) / len(errs), "7.3f") + "ms mean, "
+        + format(1000 * errs[-1], "8.3f") + "ms drift by the last edge, "
+        + format(100 * max(errs) / unit, "5.1f") + "% of a unit")
+
+# "PARIS " --words times at each --wpm, keyed the original way and from
+# a timeline, edge times compared against the timeline each was keying
+def bench_timeline(args):
+  msg = " ".join(["PARIS"] * args.words)
+  timeline = morsecode.compile_timeline(msg + " ")
+  if sum(units for level, units in timeline) != 50 * args.words:
+    print("MISMATCH: PARIS is not 50 units")
+    exit(1)
+  for a, b in zip(timeline, timeline[1:]):
+    if a[0] == b[0]:
+      print("MISMATCH: two runs of the same level in a row")
+      exit(1)
+
+  for wpm in args.wpm:
+    unit = morsecode.unit(wpm)
+    print(str(wpm) + " WPM, " + format(1000 * unit, ".1f") + "ms unit, "
+          + str(len(timeline)) + " edges")
+
+    pin = SimulatedPin(args.call_cost)
+    legacy_morsify(pin, msg, unit)
+    report("before", unit, errors(pin, legacy_timeline(msg), unit))
+
+    pin = SimulatedPin(args.call_cost)
+    morsecode.play(timeline, unit, pin)
+    errs = errors(pin, timeline, unit)
+    report("after", unit, errs)
+    # A late wakeup now and then is the scheduler, but it mustn't add up
+    if abs(errs[-1]) > unit / 10 or sum(abs(e) for e in errs) / len(errs) > unit / 20:
+      print("MISMATCH: the timing drifted")
+      exit(1)
+
+# --producers writers each sending --lines alerts as fast as they can
+# to a Stream's socket, at 4000 WPM so that it doesn't take all day.
+# The original morse_led.py read one line and played it before reading
+# the next, so once the pipe filled up, writers waited on the LED.
+def bench_stream(args):
+  unit = morsecode.unit(4000)
+  sent = args.producers * args.lines
+  for drop_oldest in (False, True):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = os.path.join(tmp, "morse.sock")
+      stream = morsestream.Stream(SimulatedPin(), unit, args.queue, drop_oldest)
+      stream.socket(path)
+      reader = threading.Thread(target=stream.run)
+      reader.start()
+      times = []
+
+      def producer(n):
+        start = time.monotonic()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+          conn.connect(path)
+          for i in range(args.lines):
+            conn.sendall(("ALERT " + str(n) + " " + str(i) + "\n").encode())
+        times.append(time.monotonic() - start)
+
+      start = time.monotonic()
+      producers = [threading.Thread(target=producer, args=(n,)) for n in range(args.producers)]
+      for thread in producers:
+        thread.start()
+      for thread in producers:
+        thread.join()
+      written = time.monotonic() - start
+      stream.stop()
+      reader.join()
+      elapsed = time.monotonic() - start
+
+    stats = stream.stats()
+    print(format("drop-oldest" if drop_oldest else "block", "11s") + ": "
+          + format(sent / written, "8.0f") + " lines/s written, slowest writer "
+          + format(1000 * max(times), "6.1f") + "ms, "
+          + str(stats["played"]) + " played, " + str(stats["dropped"]) + " dropped, deepest "
+          + str(stats["deepest"]) + ", " + format(elapsed, ".1f") + "s to play")
+    if stats["lines_in"] != sent or stats["played"] + stats["dropped"] != sent:
+      print("MISMATCH: lines went missing")
+      exit(1)
+    if not drop_oldest and stats["dropped"]:
+      print("MISMATCH: lines dropped while blocking")
+      exit(1)
+    if stats["deepest"] > args.queue:
+      print("MISMATCH: the queue grew past its limit")
+      exit(1)
+
+# --channels pins from 20 WPM up in steps of 4, each keying "PARIS"
+# twice, from a thread per pin running morsecode.play() and then from
+# one Bank
+def bench_bank(args):
+  msg = "PARIS PARIS"
+  timeline = morsecode.compile_timeline(msg + " ")
+  units = [morsecode.unit(20 + 4 * n) for n in range(args.channels)]
+
+  pins = [SimulatedPin(args.call_cost) for unit in units]
+  threads = [threading.Thread(target=morsecode.play, args=(timeline, unit, pin))
+             for unit, pin in zip(units, pins)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  report_bank("threads", pins, units, timeline, len(threads))
+
+  pins = [SimulatedPin(args.call_cost) for unit in units]
+  bank = morsebank.Bank()
+  channels = [bank.channel(pin, unit) for unit, pin in zip(units, pins)]
+  bank.start()
+  for channel in channels:
+    channel.send(msg)
+  while not bank.idle():
+    time.sleep(0.01)
+  bank.stop()
+  report_bank("bank", pins, units, timeline, 1)
+  if bank.stats()["played"] != len(channels):
+    print("MISMATCH: not every channel played its message")
+    exit(1)
+
+# A bank starts a channel when its thread next wakes, a little after
+# send(), so each pin's errors are taken from its median: a late start
+# isn't jitter
+def report_bank(name, pins, units, timeline, threads):
+  errs = []
+  for pin, unit in zip(pins, units):
+    pin_errs = errors(pin, timeline, unit)
+    start = sorted(pin_errs)[len(pin_errs) // 2]
+    errs.extend(abs(e - start) for e in pin_errs)
+  print(format(name, "8s") + ": " + str(len(pins)) + " pins, " + str(threads) + " threads, "
+        + format(1000 * max(errs), "7.3f") + "ms max, "
+        + format(1000 * sum(errs) / len(errs), "7.3f") + "ms mean")
+
+# --symbols random characters in words of 1 to 8, as edges, speeding up
+# from 15 to 45 WPM along the way and every edge off by up to 8% of a
+# unit, decoded with no speed given. Then "PARIS PARIS" keyed at 60 WPM
+# onto a simulated pin and decoded from the edges it saw.
+def bench_decode(args):
+  rng = random.Random(1)
+  chars = sorted(morsecode.MORSE_CODE_DICT)
+  words = []
+  count = 0
+  while count < args.symbols:
+    words.append("".join(rng.choice(chars) for n in range(rng.randint(1, 8))))
+    count += len(words[-1])
+  msg = " ".join(words)
+  timeline = morsecode.compile_timeline(msg)
+  edges = []
+  t = 0.0
+  for n, (level, units) in enumerate(timeline):
+    unit = morsecode.unit(15 + 30 * n / len(timeline))
+    edges.append((t + rng.uniform(-0.08, 0.08) * unit, level))
+    t += units * unit
+
+  decoder = morsedecode.Decoder()
+  start = time.perf_counter()
+  for t, level in edges:
+    decoder.edge(t, level)
+  decoder.flush()
+  elapsed = time.perf_counter() - start
+  text = decoder.result().strip()
+  wrong = sum(1 for a, b in zip(text, msg) if a != b) + abs(len(text) - len(msg))
+  print("decode  : " + format(len(msg) / elapsed, "8.0f") + " characters/s, "
+        + format(decoder.elements / elapsed, "8.0f") + " elements/s, "
+        + str(wrong) + " of " + str(len(msg)) + " wrong, unit at the end "
+        + format(1000 * decoder.unit, ".1f") + "ms (" + format(1.2 / decoder.unit, ".1f") + " WPM)")
+  if wrong:
+    print("MISMATCH: decoded " + text[:60] + " for " + msg[:60])
+    exit(1)
+
+  pin = SimulatedPin(args.call_cost)
+  morsecode.play(morsecode.compile_timeline("PARIS PARIS "), morsecode.unit(60), pin)
+  text = morsedecode.decode_edges(pin.edges)
+  print("loopback: " + repr(text) + " from a pin keyed at 60 WPM")
+  if text != "PARIS PARIS":
+    print("MISMATCH: the loopback decoded wrong")
+    exit(1)
+
+def main():
+  parser = argparse.ArgumentParser(description="Morse keying jitter benchmark")
+  parser.add_argument("bench", nargs="?", default="timeline", choices=["timeline", "stream", "bank", "decode"])
+  parser.add_argument("--words", type=int, default=2, help="PARIS this many times")
+  parser.add_argument("--wpm", type=float, nargs="+", default=[40, 60], help="speeds to try")
+  parser.add_argument("--call-cost", type=float, default=CALL_COST,
+                      help="simulated cost of one on() or off() call in seconds")
+  parser.add_argument("--producers", type=int, default=8, help="writers to the stream")
+  parser.add_argument("--lines", type=int, default=10, help="lines each writer sends")
+  parser.add_argument("--queue", type=int, default=morsestream.QUEUE, help="stream queue length")
+  parser.add_argument("--channels", type=int, default=32, help="pins for the bank")
+  parser.add_argument("--symbols", type=int, default=5000, help="characters to decode")
+  args = parser.parse_args()
+  if args.bench == "timeline":
+    bench_timeline(args)
+  elif args.bench == "stream":
+    bench_stream(args)
+  elif args.bench == "bank":
+    bench_bank(args)
+  else:
+    bench_decode(args)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+#
+# A script to decode morse code, from a GPIO pin or from edge logs.
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Usage: ./morse_decode.py [--wpm WPM] [--pin PIN [--record LOG]] [LOG ...]
+#
+# An edge log has a line per edge, the time in seconds and the level:
+#   0.000000 1
+#   0.100000 0
+# With --pin, --record writes one of what comes in on the pin.
+
+import argparse
+import sys
+import threading
+import time
+import morsecode
+import morsedecode
+
+# How often to check for the end of a word, listening to a pin
+POLL=0.05
+
+def listen(pin, unit, record):
+  from gpiozero import DigitalInputDevice
+  decoder = morsedecode.Decoder(unit)
+  lock = threading.Lock()
+
+  def edge(level):
+    t = time.monotonic()
+    with lock:
+      decoder.edge(t, level)
+    if record:
+      morsedecode.write_edge(record, t, level)
+
+  device = DigitalInputDevice(pin)
+  device.when_activated = lambda: edge(1)
+  device.when_deactivated = lambda: edge(0)
+  shown = 0
+  try:
+    while True:
+      time.sleep(POLL)
+      with lock:
+        decoder.idle(time.monotonic())
+        text = decoder.result()
+      sys.stdout.write(text[shown:])
+      sys.stdout.flush()
+      shown = len(text)
+  finally:
+    decoder.flush()
+    print(decoder.result()[shown:])
+
+def main():
+  parser = argparse.ArgumentParser(description="Decode morse code")
+  parser.add_argument("--wpm", type=float,
+                      help="the speed to expect to begin with, rather than working it out")
+  parser.add_argument("--pin", type=int, help="listen to this GPIO pin")
+  parser.add_argument("--record", type=argparse.FileType("w"), metavar="LOG",
+                      help="with --pin, write the edges to this log")
+  parser.add_argument("logs", nargs="*", type=argparse.FileType("r"), metavar="LOG",
+                      help="edge logs to decode")
+  args = parser.parse_args()
+  unit = morsecode.unit(args.wpm) if args.wpm else None
+  if args.pin is not None:
+    listen(args.pin, unit, args.record)
+    return
+  for log in args.logs or [sys.stdin]:
+    print(morsedecode.decode_edges(morsedecode.read_log(log), unit))
+
+# Executes the main function
+if __name__ == '__main__':
+  try:
+    main()
+  except KeyboardInterrupt:
+    pass
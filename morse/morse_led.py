@@ -1,4 +1,4 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 #
 # A script to blink morse code to a LED on a GPIO pin.
 #
@@ -19,7 +19,9 @@
 #
 
 from gpiozero import LED
-import time
+import argparse
+import morsecode
+import morsestream
 import fileinput
 
 #########
@@ -31,6 +33,9 @@ import fileinput
 # The duration of the gap between letters in a word is three time units.
 # The duration of the gap between words is seven time units.
 #
+# morsecode.py compiles each message into a timeline and plays it to
+# the clock, so the timing holds at 40 WPM and beyond.
+#
 # https://gpiozero.readthedocs.io/en/stable/api_output.html
 # https://www.geeksforgeeks.org/morse-code-translator-python/
 
@@ -39,56 +44,31 @@ import fileinput
 #########
 # Set this to the correct GPIO pin for your setup
 PIN=15
-# Set this to your desired time unit length in seconds
+# Set this to your desired time unit length in seconds, or use --wpm
 PULSE=0.1
-# These are derived from that
-DOT=PULSE
-DASH=PULSE*3
-# We reduce these delays by one unit, because each . or - being
-# output will also be followed by a one unit delay in the loop
-LETTER=PULSE*2
-WORD=PULSE*6
 
 out = LED(PIN)
 
-# Dictionary representing the morse code chart
-# Expand as desired
-MORSE_CODE_DICT = { 'A':'.-', 'B':'-...',
-                    'C':'-.-.', 'D':'-..', 'E':'.',
-                    'F':'..-.', 'G':'--.', 'H':'....',
-                    'I':'..', 'J':'.---', 'K':'-.-',
-                    'L':'.-..', 'M':'--', 'N':'-.',
-                    'O':'---', 'P':'.--.', 'Q':'--.-',
-                    'R':'.-.', 'S':'...', 'T':'-',
-                    'U':'..-', 'V':'...-', 'W':'.--',
-                    'X':'-..-', 'Y':'-.--', 'Z':'--..',
-                    '1':'.----', '2':'..---', '3':'...--',
-                    '4':'....-', '5':'.....', '6':'-....',
-                    '7':'--...', '8':'---..', '9':'----.',
-                    '0':'-----', ',':'--..--', '.':'.-.-.-',
-                    '?':'..--..', '/':'-..-.', '-':'-....-',
-                    '(':'-.--.', ')':'-.--.-'}
-MORSE_CODE_CHARS = MORSE_CODE_DICT.keys()
-
-def morsify(msg):
-  for symbol in msg.upper():
-    if symbol == ' ':
-      time.sleep(WORD)
-      continue
-    if symbol not in MORSE_CODE_CHARS:
-      print("Unrecognized character: " + symbol)
-      continue
-    for d in MORSE_CODE_DICT[symbol]:
-      if d == '.':
-        out.blink(DOT, PULSE, 1, False)
-      if d == '-':
-        out.blink(DASH, PULSE, 1, False)
-    time.sleep(LETTER)
+def morsify(msg, pulse=PULSE):
+  morsecode.play(morsecode.compile_timeline(msg), pulse, out)
 
 def main():
-  for line in fileinput.input():
-    morsify(line)
+  parser = argparse.ArgumentParser(description="Blink morse code to a LED")
+  parser.add_argument("--wpm", type=float, help="words per minute, instead of PULSE")
+  parser.add_argument("files", nargs="*", help="files to read, stdin if none")
+  morsestream.add_arguments(parser)
+  args = parser.parse_args()
+  pulse = morsecode.unit(args.wpm) if args.wpm else PULSE
+  stream = morsestream.from_args(args, out, pulse)
+  if stream:
+    stream.run(args.stats)
+    return
+  for line in fileinput.input(args.files):
+    morsify(line, pulse)
 
 # Executes the main function
 if __name__ == '__main__':
-  main()
+  try:
+    main()
+  except KeyboardInterrupt:
+    pass
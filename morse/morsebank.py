@@ -0,0 +1,192 @@
+# morsebank.py: Morse on many pins at once, from one timing thread
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# A Bank drives any number of channels, each an output pin with its own
+# queue of messages and its own speed. Every channel's next edge sits in
+# one heap, by deadline, and a single thread sleeps until the soonest is
+# due, sets that pin and puts the channel's following edge back on the
+# heap. Deadlines run on from one edge to the next, as in
+# morsecode.play(), so no channel drifts however many there are.
+#
+# A channel can be given a beacon, a message it repeats whenever its
+# queue is empty.
+#
+#   bank = Bank()
+#   power = bank.channel(LED(15), morsecode.unit(20))
+#   disk = bank.channel(LED(16), morsecode.unit(12))
+#   power.beacon("OK")
+#   bank.start()
+#   disk.send("FULL")
+
+import heapq
+import threading
+import time
+from collections import deque
+import morsecode
+
+# Messages held waiting on each channel; past this the oldest is dropped
+QUEUE = 16
+
+class Channel:
+  def __init__(self, bank, out, unit, size=QUEUE):
+    self.bank = bank
+    self.on, self.off = out.on, out.off
+    self.unit = unit
+    self.queue = deque()
+    self.size = size
+    self.repeat = None
+    # The timeline being played, and the next entry in it
+    self.timeline = None
+    self.pos = 0
+    # Whether the channel's next edge is on the heap
+    self.busy = False
+    # Counters
+    self.sent = 0
+    self.played = 0
+    self.dropped = 0
+
+  # Queue a message, to be played after those already queued
+  def send(self, msg):
+    timeline = morsecode.compile_timeline(msg + " ")
+    with self.bank.cond:
+      if len(self.queue) >= self.size:
+        self.queue.popleft()
+        self.dropped += 1
+      self.queue.append(timeline)
+      self.sent += 1
+      self.bank.wake(self)
+
+  # Repeat msg whenever there is nothing else to play, None to stop
+  def beacon(self, msg):
+    timeline = morsecode.compile_timeline(msg + " ") if msg else None
+    with self.bank.cond:
+      self.repeat = timeline
+      if timeline:
+        self.bank.wake(self)
+
+  # The next timeline to play, if there is one
+  def next(self):
+    if self.queue:
+      return self.queue.popleft()
+    return self.repeat
+
+  def stats(self):
+    return {"sent": self.sent, "played": self.played, "dropped": self.dropped,
+            "queued": len(self.queue)}
+
+class Bank:
+  def __init__(self):
+    self.channels = []
+    self.heap = []
+    self.cond = threading.Condition()
+    self.stopping = False
+    self.thread = None
+    # Heap entries are (deadline, seq, channel), seq breaking ties
+    self.seq = 0
+    # Counters
+    self.edges = 0
+    self.late = 0.0
+
+  def channel(self, out, unit, size=QUEUE):
+    channel = Channel(self, out, unit, size)
+    self.channels.append(channel)
+    return channel
+
+  # Put an idle channel on the heap, starting now. Called holding cond.
+  def wake(self, channel):
+    if channel.busy:
+      return
+    channel.busy = True
+    self.push(time.monotonic(), channel)
+    self.cond.notify()
+
+  def push(self, deadline, channel):
+    self.seq += 1
+    heapq.heappush(self.heap, (deadline, self.seq, channel))
+
+  # Set a channel's pin for the edge due at deadline, and put its next
+  # one on the heap. Called holding cond.
+  def fire(self, deadline, channel):
+    if channel.timeline is None or channel.pos == len(channel.timeline):
+      if channel.timeline is not None:
+        channel.played += 1
+      channel.timeline = channel.next()
+      channel.pos = 0
+      if channel.timeline is None:
+        # Every timeline ends off, so the pin is already off
+        channel.busy = False
+        return
+    level, units = channel.timeline[channel.pos]
+    channel.pos += 1
+    if level:
+      channel.on()
+    else:
+      channel.off()
+    self.edges += 1
+    self.push(deadline + units * channel.unit, channel)
+
+  # Play until stop(). Sleeps on cond until the soonest edge is nearly
+  # due, then spins for the rest without holding it.
+  def run(self):
+    heap = self.heap
+    while True:
+      with self.cond:
+        while not self.stopping:
+          if not heap:
+            self.cond.wait()
+            continue
+          wait = heap[0][0] - time.monotonic() - morsecode.SPIN
+          if wait <= 0:
+            break
+          self.cond.wait(wait)
+        if self.stopping:
+          break
+        deadline = heap[0][0]
+      morsecode.wait_until(deadline)
+      with self.cond:
+        now = time.monotonic()
+        while heap and heap[0][0] <= now:
+          deadline, seq, channel = heapq.heappop(heap)
+          self.late = max(self.late, now - deadline)
+          self.fire(deadline, channel)
+    for channel in self.channels:
+      channel.off()
+
+  # Play on a thread of its own
+  def start(self):
+    self.thread = threading.Thread(target=self.run, daemon=True)
+    self.thread.start()
+
+  def stop(self):
+    with self.cond:
+      self.stopping = True
+      self.cond.notify()
+    if self.thread:
+      self.thread.join()
+
+  # Whether every channel has played everything sent to it. Beacons
+  # never finish.
+  def idle(self):
+    with self.cond:
+      return not self.heap
+
+  def stats(self):
+    return {"channels": len(self.channels), "edges": self.edges, "late": self.late,
+            "sent": sum(c.sent for c in self.channels),
+            "played": sum(c.played for c in self.channels),
+            "dropped": sum(c.dropped for c in self.channels)}
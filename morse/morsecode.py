@@ -0,0 +1,120 @@
+# morsecode.py: Morse code compiled to timelines and played to the clock
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# A message is compiled once into a timeline: a flat list of
+# (level, units), 1 for on and 0 for off, with runs of the same level
+# merged so that every entry is one edge. The timeline is in units, so
+# it can be played at any speed.
+#
+# play() works out when every edge is due from the time it started, and
+# waits for that deadline, rather than sleeping for each element in
+# turn. Time lost to a slow on() or a late wakeup is made up on the next
+# wait instead of being added to everything after it.
+
+import time
+
+#########
+# NOTES #
+#########
+# The duration of a Dot is considered one time unit.
+# The duration of a Dash is three time units.
+# The duration of the gap between elemnts of a letter is one time unit.
+# The duration of the gap between letters in a word is three time units.
+# The duration of the gap between words is seven time units.
+DOT = 1
+DASH = 3
+GAP = 1
+LETTER = 3
+WORD = 7
+
+# Dictionary representing the morse code chart
+# Expand as desired
+MORSE_CODE_DICT = { 'A':'.-', 'B':'-...',
+                    'C':'-.-.', 'D':'-..', 'E':'.',
+                    'F':'..-.', 'G':'--.', 'H':'....',
+                    'I':'..', 'J':'.---', 'K':'-.-',
+                    'L':'.-..', 'M':'--', 'N':'-.',
+                    'O':'---', 'P':'.--.', 'Q':'--.-',
+                    'R':'.-.', 'S':'...', 'T':'-',
+                    'U':'..-', 'V':'...-', 'W':'.--',
+                    'X':'-..-', 'Y':'-.--', 'Z':'--..',
+                    '1':'.----', '2':'..---', '3':'...--',
+                    '4':'....-', '5':'.....', '6':'-....',
+                    '7':'--...', '8':'---..', '9':'----.',
+                    '0':'-----', ',':'--..--', '.':'.-.-.-',
+                    '?':'..--..', '/':'-..-.', '-':'-....-',
+                    '(':'-.--.', ')':'-.--.-'}
+MORSE_CODE_CHARS = MORSE_CODE_DICT.keys()
+
+# Spin on the clock for the last part of each wait, since time.sleep()
+# can wake up a millisecond or more late
+SPIN = 0.002
+
+# Seconds per unit at wpm words per minute, going by "PARIS ", which is
+# 50 units long
+def unit(wpm):
+  return 1.2 / wpm
+
+# Add an edge to a timeline, or lengthen the last one if it is already
+# at that level
+def extend(timeline, level, units):
+  if timeline and timeline[-1][0] == level:
+    timeline[-1] = (level, timeline[-1][1] + units)
+  else:
+    timeline.append((level, units))
+
+# The timeline for msg. Every letter is followed by its letter gap, so
+# timelines can be played one after another. Whitespace is a word gap.
+def compile_timeline(msg, timeline=None):
+  if timeline is None:
+    timeline = []
+  for symbol in msg.upper():
+    if symbol.isspace():
+      extend(timeline, 0, WORD - LETTER)
+      continue
+    if symbol not in MORSE_CODE_CHARS:
+      print("Unrecognized character: " + symbol)
+      continue
+    for d in MORSE_CODE_DICT[symbol]:
+      extend(timeline, 1, DOT if d == '.' else DASH)
+      extend(timeline, 0, GAP)
+    extend(timeline, 0, LETTER - GAP)
+  return timeline
+
+# Wait until deadline on the time.monotonic() clock
+def wait_until(deadline):
+  wait = deadline - time.monotonic() - SPIN
+  if wait > 0:
+    time.sleep(wait)
+  while time.monotonic() < deadline:
+    pass
+
+# Play a timeline on out, anything with on() and off() (gpiozero's LED
+# and Buzzer both do), at unit seconds per unit. Returns once the
+# timeline, gaps and all, has been played.
+def play(timeline, unit, out):
+  on, off = out.on, out.off
+  deadline = time.monotonic()
+  for level, units in timeline:
+    wait_until(deadline)
+    if level:
+      on()
+    else:
+      off()
+    deadline += units * unit
+  wait_until(deadline)
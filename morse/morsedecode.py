@@ -0,0 +1,191 @@
+# morsedecode.py: Morse code from edge timings back to text
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# MORSE_CODE_DICT is turned into a binary trie, stored the way a heap
+# is: node 1 is the root, a dot from node n goes to 2n and a dash to
+# 2n + 1. Decoding a letter is a walk down from the root, one shift and
+# add per element, and TREE[node] is the character.
+#
+# The length of a unit isn't fixed in advance, but estimated from what
+# comes in: dots and the gaps inside a letter are one unit, dashes and
+# the gaps between letters three. Each is folded into a moving average,
+# so the decoder follows a sender that speeds up or slows down. Marks
+# are held until the end of their letter and classified then, with
+# everything the letter said about the unit.
+#
+# Until there is an estimate (or one is given), marks and gaps are held
+# back until one is at least twice as long as another. The shortest is
+# then taken to be a unit, and what was held is decoded with that. A
+# message with nothing shorter than three units (TT TT) can't be told
+# from one with nothing longer than one (II), and is read as dots.
+
+import morsecode
+
+# Characters the trie doesn't hold come out as this
+UNKNOWN = "*"
+
+# How far each new timing moves the unit estimate
+ALPHA = 0.2
+
+def node(code):
+  n = 1
+  for d in code:
+    n = n * 2 + (d == '-')
+  return n
+
+TREE = [None] * (2 << max(len(code) for code in morsecode.MORSE_CODE_DICT.values()))
+for char, code in morsecode.MORSE_CODE_DICT.items():
+  TREE[node(code)] = char
+
+class Decoder:
+  # unit, in whatever the durations are in, if known
+  def __init__(self, unit=None):
+    self.unit = unit
+    self.marks = []
+    self.text = []
+    # (level, duration) held back while there is no estimate
+    self.held = []
+    # For edge()
+    self.last = None
+    self.level = 0
+    # Counters
+    self.elements = 0
+    self.unknown = 0
+
+  def learn(self, duration, units):
+    self.unit += (duration / units - self.unit) * ALPHA
+
+  # The pin was on for duration
+  def mark(self, duration):
+    if self.unit is None:
+      self.hold(1, duration)
+      return
+    self.marks.append(duration)
+
+  # The pin was off for duration
+  def space(self, duration):
+    if self.unit is None:
+      if self.held:
+        self.hold(0, duration)
+      return
+    if not self.marks:
+      return
+    if duration < 2 * self.unit:
+      self.learn(duration, morsecode.GAP)
+      return
+    word = duration >= 5 * self.unit
+    if not word:
+      self.learn(duration, morsecode.LETTER)
+    self.letter()
+    if word:
+      self.text.append(" ")
+
+  def hold(self, level, duration):
+    self.held.append((level, duration))
+    shortest = min(d for l, d in self.held)
+    if max(d for l, d in self.held) < 2 * shortest:
+      return
+    self.start(shortest)
+
+  # Start with a unit estimate, and decode what was held back
+  def start(self, unit):
+    self.unit = unit
+    held, self.held = self.held, []
+    for level, duration in held:
+      if level:
+        self.mark(duration)
+      else:
+        self.space(duration)
+
+  # Decode the marks held for the letter just ended
+  def letter(self):
+    if not self.marks:
+      return
+    n = 1
+    for duration in self.marks:
+      dash = duration >= 2 * self.unit
+      n = n * 2 + dash
+      self.learn(duration, morsecode.DASH if dash else morsecode.DOT)
+    self.elements += len(self.marks)
+    self.marks = []
+    char = TREE[n] if n < len(TREE) else None
+    if char is None:
+      char = UNKNOWN
+      self.unknown += 1
+    self.text.append(char)
+
+  # The pin went to level at time t
+  def edge(self, t, level):
+    if level == self.level:
+      return
+    if self.last is not None:
+      if self.level:
+        self.mark(t - self.last)
+      else:
+        self.space(t - self.last)
+    self.last = t
+    self.level = level
+
+  # Called now and then while waiting on a pin, so that the last word
+  # is decoded once the gap after it is long enough, rather than when
+  # the next one starts
+  def idle(self, t):
+    if self.level or not self.marks or self.unit is None:
+      return
+    if t - self.last >= 5 * self.unit:
+      self.space(t - self.last)
+
+  # Decode whatever is held, at the end of a message. If nothing ever
+  # told a unit from three, it was all dots.
+  def flush(self):
+    if self.unit is None and self.held:
+      self.start(min(d for l, d in self.held))
+    self.letter()
+
+  def result(self):
+    return "".join(self.text)
+
+# Decode a timeline from morsecode.compile_timeline()
+def decode_timeline(timeline, unit=None):
+  decoder = Decoder(unit)
+  for level, units in timeline:
+    if level:
+      decoder.mark(units)
+    else:
+      decoder.space(units)
+  decoder.flush()
+  return decoder.result()
+
+# Decode (t, level) edges, as from read_log() or a pin
+def decode_edges(edges, unit=None):
+  decoder = Decoder(unit)
+  for t, level in edges:
+    decoder.edge(t, level)
+  decoder.flush()
+  return decoder.result()
+
+# An edge log has one edge per line: the time in seconds and the level
+# it went to, such as "12.034 1"
+def read_log(f):
+  for line in f:
+    fields = line.split()
+    if len(fields) == 2:
+      yield float(fields[0]), int(fields[1])
+
+def write_edge(f, t, level):
+  f.write(format(t, ".6f") + " " + str(level) + "\n")
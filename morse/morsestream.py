@@ -0,0 +1,307 @@
+# morsestream.py: Key Morse from a FIFO, a Unix socket or stdin, as it comes
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# Three threads, so that nothing writing to us waits on the LED:
+#   reader   reads lines from every source with selectors, into a
+#            bounded queue of text
+#   encoder  compiles each line into a timeline (see morsecode.py)
+#   player   plays the timelines
+#
+# When the queue is full, the reader either waits for room, which stops
+# it reading, and so writers block once the pipe or socket buffer fills
+# (backpressure), or drops the oldest line to make room (drop_oldest).
+#
+# A FIFO is opened read/write, so it doesn't hit EOF every time the last
+# writer closes it. Any number of writers can connect to the socket at
+# once, each sending lines of text.
+#
+#   stream = Stream(LED(15), morsecode.unit(20))
+#   stream.fifo("/run/morse")
+#   stream.socket("/run/morse.sock")
+#   stream.run()
+
+import os
+import selectors
+import socket
+import sys
+import threading
+import time
+from collections import deque
+import morsecode
+
+# Lines held waiting to be played
+QUEUE = 64
+
+# Read this much at a time
+CHUNK = 4096
+
+# A line longer than this is cut into pieces of this size
+LINE = 1024
+
+# A deque with a limit, that either blocks or drops the oldest item when
+# full. get() returns None once closed and empty.
+class Queue:
+  def __init__(self, size=QUEUE, drop_oldest=False):
+    self.size = size
+    self.drop_oldest = drop_oldest
+    self.items = deque()
+    self.cond = threading.Condition()
+    self.closed = False
+    # Counters
+    self.dropped = 0
+    self.deepest = 0
+
+  def put(self, item):
+    with self.cond:
+      if self.drop_oldest:
+        if len(self.items) >= self.size:
+          self.items.popleft()
+          self.dropped += 1
+      else:
+        while len(self.items) >= self.size and not self.closed:
+          self.cond.wait()
+      self.items.append(item)
+      self.deepest = max(self.deepest, len(self.items))
+      self.cond.notify_all()
+
+  def get(self):
+    with self.cond:
+      while not self.items and not self.closed:
+        self.cond.wait()
+      if not self.items:
+        return None
+      item = self.items.popleft()
+      self.cond.notify_all()
+      return item
+
+  def close(self):
+    with self.cond:
+      self.closed = True
+      self.cond.notify_all()
+
+  def __len__(self):
+    return len(self.items)
+
+class Stream:
+  # out is anything with on() and off(), unit the seconds per unit
+  def __init__(self, out, unit, size=QUEUE, drop_oldest=False):
+    self.out = out
+    self.unit = unit
+    self.queue = Queue(size, drop_oldest)
+    # The encoder stays at most a couple of timelines ahead of the player
+    self.timelines = Queue(2)
+    self.selector = selectors.DefaultSelector()
+    # Partial lines, by file descriptor
+    self.partial = {}
+    self.sources = 0
+    self.listeners = []
+    self.fifos = []
+    # stop() writes to this to wake the reader
+    wake, self.wake = os.pipe()
+    self.selector.register(wake, selectors.EVENT_READ, self.stopped)
+    # Counters
+    self.started = time.monotonic()
+    self.lines_in = 0
+    self.bytes_in = 0
+    self.encoded = 0
+    self.played = 0
+    self.units = 0
+
+  # Read lines from an open file (such as sys.stdin) until it ends
+  def file(self, f):
+    self.add(f.fileno(), self.read)
+
+  # Read lines from a FIFO, made if it isn't there
+  def fifo(self, path):
+    if not os.path.exists(path):
+      os.mkfifo(path)
+    fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+    self.fifos.append(fd)
+    self.add(fd, self.read)
+
+  # Take connections on a Unix socket, and read lines from each
+  def socket(self, path):
+    if os.path.exists(path):
+      os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    listener.setblocking(False)
+    self.listeners.append((listener, path))
+    self.selector.register(listener, selectors.EVENT_READ, self.accept)
+
+  def add(self, fd, callback):
+    os.set_blocking(fd, False)
+    self.partial[fd] = b""
+    self.sources += 1
+    self.selector.register(fd, selectors.EVENT_READ, callback)
+
+  def accept(self, listener):
+    conn, addr = listener.accept()
+    # Kept in the selector's key, and closed on EOF
+    self.add(conn.detach(), self.read)
+
+  # Returns how much was read, 0 if there was nothing to read
+  def read(self, fd):
+    try:
+      data = os.read(fd, CHUNK)
+    except BlockingIOError:
+      return 0
+    except OSError:
+      data = b""
+    if not data:
+      self.end(fd)
+      return 0
+    self.bytes_in += len(data)
+    lines = (self.partial[fd] + data).split(b"\n")
+    rest = lines.pop()
+    for line in lines:
+      self.line(line)
+    while len(rest) > LINE:
+      self.line(rest[:LINE])
+      rest = rest[LINE:]
+    self.partial[fd] = rest
+    return len(data)
+
+  def end(self, fd):
+    self.selector.unregister(fd)
+    os.close(fd)
+    self.sources -= 1
+    rest = self.partial.pop(fd)
+    if rest:
+      self.line(rest)
+
+  # Stop taking connections and close any FIFOs, once what is in them
+  # has been read. run() returns once the connections already made, and
+  # stdin, have ended and everything has been played.
+  def stop(self):
+    os.write(self.wake, b"\0")
+
+  def stopped(self, fd):
+    os.read(fd, CHUNK)
+    # Take any connections still waiting to be accepted
+    for listener, path in self.listeners:
+      while True:
+        try:
+          self.accept(listener)
+        except BlockingIOError:
+          break
+    self.close_listeners()
+    for fd in self.fifos:
+      while self.read(fd):
+        pass
+      self.end(fd)
+    self.fifos = []
+
+  def close_listeners(self):
+    for listener, path in self.listeners:
+      self.selector.unregister(listener)
+      listener.close()
+      os.unlink(path)
+    self.listeners = []
+
+  def line(self, data):
+    self.lines_in += 1
+    self.queue.put(data.decode("utf-8", "replace"))
+
+  def encoder(self):
+    while True:
+      text = self.queue.get()
+      if text is None:
+        break
+      # The newline is a word gap after every line
+      timeline = morsecode.compile_timeline(text + "\n")
+      self.encoded += 1
+      if timeline:
+        self.timelines.put(timeline)
+    self.timelines.close()
+
+  def player(self):
+    while True:
+      timeline = self.timelines.get()
+      if timeline is None:
+        break
+      morsecode.play(timeline, self.unit, self.out)
+      self.played += 1
+      self.units += sum(units for level, units in timeline)
+
+  def stats(self):
+    elapsed = time.monotonic() - self.started
+    return {"lines_in": self.lines_in, "bytes_in": self.bytes_in,
+            "lines_per_s": self.lines_in / elapsed if elapsed else 0.0,
+            "queued": len(self.queue), "deepest": self.queue.deepest,
+            "dropped": self.queue.dropped, "encoded": self.encoded,
+            "played": self.played, "wpm": self.units / 50 / elapsed * 60 if elapsed else 0.0}
+
+  def report(self):
+    s = self.stats()
+    sys.stderr.write("morse: " + str(s["lines_in"]) + " lines in ("
+                     + format(s["lines_per_s"], ".1f") + "/s), "
+                     + str(s["queued"]) + " queued (deepest " + str(s["deepest"]) + "), "
+                     + str(s["dropped"]) + " dropped, " + str(s["played"]) + " played, "
+                     + format(s["wpm"], ".1f") + " WPM\n")
+
+  # Read and play until every source has ended (never, with a FIFO or a
+  # socket) and everything read has been played. With stats, report
+  # every stats seconds on stderr.
+  def run(self, stats=None):
+    threads = [threading.Thread(target=self.encoder, daemon=True),
+               threading.Thread(target=self.player, daemon=True)]
+    for thread in threads:
+      thread.start()
+    due = time.monotonic() + stats if stats else None
+    try:
+      while self.sources or self.listeners:
+        timeout = max(0, due - time.monotonic()) if due else None
+        for key, events in self.selector.select(timeout):
+          key.data(key.fileobj)
+        if due and time.monotonic() >= due:
+          self.report()
+          due += stats
+    finally:
+      self.queue.close()
+      self.close_listeners()
+    for thread in threads:
+      thread.join()
+    if stats:
+      self.report()
+
+# The options for a script to take to stream
+def add_arguments(parser):
+  parser.add_argument("--fifo", help="read lines from this FIFO, made if need be")
+  parser.add_argument("--socket", help="read lines from writers to this Unix socket")
+  parser.add_argument("--stdin", action="store_true",
+                      help="read lines from stdin without holding up the writer")
+  parser.add_argument("--queue", type=int, default=QUEUE, help="lines to hold waiting to be played")
+  parser.add_argument("--drop-oldest", action="store_true",
+                      help="when the queue is full, drop the oldest line rather than stop reading")
+  parser.add_argument("--stats", type=float, metavar="SECONDS",
+                      help="report throughput and queue depth on stderr this often")
+
+# A Stream reading what add_arguments() asked for, or None for none
+def from_args(args, out, unit):
+  if not (args.fifo or args.socket or args.stdin):
+    return None
+  stream = Stream(out, unit, args.queue, args.drop_oldest)
+  if args.fifo:
+    stream.fifo(args.fifo)
+  if args.socket:
+    stream.socket(args.socket)
+  if args.stdin:
+    stream.file(sys.stdin)
+  return stream
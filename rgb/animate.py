@@ -0,0 +1,118 @@
+# animate.py: Colour animation from precomputed, gamma corrected tables
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Each channel's waveform is worked out once, one period of it at the
+# frame rate, into an array('f') of duty cycles. Brightness is not
+# linear in duty cycle, so values go through a gamma table on the way
+# in, and are rounded to QUANTUM so that a frame whose duty cycle
+# rounds to the same as the last one is not sent at all.
+#
+# Frames are due at start + n / fps on the monotonic clock. A frame
+# that comes round late doesn't push the rest back; if a whole frame
+# has been missed, it is skipped.
+#
+#   anim = Animation([r, g, b], [sine(8, FPS), sine(4, FPS), sine(1, FPS)], FPS)
+#   anim.run()
+
+import math
+import time
+from array import array
+
+# Frames a second
+FPS = 100
+
+# Perceptual gamma, and how many steps of brightness the table has
+GAMMA = 2.2
+LEVELS = 1024
+
+# Duty cycles are rounded to this, in percent
+QUANTUM = 0.1
+
+# Duty cycle in percent for each brightness level from 0 to LEVELS - 1
+def gamma_table(gamma=GAMMA, levels=LEVELS, quantum=QUANTUM):
+    return array('f', (round(100 * (n / (levels - 1)) ** gamma / quantum) * quantum
+                       for n in range(levels)))
+
+GAMMA_TABLE = gamma_table()
+
+# One period of wave, a function from phase (0 to 1) to brightness (0
+# to 1), as duty cycles, for a period of seconds at fps
+def table(wave, seconds, fps=FPS, lut=GAMMA_TABLE):
+    frames = max(1, int(round(seconds * fps)))
+    top = len(lut) - 1
+    return array('f', (lut[int(round(min(1.0, max(0.0, wave(n / frames))) * top))]
+                       for n in range(frames)))
+
+# A sine wave from 0 to 1 and back, once every seconds
+def sine(seconds, fps=FPS, lut=GAMMA_TABLE):
+    return table(lambda phase: (math.sin(2 * math.pi * phase) + 1) / 2, seconds, fps, lut)
+
+class Animation:
+    # channels have ChangeDutyCycle() (see pwm.py), tables are one for
+    # each, from table()
+    def __init__(self, channels, tables, fps=FPS):
+        self.channels = channels
+        self.tables = tables
+        self.fps = fps
+        self.sent = [None] * len(channels)
+        # What show() needs for each channel, looked up once
+        self.outputs = [(i, channel.ChangeDutyCycle, tab, len(tab))
+                        for i, (channel, tab) in enumerate(zip(channels, tables))]
+        self.frame = 0
+        # Counters
+        self.frames = 0
+        self.updates = 0
+        self.skipped = 0
+        self.cpu_time = 0.0
+
+    # Send frame n, or as much of it as has changed
+    def show(self, n):
+        sent = self.sent
+        for i, change, tab, length in self.outputs:
+            duty = tab[n % length]
+            if duty != sent[i]:
+                change(duty)
+                sent[i] = duty
+                self.updates += 1
+        self.frames += 1
+
+    # Play for seconds, or for ever. The CPU time counted takes in the
+    # sleeping and waking as well as the frames.
+    def run(self, seconds=None):
+        start = time.monotonic()
+        cpu = time.thread_time()
+        period = 1.0 / self.fps
+        n = 0
+        try:
+            while seconds is None or n * period < seconds:
+                self.show(self.frame + n)
+                n += 1
+                wait = start + n * period - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                elif wait < -period:
+                    # Behind by a frame or more: drop what was missed
+                    missed = int(-wait / period)
+                    self.skipped += missed
+                    n += missed
+        finally:
+            self.frame += n
+            self.cpu_time += time.thread_time() - cpu
+
+    def stats(self):
+        return {"frames": self.frames, "updates": self.updates, "skipped": self.skipped,
+                "cpu_per_frame": self.cpu_time / self.frames if self.frames else 0.0}
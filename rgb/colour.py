@@ -0,0 +1,86 @@
+# colour.py: An RGB LED's colour as a 3-bit mask
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Red, green and blue are bits 2, 1 and 0 of the mask, so a colour is a
+# number from 0 (off) to 7 (white), and everything about it is looked up
+# by that number: the pin levels to set, in R, G, B order, all in one
+# GPIO.output() call,
+#   GPIO.output((PIN_R, PIN_G, PIN_B), LEVELS[mask])
+# and its name.
+#
+# Status prints the name of the colour, but no more often than every
+# interval seconds, so holding a key down or a fast effect doesn't turn
+# into a flood of writes to the terminal. The last colour always gets
+# printed in the end.
+
+import sys
+import time
+
+RED = 4
+GREEN = 2
+BLUE = 1
+
+# Names, in their own colour on an ANSI terminal
+NAMES = [
+    "\033[0m(Off)",
+    "\033[1;34mBlue",
+    "\033[1;32mGreen",
+    "\033[1;36mCyan",
+    "\033[1;31mRed",
+    "\033[1;35mMagenta",
+    "\033[1;33mYellow",
+    "\033[1;37mWhite",
+]
+
+LEVELS = [((mask >> 2) & 1, (mask >> 1) & 1, mask & 1) for mask in range(8)]
+
+# Seconds between status lines, at the most
+INTERVAL = 0.05
+
+class Status:
+    # loop is a keys.Loop, to print a change that had to wait
+    def __init__(self, loop, interval=INTERVAL, out=sys.stdout):
+        self.loop = loop
+        self.interval = interval
+        self.out = out
+        self.mask = None
+        self.shown = None
+        self.last = None
+        self.timer = None
+        # Counters
+        self.changes = 0
+        self.printed = 0
+
+    def show(self, mask):
+        self.mask = mask
+        self.changes += 1
+        if self.timer:
+            return
+        now = time.monotonic()
+        if self.last is None or now - self.last >= self.interval:
+            self.flush()
+        else:
+            self.timer = self.loop.call_later(self.last + self.interval - now, self.flush)
+
+    def flush(self):
+        self.timer = None
+        if self.mask != self.shown:
+            self.out.write(NAMES[self.mask] + "\n")
+            self.out.flush()
+            self.shown = self.mask
+            self.printed += 1
+        self.last = time.monotonic()
@@ -0,0 +1,139 @@
+# keys.py: Keys from the terminal, and anything else, in one event loop
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# cbreak() puts the terminal into cbreak mode (keys as they are typed,
+# not echoed) once for as long as it is in effect, rather than around
+# every key with a pair of stty runs.
+#
+# Loop waits on any number of files with selectors, and on timers, so
+# keys, a FIFO, a socket and timed effects are all handled as they come,
+# in one thread:
+#   loop = Loop()
+#   loop.add_keys(sys.stdin, key)
+#   loop.call_later(0.5, blink, interval=0.5)
+#   with cbreak(sys.stdin):
+#       loop.run()
+
+import codecs
+import heapq
+import os
+import selectors
+import termios
+import time
+from contextlib import contextmanager
+
+# Read this much at a time
+CHUNK = 1024
+
+# Keys typed on f (a terminal) come in one at a time and aren't echoed
+# while in effect. Does nothing if f isn't a terminal.
+@contextmanager
+def cbreak(f):
+    fd = f.fileno()
+    if not os.isatty(fd):
+        yield
+        return
+    old_settings = termios.tcgetattr(fd)
+    new_settings = termios.tcgetattr(fd)
+    new_settings[3] &= ~(termios.ICANON | termios.ECHO)
+    new_settings[6][termios.VMIN] = 1
+    new_settings[6][termios.VTIME] = 0
+    termios.tcsetattr(fd, termios.TCSANOW, new_settings)
+    try:
+        yield
+    finally:
+        termios.tcsetattr(fd, termios.TCSANOW, old_settings)
+
+class Timer:
+    def __init__(self, when, callback, interval):
+        self.when = when
+        self.callback = callback
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class Loop:
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        # (when, seq, Timer), seq breaking ties
+        self.timers = []
+        self.seq = 0
+        self.running = False
+
+    # Call callback(f) whenever f (a file or a file descriptor) can be read
+    def add_reader(self, f, callback):
+        self.selector.register(f, selectors.EVENT_READ, callback)
+
+    def remove_reader(self, f):
+        self.selector.unregister(f)
+
+    # Call callback(key) for every character read from f, and end() once
+    # it ends
+    def add_keys(self, f, callback, end=None):
+        fd = f if isinstance(f, int) else f.fileno()
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+        def read(fileobj):
+            try:
+                data = os.read(fd, CHUNK)
+            except BlockingIOError:
+                return
+            if not data:
+                self.remove_reader(fd)
+                if end:
+                    end()
+                return
+            for key in decoder.decode(data):
+                callback(key)
+
+        self.add_reader(fd, read)
+
+    # Call callback() in delay seconds, and every interval seconds after
+    # that if given. Repeats keep to the first time, however late any one
+    # call is. Returns a Timer, to cancel() it.
+    def call_later(self, delay, callback, interval=None):
+        timer = Timer(time.monotonic() + delay, callback, interval)
+        self.push(timer)
+        return timer
+
+    def push(self, timer):
+        self.seq += 1
+        heapq.heappush(self.timers, (timer.when, self.seq, timer))
+
+    def run(self):
+        self.running = True
+        timers = self.timers
+        while self.running:
+            while timers and timers[0][2].cancelled:
+                heapq.heappop(timers)
+            timeout = max(0, timers[0][0] - time.monotonic()) if timers else None
+            for key, events in self.selector.select(timeout):
+                key.data(key.fileobj)
+            now = time.monotonic()
+            while self.running and timers and timers[0][0] <= now:
+                when, seq, timer = heapq.heappop(timers)
+                if timer.cancelled:
+                    continue
+                if timer.interval:
+                    timer.when += timer.interval
+                    self.push(timer)
+                timer.callback()
+
+    def stop(self):
+        self.running = False
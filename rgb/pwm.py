@@ -0,0 +1,199 @@
+# pwm.py: PWM channels for the RGB scripts, in hardware where the pins allow
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# RPi.GPIO's PWM is done in software, a thread per channel toggling the
+# pin and sleeping, which jitters and costs CPU all the time it runs.
+# The Pi has two hardware PWM channels, which the kernel offers under
+# /sys/class/pwm once enabled in /boot/config.txt, e.g. for GPIO 18:
+#   dtoverlay=pwm,pin=18,func=2
+# or for GPIO 18 and 19:
+#   dtoverlay=pwm-2chan
+# A hardware channel costs nothing once set, just a write to sysfs each
+# time the duty cycle changes.
+#
+# Both kinds have the methods of RPi.GPIO's PWM objects:
+#   start(duty), ChangeDutyCycle(duty), ChangeFrequency(freq), stop()
+# with duty in percent, and also:
+#   cpu()    CPU seconds spent on the channel so far
+#   close()  stop and let go of the pin
+#
+# channels() picks hardware for each pin that can have it, and software
+# for the rest.
+
+import os
+import time
+
+SYSFS = "/sys/class/pwm"
+
+# BCM pins the PWM hardware can drive, and which channel of pwmchip0
+# drives each
+HARDWARE = {12: 0, 18: 0, 13: 1, 19: 1}
+
+# How long to wait for a channel to appear (and udev to let us at it)
+# after exporting it
+EXPORT_WAIT = 1.0
+
+# Clock ticks per second, as /proc counts CPU time
+TICKS = os.sysconf("SC_CLK_TCK")
+
+# The IDs of this process's threads
+def tasks():
+    return set(int(tid) for tid in os.listdir("/proc/self/task"))
+
+# CPU seconds a thread of this process has used, None if it has gone
+def task_cpu(tid):
+    try:
+        with open("/proc/self/task/" + str(tid) + "/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # utime and stime, counting after the command name in brackets
+    fields = stat[stat.rindex(")") + 2:].split()
+    return (int(fields[11]) + int(fields[12])) / TICKS
+
+class SysfsPWM:
+    def __init__(self, channel, freq, chip=0, root=SYSFS):
+        self.chip = os.path.join(root, "pwmchip" + str(chip))
+        self.channel = channel
+        self.path = os.path.join(self.chip, "pwm" + str(channel))
+        self.exported = False
+        if not os.path.isdir(self.path):
+            with open(os.path.join(self.chip, "export"), "w") as f:
+                f.write(str(channel))
+            self.exported = True
+        # The files are made root only at first, until udev gets to them
+        end = time.monotonic() + EXPORT_WAIT
+        while not os.access(os.path.join(self.path, "enable"), os.W_OK):
+            if time.monotonic() > end:
+                raise OSError("PWM channel " + self.path + " did not appear")
+            time.sleep(0.01)
+        # Held open, so a change of duty cycle is a single write()
+        self.fds = {}
+        for name in ("period", "duty_cycle", "enable"):
+            self.fds[name] = os.open(os.path.join(self.path, name), os.O_WRONLY)
+        self.cpu_time = 0.0
+        self.period = 0
+        self.duty = 0.0
+        self.duty_ns = None
+        self.write("duty_cycle", 0)
+        self.ChangeFrequency(freq)
+
+    def write(self, name, value):
+        start = time.thread_time()
+        os.pwrite(self.fds[name], (str(value) + "\n").encode(), 0)
+        self.cpu_time += time.thread_time() - start
+
+    def start(self, duty):
+        self.ChangeDutyCycle(duty)
+        self.write("enable", 1)
+
+    def ChangeDutyCycle(self, duty):
+        self.duty = duty
+        ns = int(self.period * duty / 100)
+        # Nothing to do if it comes to the same number of nanoseconds
+        if ns != self.duty_ns:
+            self.write("duty_cycle", ns)
+            self.duty_ns = ns
+
+    def ChangeFrequency(self, freq):
+        # The duty cycle can never be longer than the period, so drop it
+        # while the period changes
+        self.write("duty_cycle", 0)
+        self.duty_ns = 0
+        self.period = int(round(1000000000 / freq))
+        self.write("period", self.period)
+        self.ChangeDutyCycle(self.duty)
+
+    def stop(self):
+        self.write("enable", 0)
+
+    def cpu(self):
+        return self.cpu_time
+
+    def close(self):
+        self.stop()
+        for fd in self.fds.values():
+            os.close(fd)
+        if self.exported:
+            with open(os.path.join(self.chip, "unexport"), "w") as f:
+                f.write(str(self.channel))
+
+    def __str__(self):
+        return "hardware " + os.path.basename(self.chip) + "/pwm" + str(self.channel)
+
+class SoftPWM:
+    # GPIO is RPi.GPIO, or something that does the same
+    def __init__(self, pin, freq, GPIO=None):
+        if GPIO is None:
+            import RPi.GPIO as GPIO
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setwarnings(False)
+        self.GPIO = GPIO
+        self.pin = pin
+        GPIO.setup(pin, GPIO.OUT)
+        self.pwm = GPIO.PWM(pin, freq)
+        # The thread doing the PWM, once started, and the CPU time it had
+        # used when last seen
+        self.threads = {}
+        self.cpu_time = 0.0
+
+    def start(self, duty):
+        before = tasks()
+        self.pwm.start(duty)
+        self.threads = dict.fromkeys(tasks() - before, 0.0)
+
+    def ChangeDutyCycle(self, duty):
+        start = time.thread_time()
+        self.pwm.ChangeDutyCycle(duty)
+        self.cpu_time += time.thread_time() - start
+
+    def ChangeFrequency(self, freq):
+        self.pwm.ChangeFrequency(freq)
+
+    def stop(self):
+        self.pwm.stop()
+
+    def cpu(self):
+        for tid in self.threads:
+            used = task_cpu(tid)
+            if used is not None:
+                self.threads[tid] = used
+        return self.cpu_time + sum(self.threads.values())
+
+    def close(self):
+        self.stop()
+        self.GPIO.cleanup(self.pin)
+
+    def __str__(self):
+        return "software GPIO " + str(self.pin)
+
+# A channel for each pin, at freq Hz: hardware for the first pin on each
+# hardware channel, if the kernel has it, and software for the rest
+def channels(pins, freq, root=SYSFS, GPIO=None):
+    ret = []
+    taken = set()
+    for pin in pins:
+        channel = HARDWARE.get(pin)
+        if channel is not None and channel not in taken:
+            try:
+                ret.append(SysfsPWM(channel, freq, root=root))
+                taken.add(channel)
+                continue
+            except OSError:
+                pass
+        ret.append(SoftPWM(pin, freq, GPIO))
+    return ret
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+#
+# rgb_bench.py: Measure the CPU cost of each PWM channel, software
+# against hardware, using a fake sysfs tree and a simulated RPi.GPIO
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Usage: ./rgb_bench.py [--seconds N] [--freq HZ] [--fps FPS] [--keys N]
+#                       [pwm|animate|keys|colour]
+
+import argparse
+import math
+import os
+import pty
+import statistics
+import tempfile
+import termios
+import threading
+import time
+import animate
+import colour
+import keys
+import pwm
+
+PINS = (14, 15, 18)
+
+# Enough of RPi.GPIO for SoftPWM: PWM is a thread per channel, setting
+# the pin and sleeping for each half of the cycle, as RPi.GPIO does in C
+class SimulatedGPIO:
+    BCM = 11
+    OUT = 0
+
+    def __init__(self):
+        self.levels = {}
+
+    def setup(self, pin, direction):
+        self.levels[pin] = 0
+
+    def cleanup(self, pin=None):
+        pass
+
+    def PWM(self, pin, freq):
+        return SimulatedPWM(self, pin, freq)
+
+class SimulatedPWM:
+    def __init__(self, gpio, pin, freq):
+        self.gpio = gpio
+        self.pin = pin
+        self.freq = freq
+        self.duty = 0.0
+        self.running = False
+
+    def run(self):
+        levels = self.gpio.levels
+        while self.running:
+            period = 1.0 / self.freq
+            on = period * self.duty / 100
+            if on > 0:
+                levels[self.pin] = 1
+                time.sleep(on)
+            if period - on > 0:
+                levels[self.pin] = 0
+                time.sleep(period - on)
+
+    def start(self, duty):
+        self.duty = duty
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def ChangeDutyCycle(self, duty):
+        self.duty = duty
+
+    def ChangeFrequency(self, freq):
+        self.freq = freq
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+# A pwmchip0 with channel 0 exported, as if by dtoverlay=pwm,pin=18,func=2
+def fake_sysfs(root):
+    chip = os.path.join(root, "pwmchip0")
+    os.makedirs(os.path.join(chip, "pwm0"))
+    for name, value in (("npwm", "2"), ("export", ""), ("unexport", "")):
+        with open(os.path.join(chip, name), "w") as f:
+            f.write(value)
+    for name in ("period", "duty_cycle", "enable", "polarity"):
+        with open(os.path.join(chip, "pwm0", name), "w") as f:
+            f.write("0")
+
+# The fake files are ordinary ones, so a shorter value leaves the end
+# of a longer one after its newline
+def read(root, name):
+    with open(os.path.join(root, "pwmchip0", "pwm0", name)) as f:
+        return f.readline().strip()
+
+# rgb_pwm.py's sine waves, at 4 updates a second
+def run(channels, seconds):
+    for channel in channels:
+        channel.start(50)
+    count = 0
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        for n, channel in enumerate(channels):
+            channel.ChangeDutyCycle((math.sin(count * (1, 2, 8)[n]) + 1) * 50)
+        time.sleep(0.25)
+        count += 1
+    elapsed = time.monotonic() - start
+    for name, channel in zip("RGB", channels):
+        print(format(name, "2s") + format(str(channel), "24s") + ": "
+              + format(1000 * channel.cpu(), "7.1f") + "ms CPU, "
+              + format(100 * channel.cpu() / elapsed, "5.2f") + "%")
+    return count
+
+def bench_pwm(args):
+    with tempfile.TemporaryDirectory() as root:
+        print("before: all software")
+        channels = pwm.channels(PINS, args.freq, os.path.join(root, "none"), SimulatedGPIO())
+        run(channels, args.seconds)
+        for channel in channels:
+            channel.close()
+
+        print("after: GPIO 18 on hardware")
+        fake_sysfs(root)
+        channels = pwm.channels(PINS, args.freq, root, SimulatedGPIO())
+        count = run(channels, args.seconds)
+        if not isinstance(channels[2], pwm.SysfsPWM):
+            print("MISMATCH: GPIO 18 didn't get the hardware channel")
+            exit(1)
+        period = 1000000000 // args.freq
+        duty = int(period * ((math.sin((count - 1) * 8) + 1) * 50) / 100)
+        if (read(root, "period"), read(root, "duty_cycle"), read(root, "enable")) \
+           != (str(period), str(duty), "1"):
+            print("MISMATCH: sysfs holds " + read(root, "period") + "/"
+                  + read(root, "duty_cycle") + "/" + read(root, "enable"))
+            exit(1)
+        for channel in channels:
+            channel.close()
+        if read(root, "enable") != "0":
+            print("MISMATCH: the hardware channel was left enabled")
+            exit(1)
+
+# Takes duty cycles and counts them
+class CountingChannel:
+    def __init__(self):
+        self.changes = 0
+        self.duty = None
+
+    def ChangeDutyCycle(self, duty):
+        self.changes += 1
+        self.duty = duty
+
+# CPU per frame of the original loop (three math.sin() and three
+# ChangeDutyCycle() calls) against Animation.show(), then the animation
+# played in real time at --fps for --seconds
+def bench_animate(args):
+    channels = [CountingChannel() for n in range(3)]
+    frames = 10000
+    start = time.thread_time()
+    for count in range(frames):
+        s = math.sin(count)
+        s2 = math.sin(count*2)
+        s3 = math.sin(count*8)
+        channels[0].ChangeDutyCycle((s + 1) * 50)
+        channels[1].ChangeDutyCycle((s2 + 1)*50)
+        channels[2].ChangeDutyCycle((s3 + 1)*50)
+    elapsed = time.thread_time() - start
+    print("before : " + format(1000000 * elapsed / frames, "5.2f") + "us CPU a frame, "
+          + format(sum(c.changes for c in channels) / frames, "4.2f") + " changes a frame, "
+          + "blue moves 8 radians a frame at 4 fps (aliased past pi)")
+
+    lut = animate.gamma_table()
+    if lut[0] != 0 or abs(lut[-1] - 100) > 0.001 or any(a > b for a, b in zip(lut, lut[1:])):
+        print("MISMATCH: the gamma table doesn't run from 0 to 100")
+        exit(1)
+    tables = [animate.sine(period, args.fps) for period in (8, 4, 1)]
+    channels = [CountingChannel() for n in range(3)]
+    anim = animate.Animation(channels, tables, args.fps)
+    start = time.thread_time()
+    for n in range(frames):
+        anim.show(n)
+    elapsed = time.thread_time() - start
+    print("after  : " + format(1000000 * elapsed / frames, "5.2f") + "us CPU a frame, "
+          + format(anim.updates / frames, "4.2f") + " changes a frame")
+
+    channels = [CountingChannel() for n in range(3)]
+    anim = animate.Animation(channels, tables, args.fps)
+    anim.run(args.seconds)
+    stats = anim.stats()
+    print("played : " + format(1000000 * stats["cpu_per_frame"], "5.2f")
+          + "us CPU a frame with the sleeps, "
+          + format(stats["updates"] / stats["frames"], "4.2f") + " changes a frame, "
+          + "blue moves " + format(2 * math.pi / len(tables[2]), ".3f") + " radians a frame at "
+          + format(args.fps, ".0f") + " fps, " + str(stats["skipped"]) + " frames skipped")
+
+    # Every change sent must be a change in the table, and no others
+    shown = anim.frame
+    expected = 0
+    for channel, tab in zip(channels, tables):
+        values = [tab[n % len(tab)] for n in range(shown)]
+        expected += 1 + sum(1 for a, b in zip(values, values[1:]) if a != b)
+        if channel.duty != values[-1]:
+            print("MISMATCH: a channel was left at the wrong duty cycle")
+            exit(1)
+    if not stats["skipped"] and stats["updates"] != expected:
+        print("MISMATCH: " + str(stats["updates"]) + " changes sent, expected " + str(expected))
+        exit(1)
+
+# rgb_key.py's old getch(), on the terminal fd rather than stdin: cbreak
+# and stty -echo around every key
+def legacy_getch(fd):
+    tty = os.ttyname(fd)
+    old_settings = termios.tcgetattr(fd)
+    new_settings = old_settings[:]
+    new_settings[3] &= ~termios.ICANON
+    try:
+        termios.tcsetattr(fd, termios.TCSANOW, new_settings)
+        os.system("stty -echo < " + tty)
+        ch = os.read(fd, 1).decode()
+        os.system("stty echo < " + tty)
+    finally:
+        termios.tcsetattr(fd, termios.TCSANOW, old_settings)
+    return ch
+
+# Type count keys into a pty, one every gap seconds, each once the last
+# has lit the LED, and return how long each took to. reader(fd, led) is
+# run in a thread, reading keys from fd and calling led(key) for each
+# until it gets a 'q'.
+def latency(reader, count, gap=0.01):
+    master, slave = pty.openpty()
+    lit = threading.Event()
+    got = []
+    def led(key):
+        got.append((key, time.perf_counter()))
+        lit.set()
+    thread = threading.Thread(target=reader, args=(slave, led), daemon=True)
+    thread.start()
+    time.sleep(0.1)
+    times = []
+    for n in range(count):
+        time.sleep(gap)
+        lit.clear()
+        key = "rgb"[n % 3]
+        start = time.perf_counter()
+        os.write(master, key.encode())
+        if not lit.wait(5):
+            print("MISMATCH: key " + str(n) + " never lit the LED")
+            exit(1)
+        if got[-1][0] != key:
+            print("MISMATCH: typed " + key + " but the LED got " + got[-1][0])
+            exit(1)
+        times.append(got[-1][1] - start)
+    os.write(master, b"q")
+    thread.join(5)
+    os.close(master)
+    os.close(slave)
+    return times
+
+def report_latency(name, times):
+    print(name + ": " + format(1000 * statistics.mean(times), "6.3f") + "ms mean, "
+          + format(1000 * statistics.median(times), "6.3f") + "ms median, "
+          + format(1000 * max(times), "6.3f") + "ms worst, key to LED")
+
+def bench_keys(args):
+    def legacy(fd, led):
+        while 1:
+            c = legacy_getch(fd)
+            if c == "q":
+                return
+            led(c)
+    report_latency("before           ", latency(legacy, args.keys))
+
+    def looped(fd, led, effect=None):
+        loop = keys.Loop()
+        def key(c):
+            if c == "q":
+                loop.stop()
+            else:
+                led(c)
+        loop.add_keys(fd, key)
+        if effect:
+            loop.call_later(0, effect, interval=0.001)
+        with open(fd, closefd=False) as f, keys.cbreak(f):
+            loop.run()
+    report_latency("after            ", latency(looped, args.keys))
+
+    ticks = []
+    def busy(fd, led):
+        looped(fd, led, lambda: ticks.append(time.monotonic()))
+    start = time.monotonic()
+    report_latency("after, 1kHz timer", latency(busy, args.keys))
+    elapsed = time.monotonic() - start
+    print("                    timer ran " + str(len(ticks)) + " times in "
+          + format(elapsed, ".2f") + "s alongside")
+    if len(ticks) < elapsed * 500:
+        print("MISMATCH: the timer fell behind while keys were coming in")
+        exit(1)
+
+# GPIO.output() for one pin or a list of them, as RPi.GPIO has it,
+# counting calls and every combination of levels the pins pass through
+class RecordingGPIO:
+    def __init__(self, pins):
+        self.pins = pins
+        self.levels = dict.fromkeys(pins, 0)
+        self.calls = 0
+        self.seen = []
+
+    def output(self, channel, value):
+        self.calls += 1
+        if isinstance(channel, int):
+            self.levels[channel] = value
+        else:
+            for pin, level in zip(channel, value):
+                self.levels[pin] = level
+        self.seen.append(tuple(self.levels[pin] for pin in self.pins))
+
+# Counts what is written to it
+class Sink:
+    def __init__(self):
+        self.writes = 0
+        self.parts = []
+
+    def write(self, text):
+        self.writes += 1
+        self.parts.append(text)
+
+    def lines(self):
+        return "".join(self.parts).splitlines()
+
+    def flush(self):
+        pass
+
+# rgb_key.py's old do_rgb(), a call for each pin, then the name out of
+# eight ifs every time
+def legacy_do_rgb(GPIO, out, r, g, b):
+    GPIO.output(PINS[0], r)
+    GPIO.output(PINS[1], g)
+    GPIO.output(PINS[2], b)
+    red = "\033[1;31mRed"
+    green = "\033[1;32mGreen"
+    blue = "\033[1;34mBlue"
+    magenta = "\033[1;35mMagenta"
+    cyan = "\033[1;36mCyan"
+    yellow = "\033[1;33mYellow"
+    white = "\033[1;37mWhite"
+    off = "\033[0m(Off)"
+    if (r==0 and g==0 and b==0):
+        print(off, file=out)
+    if (r==1 and g==0 and b==0):
+        print(red, file=out)
+    if (r==0 and g==1 and b==0):
+        print(green, file=out)
+    if (r==0 and g==0 and b==1):
+        print(blue, file=out)
+    if (r==0 and g==1 and b==1):
+        print(cyan, file=out)
+    if (r==1 and g==0 and b==1):
+        print(magenta, file=out)
+    if (r==1 and g==1 and b==0):
+        print(yellow, file=out)
+    if (r==1 and g==1 and b==1):
+        print(white, file=out)
+
+# Glitches: combinations of levels the pins went through on the way
+# from one colour to the next that were neither
+def glitches(seen, masks, calls):
+    count = 0
+    before = colour.LEVELS[0]
+    for n, mask in enumerate(masks):
+        after = colour.LEVELS[mask]
+        count += sum(1 for levels in seen[n * calls:(n + 1) * calls]
+                     if levels != before and levels != after)
+        before = after
+    return count
+
+# Step through the colours, as 'c' does, as fast as possible
+def bench_colour(args):
+    updates = 100000
+    masks = [n & 7 for n in range(1, updates + 1)]
+
+    GPIO = RecordingGPIO(PINS)
+    out = Sink()
+    start = time.perf_counter()
+    for mask in masks:
+        legacy_do_rgb(GPIO, out, *colour.LEVELS[mask])
+    elapsed = time.perf_counter() - start
+    print("before: " + format(1000000 * elapsed / updates, "5.2f") + "us an update, "
+          + format(GPIO.calls / updates, "4.2f") + " GPIO calls an update, "
+          + str(glitches(GPIO.seen, masks, 3)) + " glitches, "
+          + str(out.writes) + " writes")
+
+    GPIO = RecordingGPIO(PINS)
+    out = Sink()
+    loop = keys.Loop()
+    status = colour.Status(loop, args.status, out)
+    start = time.perf_counter()
+    for mask in masks:
+        GPIO.output(PINS, colour.LEVELS[mask])
+        status.show(mask)
+    elapsed = time.perf_counter() - start
+    if status.timer:
+        status.flush()
+    print("after : " + format(1000000 * elapsed / updates, "5.2f") + "us an update, "
+          + format(GPIO.calls / updates, "4.2f") + " GPIO calls an update, "
+          + str(glitches(GPIO.seen, masks, 1)) + " glitches, "
+          + str(out.writes) + " writes")
+    if GPIO.seen[-1] != colour.LEVELS[masks[-1]]:
+        print("MISMATCH: the pins were left at " + str(GPIO.seen[-1]))
+        exit(1)
+    if out.lines()[-1] != colour.NAMES[masks[-1]]:
+        print("MISMATCH: the last colour printed was " + repr(out.lines()[-1]))
+        exit(1)
+    for mask in range(8):
+        legacy = Sink()
+        legacy_do_rgb(RecordingGPIO(PINS), legacy, *colour.LEVELS[mask])
+        if legacy.lines() != [colour.NAMES[mask]]:
+            print("MISMATCH: colour " + str(mask) + " is named " + repr(colour.NAMES[mask])
+                  + ", was " + repr(legacy.lines()))
+            exit(1)
+
+    # A 1kHz effect in the event loop, as 'c' with --cycle 0.001
+    GPIO = RecordingGPIO(PINS)
+    out = Sink()
+    loop = keys.Loop()
+    status = colour.Status(loop, args.status, out)
+    mask = [0]
+    def step():
+        mask[0] = (mask[0] + 1) & 7
+        GPIO.output(PINS, colour.LEVELS[mask[0]])
+        status.show(mask[0])
+    loop.call_later(0, step, interval=0.001)
+    loop.call_later(args.seconds, loop.stop)
+    loop.run()
+    if status.timer:
+        status.flush()
+    print("played: " + str(status.changes) + " changes at 1kHz for " + format(args.seconds, "g")
+          + "s, " + str(status.printed) + " lines printed, at most every "
+          + format(args.status, "g") + "s")
+    if status.printed > args.seconds / args.status + 2:
+        print("MISMATCH: printed more often than every " + format(args.status, "g") + "s")
+        exit(1)
+    if out.lines()[-1] != colour.NAMES[mask[0]]:
+        print("MISMATCH: the last colour printed was " + repr(out.lines()[-1]))
+        exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="RGB LED benchmarks")
+    parser.add_argument("bench", nargs="?", default="pwm", choices=["pwm", "animate", "keys", "colour"])
+    parser.add_argument("--seconds", type=float, default=3, help="how long to run each")
+    parser.add_argument("--freq", type=int, default=2000, help="PWM frequency in Hz")
+    parser.add_argument("--fps", type=float, default=animate.FPS, help="animation frames a second")
+    parser.add_argument("--keys", type=int, default=200, help="how many keys to type")
+    parser.add_argument("--status", type=float, default=colour.INTERVAL,
+                        help="seconds between colour status lines")
+    args = parser.parse_args()
+    if args.bench == "pwm":
+        bench_pwm(args)
+    elif args.bench == "animate":
+        bench_animate(args)
+    elif args.bench == "keys":
+        bench_keys(args)
+    else:
+        bench_colour(args)
+
+if __name__ == '__main__':
+    main()
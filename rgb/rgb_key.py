@@ -15,8 +15,12 @@
 
 #### IMPORTS ####
 import RPi.GPIO as GPIO
-import time
-import math
+import argparse
+import os
+import socket
+import sys
+import colour
+import keys
 
 #### SETUP ####
 
@@ -25,87 +29,90 @@ GPIO.setmode(GPIO.BCM)
 PIN_R=14
 PIN_G=15
 PIN_B=18
+# In the order of colour.LEVELS
+PINS=(PIN_R, PIN_G, PIN_B)
 
 GPIO.setwarnings(False)
 
-GPIO.setup(PIN_R, GPIO.OUT)
-GPIO.setup(PIN_G, GPIO.OUT)
-GPIO.setup(PIN_B, GPIO.OUT)
+GPIO.setup(PINS, GPIO.OUT)
+GPIO.output(PINS, colour.LEVELS[0])
 
-GPIO.output(PIN_R, 0)
-GPIO.output(PIN_G, 0)
-GPIO.output(PIN_B, 0)
+# Prints the colour as it changes, if not --quiet
+status = None
 
 #### DEFINES ####
-def getch():
-  import sys, tty, termios, os
-  old_settings = termios.tcgetattr(0)
-  new_settings = old_settings[:]
-  new_settings[3] &= ~termios.ICANON
+# How often 'c' steps through the colours
+CYCLE=0.5
+
+# The bit of the colour each key turns on and off
+BITS = {'r': colour.RED, 'g': colour.GREEN, 'b': colour.BLUE}
+
+def main_loop(args):
+  global status
+  mask = [0]
+  cycling = []
+  loop = keys.Loop()
+  if not args.quiet:
+    status = colour.Status(loop, args.status)
+
+  def step():
+    mask[0] = (mask[0] + 1) & 7
+    do_rgb(mask[0])
+
+  # Keys, from the terminal, the FIFO or the socket alike
+  def key(c):
+    if (c in BITS):
+      mask[0] ^= BITS[c]
+      do_rgb(mask[0])
+    if (c=='c'):
+      if cycling:
+        cycling.pop().cancel()
+      else:
+        cycling.append(loop.call_later(0, step, interval=args.cycle))
+    if (c=='q' or c=='x'):
+      loop.stop()
+
+  # The end of stdin is the end, unless keys can still come some other way
+  loop.add_keys(sys.stdin, key, None if (args.fifo or args.socket) else loop.stop)
+  fifo = None
+  listener = None
   try:
-    termios.tcsetattr(0, termios.TCSANOW, new_settings)
-    os.system("stty -echo")
-    ch = sys.stdin.read(1)
-    os.system("stty echo")
+    if args.fifo:
+      if not os.path.exists(args.fifo):
+        os.mkfifo(args.fifo)
+      # Opened for writing too, so it doesn't end when a writer goes away
+      fifo = os.open(args.fifo, os.O_RDWR | os.O_NONBLOCK)
+      loop.add_keys(fifo, key)
+    if args.socket:
+      if os.path.exists(args.socket):
+        os.unlink(args.socket)
+      listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      listener.bind(args.socket)
+      listener.listen()
+      def accept(f):
+        conn, addr = listener.accept()
+        loop.add_keys(conn, key, conn.close)
+      loop.add_reader(listener, accept)
+
+    with keys.cbreak(sys.stdin):
+      loop.run()
   finally:
-    termios.tcsetattr(0, termios.TCSANOW, old_settings)
-  return ch
-
-def main_loop():
-  ron=0
-  gon=0
-  bon=0
-  while 1:
-    c = getch()
-    if (c=='r'):
-      ron = invert(ron)
-      do_rgb(ron, gon, bon)
-    if (c=='b'):
-      bon = invert(bon)
-      do_rgb(ron, gon, bon)
-    if (c=='g'):
-      gon = invert(gon)
-      do_rgb(ron, gon, bon)
-    if (c=='q' or c=='x'):
-      leave()
-
-def invert(x):
-  return 0 if x else 1
-
-def print_colour(r, g, b):
-  red = "\033[1;31mRed"
-  green = "\033[1;32mGreen"
-  blue = "\033[1;34mBlue"
-  magenta = "\033[1;35mMagenta"
-  cyan = "\033[1;36mCyan"
-  yellow = "\033[1;33mYellow"
-  white = "\033[1;37mWhite"
-  off = "\033[0m(Off)"
-
-  if (r==0 and g==0 and b==0):
-    print(off)
-  if (r==1 and g==0 and b==0):
-    print(red)
-  if (r==0 and g==1 and b==0):
-    print(green)
-  if (r==0 and g==0 and b==1):
-    print(blue)
-  if (r==0 and g==1 and b==1):
-    print(cyan)
-  if (r==1 and g==0 and b==1):
-    print(magenta)
-  if (r==1 and g==1 and b==0):
-    print(yellow)
-  if (r==1 and g==1 and b==1):
-    print(white)
-
-# Set RGB LEDs on/off each, and print colour to console
-def do_rgb(r, g, b):
-  GPIO.output(PIN_R, r)
-  GPIO.output(PIN_G, g)
-  GPIO.output(PIN_B, b)
-  # DEBUG
-  print_colour(r, g, b)
+    if fifo is not None:
+      os.close(fifo)
+    # Don't leave the socket behind for the next run to trip over
+    if listener:
+      listener.close()
+      if os.path.exists(args.socket):
+        os.unlink(args.socket)
+  # The last colour, if it was still waiting to be printed
+  if status and status.timer:
+    status.flush()
+
+# Set the RGB LEDs to a colour (see colour.py) all in one call, and print it
+def do_rgb(mask):
+  GPIO.output(PINS, colour.LEVELS[mask])
+  if status:
+    status.show(mask)
 
 # Fancy exit
 def leave(msg=''):
@@ -116,9 +123,18 @@ def leave(msg=''):
 
 #### MAIN ####
 if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Turn an RGB LED's colours on and off from the keyboard")
+  parser.add_argument("--fifo", help="also take keys written to this FIFO")
+  parser.add_argument("--socket", help="also take keys sent to this Unix socket")
+  parser.add_argument("--cycle", type=float, default=CYCLE, metavar="SECONDS",
+                      help="how often 'c' steps through the colours")
+  parser.add_argument("--status", type=float, default=colour.INTERVAL, metavar="SECONDS",
+                      help="print the colour no more often than this")
+  parser.add_argument("--quiet", action="store_true", help="don't print the colour")
+  args = parser.parse_args()
   try:
-    print("Press 'r' for Red, 'g' for Green, 'b' for Blue, 'q' or 'x' to exit.")
-    main_loop()
+    print("Press 'r' for Red, 'g' for Green, 'b' for Blue, 'c' to cycle, 'q' or 'x' to exit.")
+    main_loop(args)
   except KeyboardInterrupt:
     pass
   finally:
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
 #### IMPORTS ####
-import RPi.GPIO as GPIO
+import argparse
 import time
-import math
+import animate
+import pwm
 
 
 #### SETUP ####
@@ -11,33 +12,47 @@ PIN_R=14
 PIN_G=15
 PIN_B=18
 PWM_FREQ=2000
+# Seconds for each colour to fade up and back down
+PERIOD_R=8
+PERIOD_G=4
+PERIOD_B=1
 
-GPIO.setmode(GPIO.BCM)
-GPIO.setwarnings(False)
+parser = argparse.ArgumentParser(description="Fade an RGB LED through sine waves")
+parser.add_argument("--stats", type=float, metavar="SECONDS",
+                    help="print the CPU each PWM channel has used this often")
+parser.add_argument("--sysfs", default=pwm.SYSFS, help="where the kernel's PWM chips are")
+parser.add_argument("--fps", type=float, default=animate.FPS, help="frames a second")
+args = parser.parse_args()
 
-GPIO.setup(PIN_R, GPIO.OUT)
-GPIO.setup(PIN_G, GPIO.OUT)
-GPIO.setup(PIN_B, GPIO.OUT)
-
-r=GPIO.PWM(PIN_R, PWM_FREQ)
-g=GPIO.PWM(PIN_G, PWM_FREQ)
-b=GPIO.PWM(PIN_B, PWM_FREQ)
+# Hardware PWM where the pins have it (see pwm.py), software otherwise
+r, g, b = pwm.channels([PIN_R, PIN_G, PIN_B], PWM_FREQ, args.sysfs)
 
 r.start(50)
 b.start(50)
 g.start(50)
 
+def report(elapsed):
+    for name, channel in (("R", r), ("G", g), ("B", b)):
+        print(name + " " + str(channel) + ": " + format(channel.cpu(), ".2f") + "s CPU, "
+              + format(100 * channel.cpu() / elapsed, ".1f") + "%")
+    stats = anim.stats()
+    print(str(stats["frames"]) + " frames, " + str(stats["updates"]) + " duty cycle changes, "
+          + str(stats["skipped"]) + " frames skipped, "
+          + format(1000000 * stats["cpu_per_frame"], ".1f") + "us CPU a frame")
+
 #### MAIN ####
-count = 0
-while 1:
-    s = math.sin(count)
-    s2 = math.sin(count*2)
-    s3 = math.sin(count*8)
-
-    duty = (s + 1) * 50
-
-    r.ChangeDutyCycle(duty)
-    g.ChangeDutyCycle((s2 + 1)*50)
-    b.ChangeDutyCycle((s3 + 1)*50)
-    time.sleep(0.25)
-    count = count + 1
+# Sine waves, gamma corrected, worked out once
+anim = animate.Animation([r, g, b], [animate.sine(PERIOD_R, args.fps),
+                                     animate.sine(PERIOD_G, args.fps),
+                                     animate.sine(PERIOD_B, args.fps)], args.fps)
+start = time.monotonic()
+try:
+    while 1:
+        anim.run(args.stats or 60)
+        if args.stats:
+            report(time.monotonic() - start)
+except KeyboardInterrupt:
+    pass
+finally:
+    for channel in (r, g, b):
+        channel.close()
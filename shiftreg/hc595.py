@@ -0,0 +1,285 @@
+# hc595.py: Fast writes to a 74HC595 shift register
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Bytes go out the way int2reg() has always sent them: bit 0 first, so
+# it ends up on BIT_7 and bit 7 on BIT_0.
+#
+# Registers can be chained, BIT_7' of each to DS of the next, with SH
+# and ST shared. A frame is then one byte per register, the one wired
+# to the Pi first. The whole frame is shifted in before ST is strobed,
+# so the outputs go straight from one frame to the next, never showing
+# half shifted states.
+#
+# The 74HC595 needs 20ns pulses at 4.5V. A GPIO call from Python takes
+# far longer than that, so the clock is driven with no sleeps at all;
+# time.sleep(PULSE) was sleeping for tens of microseconds each time.
+#
+# The 74HC595 is also an SPI device, as far as writing goes: DS on
+# MOSI, SH on SCLK and ST on CE0. CE0 goes low for a transfer and back
+# high at the end of it, and that rising edge is the store. The SPI
+# backend sends each frame as one transfer at MHz clock rates, so it
+# latches once per frame just as the bit-banged path does. The Pi only
+# does MSB first, so every byte is bit reversed (REVERSE) on its way
+# out to keep bit 0 going first.
+#
+# A backend has the methods:
+#   setup(pins)         claim the pins (a Pins tuple) as outputs, all low
+#   output(pin, value)  set one pin
+#   cleanup()           let go of the pins
+# or, instead of output(),
+#   transfer(data)      shift data in, MSB first, then store
+# RPi.GPIO and spidev are only imported when their backend is used, so
+# the simulator runs on any Linux box.
+
+import io
+import mmap
+import sys
+import time
+from collections import namedtuple
+
+# data = DS "Data Serial", shift = SH "Shift", store = ST "Store"
+Pins = namedtuple("Pins", "data shift store")
+PINS = Pins(data=17, shift=27, store=18)
+# SPI0: MOSI, SCLK and CE0. Bit-banging these needs no rewiring.
+SPI_PINS = Pins(data=10, shift=11, store=8)
+
+# SPI clock in Hz. The 74HC595 shifts at 25MHz at 4.5V, the length and
+# state of the wires are what limit this.
+SPEED = 8000000
+
+# Read files this much at a time, when they can't be memory mapped
+CHUNK = 65536
+
+# The levels DS takes for every byte value, in the order they are
+# shifted in
+BITS = [tuple((b >> bit) & 1 for bit in range(8)) for b in range(256)]
+
+# Every byte value with its bits in reverse order, for bytes.translate()
+REVERSE = bytes(sum(((b >> bit) & 1) << (7 - bit) for bit in range(8)) for b in range(256))
+
+class RPiGPIO:
+    def __init__(self):
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+
+    def setup(self, pins):
+        for pin in pins:
+            self.GPIO.setup(pin, self.GPIO.OUT)
+            self.GPIO.output(pin, 0)
+        # Bound once, it's called for every bit
+        self.output = self.GPIO.output
+
+    def cleanup(self):
+        self.GPIO.cleanup()
+
+# /dev/spidevBUS.DEVICE, through the spidev module
+class SPI:
+    def __init__(self, bus=0, device=0, speed=SPEED):
+        import spidev
+        self.spi = spidev.SpiDev()
+        self.spi.open(bus, device)
+        self.spi.max_speed_hz = speed
+        # Clock idles low and data is sampled on the rising edge, as SH
+        # shifts
+        self.spi.mode = 0
+
+    def setup(self, pins):
+        pass
+
+    # writebytes2() takes any buffer without making a list of it. Buffers
+    # over spidev's bufsiz (4096 by default) are split into several
+    # transfers, and so several stores, but no frame comes near that.
+    def transfer(self, data):
+        self.spi.writebytes2(data)
+
+    def cleanup(self):
+        self.spi.close()
+
+# SPI if asked for and it can be had, otherwise RPi.GPIO. A fallback
+# from SPI bit-bangs SPI_PINS, so the wiring is the same either way.
+# Returns the backend and the pins to use with it.
+def open_backend(spi=False, pins=PINS):
+    if not spi:
+        return RPiGPIO(), pins
+    try:
+        return SPI(), SPI_PINS
+    except (ImportError, OSError) as e:
+        sys.stderr.write("No SPI (" + str(e) + "), bit-banging the SPI pins instead\n")
+        return RPiGPIO(), SPI_PINS
+
+# 74HC595s on the end of simulated GPIO pins. Shifts on the rising edge
+# of SH, copies the shift registers to the outputs on the rising edge of
+# ST. call_cost is spent in every output(), standing in for RPi.GPIO.
+class Simulator:
+    def __init__(self, call_cost=0.0, registers=1):
+        self.call_cost = call_cost
+        self.registers = registers
+        self.mask = (1 << (8 * registers)) - 1
+        self.calls = 0
+        self.stores = 0
+        self.levels = {}
+        self.shifted = 0
+        # The outputs, bit 8 * r + n being BIT_n of register r
+        self.outputs = 0
+        # The outputs after every store, if record is set
+        self.latched = []
+        self.record = True
+
+    def setup(self, pins):
+        self.pins = pins
+        for pin in pins:
+            self.levels[pin] = 0
+
+    def output(self, pin, value):
+        self.calls += 1
+        value = 1 if value else 0
+        rising = value and not self.levels[pin]
+        self.levels[pin] = value
+        if rising and pin == self.pins.shift:
+            self.shifted = ((self.shifted << 1) | self.levels[self.pins.data]) & self.mask
+        elif rising and pin == self.pins.store:
+            self.outputs = self.shifted
+            self.stores += 1
+            if self.record:
+                self.latched.append(self.outputs)
+        if self.call_cost:
+            end = time.perf_counter() + self.call_cost
+            while time.perf_counter() < end:
+                pass
+
+    # The frame that was written to get outputs
+    def frame(self, outputs=None):
+        if outputs is None:
+            outputs = self.outputs
+        ret = bytearray(self.registers)
+        for r in range(self.registers):
+            byte = (outputs >> (8 * r)) & 0xFF
+            for bit in range(8):
+                ret[r] |= ((byte >> bit) & 1) << (7 - bit)
+        return bytes(ret)
+
+    def cleanup(self):
+        pass
+
+    def reset(self):
+        self.calls = 0
+        self.stores = 0
+        self.latched = []
+
+class ShiftRegister:
+    # registers is how many are chained
+    def __init__(self, backend, pins=PINS, registers=1):
+        self.backend = backend
+        self.pins = pins
+        self.registers = registers
+        backend.setup(pins)
+        self.data = 0
+        self.transfer = getattr(backend, "transfer", None)
+
+    # Shift a frame in and show it. A frame is any bytes-like object
+    # (bytes, bytearray, memoryview, ...) with a byte for each register,
+    # or an int with one register.
+    def write(self, frame):
+        if isinstance(frame, int):
+            frame = (frame,)
+        if self.transfer is not None:
+            # The far end of the chain first, bit 0 first
+            self.transfer(bytes(frame[::-1]).translate(REVERSE))
+            return
+        output = self.backend.output
+        data, shift = self.pins.data, self.pins.shift
+        level = self.data
+        # The far end of the chain first
+        for byte in reversed(frame):
+            for bit in BITS[byte]:
+                # DS only needs to change when the bit does
+                if bit != level:
+                    output(data, bit)
+                    level = bit
+                output(shift, 1)
+                output(shift, 0)
+        self.data = level
+        output(self.pins.store, 1)
+        output(self.pins.store, 0)
+
+    # Show the low 8 bits per register of an integer, the lowest byte on
+    # the first register
+    def write_int(self, i):
+        size = self.registers
+        self.write((i & ((1 << (8 * size)) - 1)).to_bytes(size, "little"))
+
+    # Show buf a frame at a time, pause seconds apart (0 for as fast as
+    # they'll go). Frames are views into buf, not copies. Returns how
+    # many bytes were shown; any left over short of a frame are not.
+    def stream(self, buf, pause=0.0):
+        write = self.write
+        size = self.registers
+        if size == 1:
+            frames = buf
+        else:
+            view = memoryview(buf)
+            frames = (view[i:i + size] for i in range(0, len(view) - size + 1, size))
+        if not pause:
+            for frame in frames:
+                write(frame)
+            return len(buf) - len(buf) % size
+        deadline = time.monotonic()
+        for frame in frames:
+            write(frame)
+            # Keep to the rate, however long the writes took
+            deadline += pause
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        return len(buf) - len(buf) % size
+
+    # Show every byte of a file (an open binary file) in turn. Regular
+    # files are memory mapped, anything else (pipes, terminals) is read
+    # CHUNK bytes at a time.
+    def dump(self, f, pause=0.0):
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError, io.UnsupportedOperation):
+            buf = None
+        if buf is not None:
+            # A memoryview, because iterating over an mmap gives bytes
+            # objects rather than ints
+            with buf:
+                view = memoryview(buf)
+                try:
+                    return self.stream(view, pause)
+                finally:
+                    view.release()
+        # read1() hands over whatever has arrived, rather than waiting
+        # for a whole chunk from a slow pipe
+        read = getattr(f, "read1", f.read)
+        count = 0
+        chunk = read(CHUNK)
+        while chunk:
+            shown = self.stream(chunk, pause)
+            count += shown
+            # Carry a part frame over to the next chunk
+            rest = chunk[shown:]
+            chunk = read(CHUNK)
+            if rest and chunk:
+                chunk = rest + chunk
+        return count
+
+    def close(self):
+        self.backend.cleanup()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+#
+# shiftreg-bench.py: Time writes to a simulated 74HC595
+#
+# Copyright (c) 2026 Mike Mallett <mike@nerdcore.net>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Usage: ./shiftreg-bench.py [--bytes N] [--call-cost SECONDS] [stream|chain|spi]
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import types
+import hc595
+
+# Roughly what one RPi.GPIO output() call costs on a Pi 3
+CALL_COST = 0.000002
+
+# Roughly what one spidev ioctl() costs on a Pi 3, on top of the clock
+IOCTL_COST = 0.00002
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      "onesine-PCM-44100Hz-mono-u8.raw")
+
+# The original dumpfile(): a byte per read, 2**bit per bit, and three
+# 30ns sleeps per pulse
+PULSE=30 / 1000000000
+
+def legacy_pulse(sim, pin):
+    sim.output(pin, 0)
+    time.sleep(PULSE)
+    sim.output(pin, 1)
+    time.sleep(PULSE)
+    sim.output(pin, 0)
+    time.sleep(PULSE)
+
+def legacy_int2reg(sim, i):
+    for bit in range(8):
+        if (i & (2**bit)):
+            sim.output(hc595.PINS.data, 1)
+        else:
+            sim.output(hc595.PINS.data, 0)
+        legacy_pulse(sim, hc595.PINS.shift)
+    legacy_pulse(sim, hc595.PINS.store)
+
+def legacy_dump(sim, f):
+    byte = f.read(1)
+    while byte:
+        legacy_int2reg(sim, int.from_bytes(byte, "big"))
+        byte = f.read(1)
+
+def sample(size):
+    with open(SAMPLE, "rb") as f:
+        data = f.read()
+    return (data * (size // len(data) + 1))[:size]
+
+def report(name, sim, count, elapsed):
+    print(format(name, "7s") + ": " + format(count / elapsed, "8.0f") + " bytes/s, "
+          + format(sim.calls / count, "4.1f") + " GPIO calls/byte")
+
+# The sine sample, repeated out to --bytes, with PAUSE = 0
+def bench_stream(args):
+    data = sample(args.bytes)
+
+    sim = hc595.Simulator(args.call_cost)
+    sim.setup(hc595.PINS)
+    start = time.perf_counter()
+    legacy_dump(sim, io.BytesIO(data))
+    report("before", sim, len(data), time.perf_counter() - start)
+    before = sim.latched
+
+    sim = hc595.Simulator(args.call_cost)
+    register = hc595.ShiftRegister(sim)
+    start = time.perf_counter()
+    count = register.dump(io.BytesIO(data))
+    report("after", sim, count, time.perf_counter() - start)
+
+    if sim.latched != before:
+        print("MISMATCH: the register showed something else")
+        exit(1)
+
+# Frames for chains of 4 and 8 registers, a byte at a time with a store
+# after each (as int2reg() would) against a whole frame and one store
+def bench_chain(args):
+    rng = random.Random(1)
+    for size in (4, 8):
+        frames = [bytes(rng.randrange(256) for r in range(size))
+                  for n in range(args.bytes // size)]
+        for wide in (False, True):
+            sim = hc595.Simulator(args.call_cost, size)
+            register = hc595.ShiftRegister(sim, registers=size if wide else 1)
+            start = time.perf_counter()
+            for frame in frames:
+                if wide:
+                    register.write(frame)
+                else:
+                    for byte in reversed(frame):
+                        register.write(byte)
+            elapsed = time.perf_counter() - start
+            shown = set(frames)
+            partial = sum(1 for outputs in sim.latched if sim.frame(outputs) not in shown)
+            print(str(size) + " registers " + ("word" if wide else "byte") + ": "
+                  + format(len(frames) / elapsed, "7.0f") + " frames/s, "
+                  + format(sim.stores / len(frames), "3.1f") + " stores/frame, "
+                  + str(partial) + " part frames shown")
+            if sim.frame() != frames[-1]:
+                print("MISMATCH: the registers show something else")
+                exit(1)
+        if [sim.frame(outputs) for outputs in sim.latched] != frames:
+            print("MISMATCH: the frames came out in the wrong order")
+            exit(1)
+
+# Stands in for spidev.SpiDev, wired to a Simulator the way SPI0 would
+# be: MOSI to DS, SCLK to SH, CE0 to ST. Takes as long as the ioctl and
+# the clocking would.
+class MockSpiDev:
+    sim = None
+    ioctl_cost = IOCTL_COST
+
+    def open(self, bus, device):
+        self.max_speed_hz = 500000
+        self.mode = 0
+        self.transfers = 0
+
+    def writebytes2(self, data):
+        sim = self.sim
+        pins = sim.pins
+        end = time.perf_counter() + self.ioctl_cost + 8 * len(data) / self.max_speed_hz
+        self.transfers += 1
+        sim.output(pins.store, 0)
+        for byte in data:
+            # MSB first, the only way the Pi's SPI goes
+            for bit in range(7, -1, -1):
+                sim.output(pins.data, (byte >> bit) & 1)
+                sim.output(pins.shift, 1)
+                sim.output(pins.shift, 0)
+        sim.output(pins.store, 1)
+        while time.perf_counter() < end:
+            pass
+
+    def close(self):
+        pass
+
+# The sine sample through a chain of 1 and 4 registers, bit-banged and
+# through a mock spidev. The outputs have to go through exactly the same
+# frames both ways, which shows the byte and bit order are int2reg()'s.
+def bench_spi(args):
+    sys.modules["spidev"] = types.SimpleNamespace(SpiDev=MockSpiDev)
+    data = sample(args.bytes)
+    for size in (1, 4):
+        sim = hc595.Simulator(args.call_cost, size)
+        register = hc595.ShiftRegister(sim, hc595.SPI_PINS, size)
+        start = time.perf_counter()
+        count = register.dump(io.BytesIO(data))
+        elapsed = time.perf_counter() - start
+        print(str(size) + " registers bit-bang: " + format(count / elapsed, "8.0f") + " bytes/s, "
+              + format(sim.calls / (count // size), "5.1f") + " GPIO calls/frame")
+        before = sim.latched
+
+        # The mock's own pin changes are free, the time is in the ioctl
+        sim = hc595.Simulator(0.0, size)
+        sim.setup(hc595.SPI_PINS)
+        MockSpiDev.sim = sim
+        spi = hc595.SPI()
+        register = hc595.ShiftRegister(spi, hc595.SPI_PINS, size)
+        start = time.perf_counter()
+        count = register.dump(io.BytesIO(data))
+        elapsed = time.perf_counter() - start
+        print(str(size) + " registers SPI     : " + format(count / elapsed, "8.0f") + " bytes/s, "
+              + format(spi.spi.transfers / (count // size), "5.1f") + " transfers/frame, "
+              + format(sim.stores / (count // size), "3.1f") + " stores/frame")
+        if sim.latched != before:
+            print("MISMATCH: SPI showed something else")
+            exit(1)
+
+    # int2reg(1) lights BIT_7, as it always has
+    sim = hc595.Simulator()
+    sim.setup(hc595.SPI_PINS)
+    MockSpiDev.sim = sim
+    hc595.ShiftRegister(hc595.SPI(), hc595.SPI_PINS).write_int(1)
+    if sim.outputs != 0x80:
+        print("MISMATCH: int2reg(1) over SPI showed " + format(sim.outputs, "08b"))
+        exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="74HC595 write benchmark")
+    parser.add_argument("bench", nargs="?", default="stream", choices=["stream", "chain", "spi"])
+    parser.add_argument("--bytes", type=int, default=2000, help="bytes to send")
+    parser.add_argument("--call-cost", type=float, default=CALL_COST,
+                        help="simulated cost of one GPIO output() call in seconds")
+    args = parser.parse_args()
+    if args.bench == "stream":
+        bench_stream(args)
+    elif args.bench == "chain":
+        bench_chain(args)
+    else:
+        bench_spi(args)
+
+if __name__ == '__main__':
+    main()
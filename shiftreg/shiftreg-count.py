@@ -30,62 +30,51 @@
 #  -/GND -|     |- BIT_7'
 #         +-----+
 
-import RPi.GPIO as GPIO
+import argparse
 import time
-
-GPIO.setwarnings(False)
-
-# https://www.ti.com/lit/ds/symlink/sn74hc595.pdf
-# At 25C ambient temp and 4.5V, minimum pulse is 20ns
-PULSE=30 / 1000000000
-#PULSE=0.01
+import hc595
 
 # You should change these to match your setup
-GPIO.setmode(GPIO.BCM)
 PIN_DATA=17  # DS "Data Serial"
 PIN_STORE=27 # SH "Shift"
 PIN_OUT=18   # ST "Store"
 PAUSE=0.1
+# 74HC595s chained, BIT_7' to DS, counting as one wide number
+REGISTERS=1
 
-GPIO.setup(PIN_DATA, GPIO.OUT)
-GPIO.setup(PIN_STORE, GPIO.OUT)
-GPIO.setup(PIN_OUT, GPIO.OUT)
-# Clear all pins
-GPIO.output(PIN_DATA, 0)
-GPIO.output(PIN_STORE, 0)
-GPIO.output(PIN_OUT, 0)
+register = None
 
-# Push the low 8 bits of the given integer to the register
-# If you have reversed your output pins, change the if to:
-#   if (i & (7-(2**bit))):
+# Push the given integer to the registers, the low byte to the first,
+# bit 0 first. If you have reversed your output pins, reverse hc595.BITS
 def int2reg(i):
-    for bit in range(8):
-        if (i & (2**bit)): # Backwards??
-            GPIO.output(PIN_DATA, 1)
-        else:
-            GPIO.output(PIN_DATA, 0)
-        pulse(PIN_STORE)
-    pulse(PIN_OUT)
+    register.write_int(i)
 
-def pulse(pin):
-    GPIO.output(pin, 0)
-    time.sleep(PULSE)
-    GPIO.output(pin, 1)
-    time.sleep(PULSE)
-    GPIO.output(pin, 0)
-    time.sleep(PULSE)
-
-def count():
+def count(pause):
     while 1:
-        for x in range(256):
+        for x in range(256 ** register.registers):
             int2reg(x)
-            time.sleep(PAUSE)
+            time.sleep(pause)
+
+def main():
+    global register
+    parser = argparse.ArgumentParser(description="Binary counter for 74HC595s")
+    parser.add_argument("--pause", type=float, default=PAUSE, help="seconds between counts")
+    parser.add_argument("--registers", type=int, default=REGISTERS,
+                        help="74HC595s chained, counting as one wide number")
+    parser.add_argument("--spi", action="store_true",
+                        help="send through SPI0 (DS on MOSI, SH on SCLK, ST on CE0), "
+                        + "bit-banging those pins if SPI is not available")
+    args = parser.parse_args()
+    backend, pins = hc595.open_backend(args.spi, hc595.Pins(PIN_DATA, PIN_STORE, PIN_OUT))
+    register = hc595.ShiftRegister(backend, pins, args.registers)
+    count(args.pause)
 
 if __name__ == '__main__':
   try:
-    count()
+    main()
   except KeyboardInterrupt:
     pass
   finally:
-    int2reg(0)
-    GPIO.cleanup()
+    if register:
+      int2reg(0)
+      register.close()
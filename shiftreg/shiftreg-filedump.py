@@ -32,71 +32,68 @@
 #         +-----+
 
 
-import RPi.GPIO as GPIO
-import time
+import argparse
 import sys
-
-GPIO.setwarnings(False)
-
-# https://www.ti.com/lit/ds/symlink/sn74hc595.pdf
-# At 25C ambient temp and 4.5V, minimum pulse is 20ns
-PULSE=30 / 1000000000
+import time
+import hc595
 
 # You should change these to match your setup
-GPIO.setmode(GPIO.BCM)
 PIN_DATA=17  # DS "Data Serial"
 PIN_STORE=27 # SH "Shift"
 PIN_OUT=18   # ST "Store"
+# Seconds between frames, 0 for as fast as they'll go
 PAUSE=0.1
+# 74HC595s chained, BIT_7' to DS. Each frame is a byte for each.
+REGISTERS=1
 
-GPIO.setup(PIN_DATA, GPIO.OUT)
-GPIO.setup(PIN_STORE, GPIO.OUT)
-GPIO.setup(PIN_OUT, GPIO.OUT)
-# Clear all pins
-GPIO.output(PIN_DATA, 0)
-GPIO.output(PIN_STORE, 0)
-GPIO.output(PIN_OUT, 0)
+register = None
 
-# Push the low 8 bits of the given integer to the register
-# If you have reversed your output pins, change the if to:
-#   if (i & (7-(2**bit))):
+# Push the given integer to the registers, the low byte to the first,
+# bit 0 first. If you have reversed your output pins, reverse hc595.BITS
 def int2reg(i):
-    for bit in range(8):
-        if (i & (2**bit)): # Backwards??
-            GPIO.output(PIN_DATA, 1)
-        else:
-            GPIO.output(PIN_DATA, 0)
-        pulse(PIN_STORE)
-    pulse(PIN_OUT)
-
-def pulse(pin):
-    GPIO.output(pin, 0)
-    time.sleep(PULSE)
-    GPIO.output(pin, 1)
-    time.sleep(PULSE)
-    GPIO.output(pin, 0)
-    time.sleep(PULSE)
+    register.write_int(i)
 
-def dumpfile(filename):
+# Stream the whole file through the register, "-" for stdin
+def dumpfile(filename, pause):
     print(filename)
-    with open(filename, "rb") as f:
-        byte = f.read(1)
-        while byte:
-            int2reg(int.from_bytes(byte, "big"))
-            byte = f.read(1)
-            time.sleep(PAUSE)
+    start = time.perf_counter()
+    if filename == "-":
+        count = register.dump(sys.stdin.buffer, pause)
+    else:
+        with open(filename, "rb") as f:
+            count = register.dump(f, pause)
+    elapsed = time.perf_counter() - start
+    if elapsed:
+        print(str(count) + " bytes, " + format(count / elapsed, ".0f") + " bytes/s")
 
 def main():
-    args = len(sys.argv)
-    if (args < 2):
-        print("Please specify at least one filename")
-        exit(1)
-    for a in range(1, args):
-        dumpfile(sys.argv[a])
+    global register
+    parser = argparse.ArgumentParser(description="Dump each byte of a file to a 74HC595")
+    parser.add_argument("--pause", type=float, default=PAUSE,
+                        help="seconds between frames, 0 for as fast as possible")
+    parser.add_argument("--registers", type=int, default=REGISTERS,
+                        help="74HC595s chained, each frame is a byte for each")
+    parser.add_argument("--sim", action="store_true",
+                        help="drive a simulated 74HC595 instead of the GPIO pins")
+    parser.add_argument("files", nargs="+", metavar="file")
+    parser.add_argument("--spi", action="store_true",
+                        help="send through SPI0 (DS on MOSI, SH on SCLK, ST on CE0), "
+                        + "bit-banging those pins if SPI is not available")
+    args = parser.parse_args()
+    if args.sim:
+        backend = hc595.Simulator(registers=args.registers)
+        backend.record = False
+        pins = hc595.Pins(PIN_DATA, PIN_STORE, PIN_OUT)
+    else:
+        backend, pins = hc595.open_backend(args.spi, hc595.Pins(PIN_DATA, PIN_STORE, PIN_OUT))
+    register = hc595.ShiftRegister(backend, pins, args.registers)
+    for filename in args.files:
+        dumpfile(filename, args.pause)
 
 def end():
-    int2reg(0)
-    GPIO.cleanup
+    if register:
+        int2reg(0)
+        register.close()
 
 if __name__ == '__main__':
   try: